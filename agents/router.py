@@ -22,6 +22,7 @@ class AgentRouter(BaseAgent):
         """Initialize the workflow state and task status."""
         self.task_status = {
             "data_loading": {"status": "pending", "result": None},
+            "sampling": {"status": "pending", "result": None},
             "analysis": {"status": "pending", "result": None},
             "visualization": {"status": "pending", "result": None},
             "reporting": {"status": "pending", "result": None}
@@ -50,7 +51,7 @@ class AgentRouter(BaseAgent):
         
     def get_next_task(self) -> Optional[str]:
         """Determine the next task to be executed based on current state."""
-        task_sequence = ["data_loading", "analysis", "visualization", "reporting"]
+        task_sequence = ["data_loading", "sampling", "analysis", "visualization", "reporting"]
         
         for task in task_sequence:
             if self.task_status[task]["status"] == "pending":
@@ -79,6 +80,11 @@ class AgentRouter(BaseAgent):
                     self.current_state["processed_datasets"] = data["processed_datasets"]
                     self.update_task_status("data_loading", "completed", data)
                     response["message"] = "Data loading completed successfully"
+                elif data and "sampled_datasets" in data:
+                    # Downstream agents work on the samples; full data is used when sampling is skipped
+                    self.current_state["processed_datasets"] = data["sampled_datasets"]
+                    self.update_task_status("sampling", "completed", data)
+                    response["message"] = "Sampling completed successfully"
                     
             elif sender == "analyzer":
                 if data and "analysis_results" in data:
@@ -119,9 +125,9 @@ class AgentRouter(BaseAgent):
     def _convert_to_serializable(self, obj: Any) -> Any:
         """Helper function to recursively convert objects to JSON serializable types."""
         if isinstance(obj, pd.DataFrame):
-            return obj.to_dict(orient='records')
+            return self._convert_to_serializable(obj.to_dict(orient='records'))
         elif isinstance(obj, pd.Series):
-            return obj.tolist()
+            return self._convert_to_serializable(obj.tolist())
         elif isinstance(obj, (pd.Timestamp, pd.Timedelta)):
             return obj.isoformat()
         elif isinstance(obj, (int, float, str, bool, type(None))):
@@ -183,7 +189,12 @@ class AgentRouter(BaseAgent):
                 break
                 
         # Create recovery steps
-        if recovery_plan["failed_task"] == "data_loading":
+        if recovery_plan["failed_task"] == "sampling":
+            recovery_plan["recovery_steps"] = [
+                "Check that the strata columns exist in every dataset",
+                "Rerun with --full-data to skip sampling"
+            ]
+        elif recovery_plan["failed_task"] == "data_loading":
             recovery_plan["recovery_steps"] = [
                 "Verify input data exists and is accessible",
                 "Check CSV file format and encoding",
@@ -0,0 +1,77 @@
+"""Benchmark the fused descriptive statistics kernel against the per-column loop.
+
+Run from the repository root:
+
+    python benchmarks/descriptive_statistics.py
+"""
+import sys
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from tools.analysis_tools import AnalysisTools
+
+def descriptive_statistics_reference(df: pd.DataFrame, columns: List[str] = None) -> Dict[str, Dict[str, float]]:
+    """The previous implementation: seven pandas reductions per column."""
+    if columns is None:
+        columns = df.select_dtypes(include=[np.number]).columns
+    
+    stats = {}
+    for col in columns:
+        stats[col] = {
+            'mean': df[col].mean(),
+            'median': df[col].median(),
+            'std': df[col].std(),
+            'min': df[col].min(),
+            'max': df[col].max(),
+            'skewness': df[col].skew(),
+            'kurtosis': df[col].kurtosis()
+        }
+    return stats
+
+def make_frame(rows: int, columns: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    data = rng.lognormal(mean=14, sigma=1, size=(rows, columns))
+    data[rng.random(size=data.shape) < 0.01] = np.nan
+    return pd.DataFrame(data, columns=[f"col_{i}" for i in range(columns)])
+
+def best_of(func, repeat: int = 3) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    shapes = {
+        "wide": (20_000, 500),
+        "tall": (2_000_000, 5),
+        "transactions": (1_000_000, 6)
+    }
+    
+    print(f"{'frame':<14}{'shape':>18}{'reference':>12}{'fused':>10}{'sketch':>10}{'speedup':>9}  max rel. error")
+    for name, (rows, columns) in shapes.items():
+        df = make_frame(rows, columns)
+        reference_time = best_of(lambda: descriptive_statistics_reference(df))
+        fused_time = best_of(lambda: AnalysisTools.descriptive_statistics(df))
+        sketch_time = best_of(lambda: AnalysisTools.descriptive_statistics(df, exact_median=False))
+        
+        reference = descriptive_statistics_reference(df)
+        fused = AnalysisTools.descriptive_statistics(df)
+        error = max(
+            abs(fused[col][stat] - value) / max(abs(value), 1e-12)
+            for col, stats in reference.items()
+            for stat, value in stats.items()
+        )
+        
+        print(
+            f"{name:<14}{f'{rows}x{columns}':>18}{reference_time:>11.3f}s{fused_time:>9.3f}s"
+            f"{sketch_time:>9.3f}s{reference_time / fused_time:>8.1f}x  {error:.2e}"
+        )
+
+if __name__ == "__main__":
+    main()
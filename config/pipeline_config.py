@@ -0,0 +1,141 @@
+from typing import Dict
+
+# Explicit column types for the transaction exports in data/input.
+# Columns missing from a file are simply ignored.
+TRANSACTION_SCHEMA = {
+    "Tanggal": "datetime64[ns]",
+    "Jumlah": "float64",
+    "Metode Pembayaran": "category",
+    "Kategori": "category",
+}
+
+pipeline_config = {
+    "ingestion": {
+        "schema": TRANSACTION_SCHEMA,
+        "engine": "pyarrow",      # "pyarrow", "c" or "python"
+        "executor": "thread",     # "thread" or "process"
+        "max_workers": None,      # None lets the pool pick based on CPU count
+    },
+    "cache": {
+        "enabled": True,
+        "cache_dir": "data/cache/preprocessed",
+        "max_size_mb": 1024,      # least recently used entries are evicted above this
+    },
+    "chunked": {
+        "threshold_mb": 512,      # inputs larger than this are preprocessed out of core
+        "chunksize": 100_000,     # rows per batch
+    },
+    "compact": {
+        "enabled": True,
+        "max_category_ratio": 0.5,  # text columns with fewer unique values than this share become category
+    },
+    "outliers": {
+        "method": "iqr",          # "iqr", "zscore" or "mad"
+        "threshold": None,        # None uses the rule's default (1.5, 3.0 or 3.5)
+        "exclude_from_analysis": False,
+        "highlight_in_plots": True,
+    },
+    "incremental": {
+        "enabled": False,         # only parse rows appended since the previous run
+        "id_column": "ID Transaksi",
+        "state_dir": "data/processed/incremental",
+    },
+    "codebook": {
+        "enabled": True,          # stable category codes shared by every file, chunk and worker
+        "codebook_dir": "data/codebook",
+    },
+    "sampling": {
+        "enabled": True,          # main.py --full-data skips sampling
+        "min_rows": 1_000_000,    # smaller datasets are always analyzed in full
+        "sample_size": 100_000,
+        "strata_columns": ["Kategori", "Metode Pembayaran"],
+        "seed": 42,
+        "chunksize": 1_000_000,
+        "confidence": 0.95,
+    },
+    "analysis_cache": {
+        "enabled": True,          # memoize analysis results across runs
+        "cache_dir": "data/cache/analysis",
+        "max_size_mb": 256,
+    },
+    "analysis": {
+        "correlation_method": "pearson",  # "pearson" or "spearman"
+        "correlation_missing": "pairwise",  # "pairwise" (as pandas) or "listwise": drop incomplete rows, one matrix product
+        "executor": "thread",     # pool for analyze_datasets: "thread" or "process"
+        "max_workers": None,      # None uses the CPU count
+        "task_timeout": None,     # seconds per analysis task, None for no limit
+    },
+    "visualization": {
+        "executor": "process",    # "process" renders plots in a persistent headless worker pool, "serial" in this process
+        "max_workers": None,      # None uses the CPU count
+        "large_threshold": 200_000,  # rows above which histograms and the pairplot are drawn from bin counts
+        "histogram_bins": 50,
+        "kde_sample": 10_000,     # KDE curves on large frames are fitted on at most this many values
+        "seed": 42,
+        "interactive_mode": "bundle",  # "bundle": shared plotly.js, binary arrays and a dashboard; "standalone": self-contained HTML per figure
+        "webgl_threshold": 10_000,  # rows above which scatter and line traces use WebGL
+    },
+    "plot_store": {
+        "enabled": True,          # reuse rendered plots whose spec and input columns are unchanged
+        "store_dir": "output/plot_store",
+        "max_size_mb": 512,
+        "keep_runs": 3,           # older runs' plot directories and images only they used are collected
+    },
+    "report_media": {
+        "enabled": True,          # embed downscaled, palette-compressed copies of figures in DOCX reports
+        "media_dir": "output/reports/media",
+        "width_inches": 6.5,      # matches the embedded picture width
+        "dpi": 150,
+        "colors": 256,            # palette size; 0 keeps full RGB
+        "contact_sheet_threshold": 4,  # this many per-column histograms or more are tiled into one image
+        "contact_sheet_columns": 3,
+    },
+    "reports": {
+        "format": "docx",         # "docx", "html" or "markdown"; HTML/Markdown stream to disk and link images
+        "executor": "process",    # "process", "thread" or "serial" pool for datasets × report types
+        "max_workers": None,      # None lets the executor pick (CPU count)
+        "template_dir": None,     # directory with {format}_{element}.tmpl overrides
+    },
+    "regression": {
+        "target_column": None,    # None picks the first candidate present, else the most continuous float column
+        "target_candidates": ["Jumlah"],
+    },
+    "timeseries": {
+        "date_column": "Tanggal",
+        "value_column": None,     # None uses the regression target selection
+        "group_columns": ["Kategori", "Metode Pembayaran"],
+        "frequencies": ["daily", "weekly", "monthly"],
+        "rolling_windows": {"daily": 7, "weekly": 4, "monthly": 3},
+    },
+    "segmented": {
+        "segment_columns": ["Kategori", "Metode Pembayaran", "Nama Pengirim"],
+        "max_segments": 10,       # remaining values are folded into an "other" segment
+    },
+    "approximate": {
+        "distinct_columns": ["Nama Pengirim", "ID Transaksi"],
+        "frequency_columns": ["Nama Pengirim", "Kategori", "Metode Pembayaran"],
+        "quantile_columns": ["Jumlah"],
+        "quantiles": [0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99],
+        "top_k": 10,
+        "hll_precision": 14,      # 2^14 registers: ~0.8% relative standard error in 16 KB
+        "cms_width": 2048,        # overcount at most e / width of the total count
+        "cms_depth": 5,           # ... with probability 1 - e^-depth
+        "cms_capacity": 100,      # heavy-hitter candidates kept per column
+        "kll_k": 200,
+        "chunksize": 1_000_000,
+        "sketches_dir": "output/analysis",
+    },
+    "clustering": {
+        "n_clusters": 3,
+        "k_range": None,          # e.g. [2, 3, 4, 5, 6, 7, 8] to sweep candidate k in parallel
+        "selection": "elbow",     # "elbow" (inertia) or "silhouette" (sampled)
+        "mini_batch_threshold": 100_000,  # rows above which mini-batch k-means is used
+        "silhouette_sample": 5_000,
+        "max_workers": None,
+        "labels_dir": "output/clusters",
+    },
+}
+
+# Define a function to return the pipeline_config
+def get_pipeline_config() -> Dict:
+    return pipeline_config
@@ -1,18 +1,45 @@
 # File: main.py
 
 from config.llm_config import get_llm_config
-from agents.data_loader_agent import DataLoaderAgent
-from agents.analyzer_agent import AnalyzerAgent
-from agents.visualization_agent import VisualizationAgent
-from agents.reporter_agent import ReporterAgent
-from agents.router import AgentRouter
+from tools.data_tools import DataTools
+from stages.analyzer_stage import ANALYSIS_TYPES
 from pathlib import Path
-import autogen
+from typing import Dict, Any
+import argparse
+import importlib
+import time
+
+# Agent classes by name; each module is imported, and the agent with its
+# LLM client built, only when a stage first asks for it
+AGENT_CLASSES = {
+    "router": ("agents.router", "AgentRouter"),
+    "data_loader": ("agents.data_loader_agent", "DataLoaderAgent"),
+    "analyzer": ("agents.analyzer_agent", "AnalyzerAgent"),
+    "visualizer": ("agents.visualization_agent", "VisualizationAgent"),
+    "reporter": ("agents.reporter_agent", "ReporterAgent"),
+}
+
+class Agents:
+    """Builds each pipeline agent on first access."""
+    
+    def __init__(self, llm_config: Dict[str, Any]):
+        self.llm_config = llm_config
+        self.built = {}
+        
+    def __getitem__(self, name: str):
+        if name not in self.built:
+            started = time.perf_counter()
+            module_name, class_name = AGENT_CLASSES[name]
+            agent_class = getattr(importlib.import_module(module_name), class_name)
+            self.built[name] = agent_class(name=name, llm_config=self.llm_config)
+            print(f"Built {name} agent in {time.perf_counter() - started:.2f}s")
+        return self.built[name]
 
 def create_output_directories():
     """Create necessary output directories if they don't exist."""
     directories = [
         "data/processed",
+        "output/analysis",
         "output/visualizations",
         "output/reports"
     ]
@@ -20,7 +47,9 @@ def create_output_directories():
     for directory in directories:
         Path(directory).mkdir(parents=True, exist_ok=True)
 
-def main():
+def main(full_data: bool = False, fast_startup: bool = False, report_format: str = None):
+    started = time.perf_counter()
+    
     # Create output directories
     create_output_directories()
     
@@ -28,42 +57,25 @@ def main():
     llm_config = get_llm_config()
     
     # Initialize agents
-    router = AgentRouter(
-        name="router",
-        llm_config=llm_config
-    )
-    
-    data_loader = DataLoaderAgent(
-        name="data_loader",
-        llm_config=llm_config
-    )
+    agents = Agents(llm_config)
+    router = agents["router"]
     
-    analyzer = AnalyzerAgent(
-        name="analyzer",
-        llm_config=llm_config
-    )
-    
-    visualizer = VisualizationAgent(
-        name="visualizer",
-        llm_config=llm_config
-    )
-    
-    reporter = ReporterAgent(
-        name="reporter",
-        llm_config=llm_config
-    )
+    if not fast_startup:
+        import autogen
+        
+        # Create group chat with router
+        groupchat = autogen.GroupChat(
+            agents=[agents[name] for name in AGENT_CLASSES],
+            messages=[],
+            max_round=50
+        )
+        
+        manager = autogen.GroupChatManager(
+            groupchat=groupchat,
+            llm_config=llm_config
+        )
     
-    # Create group chat with router
-    groupchat = autogen.GroupChat(
-        agents=[router, data_loader, analyzer, visualizer, reporter],
-        messages=[],
-        max_round=50
-    )
-    
-    manager = autogen.GroupChatManager(
-        groupchat=groupchat,
-        llm_config=llm_config
-    )
+    print(f"Startup took {time.perf_counter() - started:.2f}s ({len(agents.built)} agents built)")
     
     try:
         # Initialize workflow
@@ -80,25 +92,37 @@ def main():
             
             if next_task == "data_loading":
                 # Load and preprocess data
-                processed_dfs = data_loader.load_and_preprocess()
+                data_loader = agents["data_loader"]
+                processed_dfs = data_loader.load_and_preprocess(full_data=full_data)
                 router.route_message(
                     "data_loader",
                     "Data loading completed",
                     {"processed_datasets": processed_dfs}  # Data is now DataFrame
                 )
                 
+            elif next_task == "sampling":
+                # Exploratory runs work on stratified samples of large datasets
+                data_loader = agents["data_loader"]
+                sampled_dfs = data_loader.sample_datasets(
+                    router.current_state["processed_datasets"],
+                    full_data=full_data
+                )
+                router.route_message(
+                    "data_loader",
+                    "Sampling completed",
+                    {"sampled_datasets": sampled_dfs}
+                )
+                
             elif next_task == "analysis":
-                # Analyze each dataset
-                analysis_results = {}
-                for dataset_name, df in router.current_state["processed_datasets"].items():
-                    numeric_columns = df.select_dtypes(include=['int64', 'float64']).columns.tolist()
-                    results = analyzer.analyze_dataset(
-                        df=df,
-                        analysis_types=["descriptive", "correlation", "regression", "clustering"],
-                        feature_columns=numeric_columns
-                    )
-                    analysis_results[dataset_name] = results
-                    
+                # Analyze every dataset, fanning analysis types and datasets out to a pool
+                datasets = router.current_state["processed_datasets"]
+                analyzer = agents["analyzer"]
+                analysis_results = analyzer.analyze_datasets(
+                    datasets,
+                    analysis_types=ANALYSIS_TYPES,
+                    feature_columns={name: DataTools.feature_columns(df) for name, df in datasets.items()}
+                )
+                
                 router.route_message(
                     "analyzer",
                     "Analysis completed",
@@ -107,14 +131,25 @@ def main():
                 
             elif next_task == "visualization":
                 # Create visualizations for each dataset
+                visualizer = agents["visualizer"]
                 visualization_files = {}
                 for dataset_name, df in router.current_state["processed_datasets"].items():
-                    numeric_columns = df.select_dtypes(include=['int64', 'float64']).columns.tolist()
+                    numeric_columns = DataTools.feature_columns(df)
+                    datetime_columns = list(df.select_dtypes(include=['datetime64']).columns)
+                    # Plot against the same target the regression used, so the time series branch fires
+                    dataset_results = router.current_state["analysis_results"].get(dataset_name, {})
+                    target_column = dataset_results.get("regression_analysis", {}).get("target")
                     viz_files = visualizer.create_visualizations(
                         df=df,
-                        columns=numeric_columns
+                        columns=numeric_columns + datetime_columns,
+                        target_column=target_column,
+                        dataset_name=dataset_name
                     )
                     visualization_files[dataset_name] = viz_files
+                visualizer.close()
+                visualizer.collect_plots()
+                slowest = sorted(visualizer.plot_timings, key=lambda timing: timing["seconds"], reverse=True)[:3]
+                print("Slowest plots: " + ", ".join(f"{timing['file']} ({timing['seconds']:.2f}s)" for timing in slowest))
                     
                 router.route_message(
                     "visualizer",
@@ -124,18 +159,18 @@ def main():
                 
             elif next_task == "reporting":
                 # Generate reports for each dataset
-                report_paths = []
+                reporter = agents["reporter"]
+                jobs = []
                 for dataset_name in router.current_state["processed_datasets"].keys():
-                    analysis_results = router.current_state["analysis_results"][dataset_name]
-                    visualization_files = router.current_state["visualization_files"][dataset_name]
-                    
                     for report_type in ["technical", "business"]:
-                        report_path = reporter.create_report(
-                            analysis_results=analysis_results,
-                            visualization_files=visualization_files,
-                            report_type=report_type
-                        )
-                        report_paths.append(report_path)
+                        jobs.append({
+                            "analysis_results": router.current_state["analysis_results"][dataset_name],
+                            "visualization_files": router.current_state["visualization_files"][dataset_name],
+                            "report_type": report_type,
+                            "dataset_name": dataset_name
+                        })
+                # Every dataset × report type combination is rendered in the report pool
+                report_paths = reporter.create_reports(jobs, report_format=report_format)
                         
                 router.route_message(
                     "reporter",
@@ -153,4 +188,25 @@ def main():
             print(f"- {step}")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Multi-agent data analysis pipeline")
+    parser.add_argument("--full-data", action="store_true", help="analyze every row instead of stratified samples")
+    parser.add_argument(
+        "--fast-startup",
+        action="store_true",
+        help="build agents only when their stage runs and skip the unused group chat"
+    )
+    parser.add_argument(
+        "--report-format",
+        choices=["docx", "html", "markdown"],
+        default=None,
+        help="report format (default from the pipeline config)"
+    )
+    parser.add_argument("--import-report", action="store_true", help="print where importing the pipeline spends time and exit")
+    args = parser.parse_args()
+    
+    if args.import_report:
+        from tools.startup_tools import StartupTools
+        StartupTools.print_report(StartupTools.import_report("main"))
+        StartupTools.print_report(StartupTools.import_report("agents.router"))
+    else:
+        main(full_data=args.full_data, fast_startup=args.fast_startup, report_format=args.report_format)
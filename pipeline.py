@@ -0,0 +1,149 @@
+# File: pipeline.py
+#
+# Batch entry point that runs the pipeline stages directly, without autogen,
+# LLM clients or an API key. Usage:
+#   python pipeline.py --input-dir data/input --stages load,analyze,visualize,report --workers 4
+#   python pipeline.py --stages load,report --report-format html
+
+from stages.data_loader_stage import DataLoaderStage
+from stages.analyzer_stage import AnalyzerStage, ANALYSIS_TYPES
+from stages.visualization_stage import VisualizationStage
+from stages.reporter_stage import ReporterStage
+from tools.data_tools import DataTools
+from pathlib import Path
+from typing import Dict, Any, List
+import argparse
+import json
+import time
+
+try:
+    import resource
+except ImportError:  # Windows: no peak memory report
+    resource = None
+
+STAGES = ["load", "sample", "analyze", "visualize", "report"]
+
+def load_saved_results(dataset_names: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Analysis results written by an earlier run, for runs that skip the analyze stage."""
+    results = {}
+    for name in dataset_names:
+        path = Path(f"output/analysis/{name}_results.json")
+        if path.exists():
+            with open(path, "r") as f:
+                results[name] = json.load(f)
+        else:
+            print(f"No saved analysis results for {name}")
+            results[name] = {}
+    return results
+
+def run_pipeline(
+    input_dir: str = "data/input",
+    stages: List[str] = None,
+    workers: int = None,
+    executor: str = None,
+    report_types: List[str] = None,
+    report_format: str = None
+) -> Dict[str, Any]:
+    """Run the selected stages in order and return their outputs and timings."""
+    stages = stages or STAGES
+    report_types = report_types or ["technical", "business"]
+    for directory in ["data/processed", "output/analysis", "output/visualizations", "output/reports"]:
+        Path(directory).mkdir(parents=True, exist_ok=True)
+
+    timings = {}
+    outputs = {}
+
+    # Every other stage works on the loaded datasets, so loading always runs
+    started = time.perf_counter()
+    data_loader = DataLoaderStage()
+    # Without the sample stage, large chunked inputs are loaded in full too
+    datasets = data_loader.load_and_preprocess(input_dir=input_dir, full_data="sample" not in stages)
+    timings["load"] = time.perf_counter() - started
+    print(f"Loaded {len(datasets)} datasets from {input_dir}")
+
+    if "sample" in stages:
+        started = time.perf_counter()
+        datasets = data_loader.sample_datasets(datasets)
+        timings["sample"] = time.perf_counter() - started
+
+    if "analyze" in stages:
+        started = time.perf_counter()
+        analyzer = AnalyzerStage()
+        outputs["analysis_results"] = analyzer.analyze_datasets(
+            datasets,
+            analysis_types=ANALYSIS_TYPES,
+            feature_columns={name: DataTools.feature_columns(df) for name, df in datasets.items()},
+            executor=executor,
+            max_workers=workers
+        )
+        timings["analyze"] = time.perf_counter() - started
+    elif "visualize" in stages or "report" in stages:
+        outputs["analysis_results"] = load_saved_results(list(datasets))
+
+    if "visualize" in stages:
+        started = time.perf_counter()
+        visualizer = VisualizationStage()
+        outputs["visualization_files"] = {}
+        for dataset_name, df in datasets.items():
+            dataset_results = outputs["analysis_results"].get(dataset_name, {})
+            outputs["visualization_files"][dataset_name] = visualizer.create_visualizations(
+                df=df,
+                columns=DataTools.feature_columns(df) + list(df.select_dtypes(include=['datetime64']).columns),
+                target_column=dataset_results.get("regression_analysis", {}).get("target"),
+                max_workers=workers,
+                dataset_name=dataset_name
+            )
+        visualizer.close()
+        visualizer.collect_plots()
+        timings["visualize"] = time.perf_counter() - started
+
+    if "report" in stages:
+        started = time.perf_counter()
+        reporter = ReporterStage()
+        jobs = [
+            {
+                "analysis_results": outputs["analysis_results"].get(dataset_name, {}),
+                "visualization_files": outputs.get("visualization_files", {}).get(dataset_name, {'static': [], 'interactive': []}),
+                "report_type": report_type,
+                "dataset_name": dataset_name
+            }
+            for dataset_name in datasets
+            for report_type in report_types
+        ]
+        outputs["report_paths"] = reporter.create_reports(jobs, report_format=report_format, max_workers=workers)
+        timings["report"] = time.perf_counter() - started
+
+    outputs["timings"] = timings
+    return outputs
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the analysis pipeline without agents or LLM clients")
+    parser.add_argument("--input-dir", default="data/input", help="directory with the input CSV files")
+    parser.add_argument(
+        "--stages",
+        default=",".join(STAGES),
+        help=f"comma-separated stages to run, from {','.join(STAGES)} (load always runs)"
+    )
+    parser.add_argument("--workers", type=int, default=None, help="worker count for the analysis and plot pools")
+    parser.add_argument("--executor", choices=["thread", "process"], default=None, help="analysis pool type")
+    parser.add_argument(
+        "--report-format",
+        choices=["docx", "html", "markdown"],
+        default=None,
+        help="report format (default from the pipeline config)"
+    )
+    args = parser.parse_args()
+
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(unknown)}")
+
+    started = time.perf_counter()
+    outputs = run_pipeline(args.input_dir, stages, args.workers, args.executor, report_format=args.report_format)
+    for stage, seconds in outputs["timings"].items():
+        print(f"{stage}: {seconds:.2f}s")
+    print(f"Pipeline finished in {time.perf_counter() - started:.2f}s")
+    if resource is not None:
+        # ru_maxrss is in kilobytes on Linux
+        print(f"Peak memory: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
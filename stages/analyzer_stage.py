@@ -0,0 +1,460 @@
+from stages.base_stage import BaseStage
+from tools.analysis_tools import AnalysisTools, ANALYSIS_VERSION
+from tools.cache_tools import AnalysisCache, SIDECAR_KEYS
+from tools.data_tools import DataTools
+from config.pipeline_config import get_pipeline_config
+from tools.parallel_tools import shared_frames, SharedFrame
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Any, List, Optional
+from pathlib import Path
+import pandas as pd
+import numpy as np
+import json
+import os
+import time
+
+# Analysis types run by the pipeline entry points, in order
+ANALYSIS_TYPES = ["descriptive", "correlation", "regression", "timeseries", "clustering", "segmented", "approximate"]
+
+# Analysis types that read the results of another type on the same dataset
+ANALYSIS_DEPENDENCIES = {"segmented": "clustering"}
+
+class AnalyzerStage(BaseStage):
+    name = "analyzer"
+    
+    def __init__(self):
+        self.tools = AnalysisTools()
+        
+    def _convert_to_serializable(self, obj: Any) -> Any:
+        """Helper function to recursively convert objects to JSON serializable types."""
+        if isinstance(obj, pd.DataFrame):
+            return self._convert_to_serializable(obj.to_dict(orient='records'))
+        elif isinstance(obj, pd.Series):
+            return self._convert_to_serializable(obj.tolist())
+        elif isinstance(obj, (pd.Timestamp, pd.Timedelta)):
+            return obj.isoformat()
+        elif isinstance(obj, (int, float, str, bool, type(None))):
+            return obj
+        elif isinstance(obj, np.integer):
+            return int(obj)
+        elif isinstance(obj, np.floating):
+            return float(obj)
+        elif isinstance(obj, np.ndarray):
+            return obj.tolist()
+        elif isinstance(obj, dict):
+            return {k: self._convert_to_serializable(v) for k, v in obj.items()}
+        elif isinstance(obj, list):
+            return [self._convert_to_serializable(i) for i in obj]
+        else:
+            return str(obj)  # Convert any other types to string
+
+    def _exclude_outliers(self, df: pd.DataFrame, exclude_outliers: bool = None) -> pd.DataFrame:
+        if exclude_outliers is None:
+            exclude_outliers = get_pipeline_config()["outliers"]["exclude_from_analysis"]
+        if exclude_outliers:
+            # Reuse the mask stored by the data loader instead of re-detecting
+            outliers = DataTools.outlier_rows(df)
+            df = df[~outliers]
+            print(f"Excluded {int(outliers.sum())} outlier rows from analysis")
+        return df
+
+    def _save_results(self, results: Dict[str, Any], dataset_name: str = "dataset") -> Dict[str, Any]:
+        """Serialize the results to JSON and save them to the dataset's own file."""
+        serializable_results = self._convert_to_serializable(results)
+        output_path = Path(f"output/analysis/{dataset_name}_results.json")
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, 'w') as f:
+            json.dump(serializable_results, f, indent=4)
+        return serializable_results
+
+    def _analysis_cache(self, use_cache: bool) -> Optional[AnalysisCache]:
+        cache_config = get_pipeline_config()["analysis_cache"]
+        if not (use_cache and cache_config["enabled"]):
+            return None
+        return AnalysisCache(cache_config["cache_dir"], cache_config["max_size_mb"])
+
+    @staticmethod
+    def _analysis_keys(
+        cache: AnalysisCache,
+        df: pd.DataFrame,
+        analysis_types: List[str],
+        target_column: str = None,
+        feature_columns: List[str] = None
+    ) -> Dict[str, str]:
+        """Memo key of each analysis type: dataset fingerprint, parameters, config and code version."""
+        config = get_pipeline_config()
+        # Only the settings that change an analysis' output belong in its key
+        settings = {
+            "correlation": {"method": config["analysis"]["correlation_method"], "missing": config["analysis"]["correlation_missing"]},
+            "regression": config["regression"],
+            "descriptive": {"confidence": config["sampling"]["confidence"]},
+            "timeseries": {**config["timeseries"], "target_candidates": config["regression"]["target_candidates"]},
+            "clustering": config["clustering"],
+            "segmented": config["segmented"],
+            "approximate": config["approximate"]
+        }
+        fingerprint = cache.fingerprint(df)
+        
+        def params(analysis_type: str) -> Dict[str, Any]:
+            return {
+                "version": ANALYSIS_VERSION,
+                "target": target_column,
+                "features": feature_columns,
+                "settings": settings.get(analysis_type)
+            }
+        
+        keys = {analysis_type: cache.make_key(fingerprint, analysis_type, params(analysis_type)) for analysis_type in analysis_types}
+        for analysis_type, dependency in ANALYSIS_DEPENDENCIES.items():
+            if analysis_type in keys and dependency in keys:
+                keys[analysis_type] = cache.make_key(
+                    fingerprint, analysis_type, {**params(analysis_type), "depends_on": keys[dependency]}
+                )
+        return keys
+
+    @staticmethod
+    def _cache_lookup(cache: Optional[AnalysisCache], key: str) -> Optional[Dict[str, Any]]:
+        if cache is None:
+            return None
+        cached = cache.get(key)
+        # Clustering labels and sketches live in sidecar files that may have been deleted since
+        if cached is not None and any(
+            not Path(result[key]).exists()
+            for result in cached.values()
+            if isinstance(result, dict)
+            for key in SIDECAR_KEYS if key in result
+        ):
+            return None
+        return cached
+
+    @staticmethod
+    def run_analysis(
+        df: pd.DataFrame,
+        analysis_type: str,
+        target_column: str = None,
+        feature_columns: List[str] = None,
+        dataset_name: str = "dataset",
+        previous_results: Dict[str, Any] = None,
+        cache_key: str = None
+    ) -> Dict[str, Any]:
+        """Run one analysis type; returns its entry for the results dict, or {} when skipped.
+        
+        Sidecar files are named after ``cache_key`` when given, so a memoized
+        result keeps pointing at its own labels or sketches.
+        """
+        previous_results = previous_results or {}
+        sidecar = f"{dataset_name}_{cache_key[:16]}" if cache_key else dataset_name
+        
+        # Slice the DataFrame based on feature_columns if provided
+        if feature_columns:
+            df_features = df[feature_columns]
+        else:
+            df_features = df.drop(columns=[col for col in df.columns if DataTools.is_outlier_mask_column(col)])  # Use all columns if no feature_columns provided
+        
+        if analysis_type == "descriptive":
+            stats = AnalysisTools.descriptive_statistics(df_features)
+            if "sample" not in df.attrs:
+                return {"descriptive_statistics": stats}
+            # Figures from a sample carry intervals for the population means and totals
+            return {
+                "descriptive_statistics": stats,
+                "sample_estimates": AnalysisTools.sample_estimates(
+                    df,
+                    DataTools.feature_columns(df_features),
+                    confidence=get_pipeline_config()["sampling"]["confidence"]
+                )
+            }
+            
+        elif analysis_type == "correlation":
+            corr_matrix = AnalysisTools.correlation_analysis(
+                df_features,
+                method=get_pipeline_config()["analysis"]["correlation_method"],
+                missing=get_pipeline_config()["analysis"]["correlation_missing"]
+            )
+            return {"correlation_analysis": corr_matrix.to_dict()}  # Convert DataFrame to dict for JSON serialization
+            
+        elif analysis_type == "regression":
+            regression_config = get_pipeline_config()["regression"]
+            target = target_column or regression_config["target_column"] or AnalysisTools.select_target(
+                df_features, candidates=regression_config["target_candidates"]
+            )
+            if target is None:
+                print("No numeric target column found, skipping regression")
+                return {}
+            features = [col for col in DataTools.feature_columns(df_features) if col != target]
+            reg_results = AnalysisTools.regression_analysis(df, target, features)
+            return {"regression_analysis": reg_results}
+            
+        elif analysis_type == "timeseries":
+            timeseries_config = get_pipeline_config()["timeseries"]
+            date_column = timeseries_config["date_column"]
+            value_column = timeseries_config["value_column"] or target_column or AnalysisTools.select_target(
+                df_features, candidates=get_pipeline_config()["regression"]["target_candidates"]
+            )
+            if date_column not in df.columns or not pd.api.types.is_datetime64_any_dtype(df[date_column]) or value_column is None:
+                print(f"No datetime column {date_column} or numeric value column found, skipping time series")
+                return {}
+            return {"timeseries_analysis": AnalysisTools.timeseries_analysis(
+                df,
+                date_column=date_column,
+                value_column=value_column,
+                group_columns=timeseries_config["group_columns"],
+                frequencies=timeseries_config["frequencies"],
+                rolling_windows=timeseries_config["rolling_windows"],
+                weights=DataTools.sample_weights(df)
+            )}
+            
+        elif analysis_type == "clustering":
+            clustering_config = get_pipeline_config()["clustering"]
+            cluster_results = AnalysisTools.clustering_analysis(
+                df,
+                feature_columns,
+                n_clusters=clustering_config["n_clusters"],
+                k_range=clustering_config["k_range"],
+                selection=clustering_config["selection"],
+                mini_batch_threshold=clustering_config["mini_batch_threshold"],
+                silhouette_sample=clustering_config["silhouette_sample"],
+                max_workers=clustering_config["max_workers"],
+                labels_path=f"{clustering_config['labels_dir']}/{sidecar}_labels.npy"
+            )
+            return {"clustering_analysis": cluster_results}
+            
+        elif analysis_type == "approximate":
+            approximate_config = dict(get_pipeline_config()["approximate"])
+            sketches_dir = approximate_config.pop("sketches_dir")
+            return {"approximate_analysis": AnalysisTools.approximate_analysis(
+                df,
+                sketches_path=f"{sketches_dir}/{sidecar}_sketches.json",
+                **approximate_config
+            )}
+            
+        elif analysis_type == "segmented":
+            segmented_config = get_pipeline_config()["segmented"]
+            segment_columns = [col for col in segmented_config["segment_columns"] if col in df.columns]
+            # A segment column's own codes are constant within each segment
+            value_columns = [
+                col for col in DataTools.feature_columns(df_features)
+                if col not in {f"{segment}_encoded" for segment in segment_columns}
+            ]
+            cluster_labels = None
+            if "labels_path" in previous_results.get("clustering_analysis", {}):
+                cluster_labels = np.load(previous_results["clustering_analysis"]["labels_path"])
+                if len(cluster_labels) != len(df):
+                    cluster_labels = None
+            return {"segmented_analysis": AnalysisTools.segmented_analysis(
+                df,
+                segment_columns,
+                value_columns,
+                max_segments=segmented_config["max_segments"],
+                cluster_labels=cluster_labels
+            )}
+        
+        return {}
+
+    def analyze_dataset(
+        self,
+        df: pd.DataFrame,
+        analysis_types: List[str],
+        target_column: str = None,
+        feature_columns: List[str] = None,
+        exclude_outliers: bool = None,
+        dataset_name: str = "dataset",
+        use_cache: bool = True
+    ) -> Dict[str, Any]:
+        """Perform multiple types of analysis on a dataset, reusing memoized results."""
+        try:
+            results = {}
+            hits = misses = 0
+            df = self._exclude_outliers(df, exclude_outliers)
+            cache = self._analysis_cache(use_cache)
+            keys = self._analysis_keys(cache, df, analysis_types, target_column, feature_columns) if cache else {}
+            
+            for analysis_type in analysis_types:
+                cached = self._cache_lookup(cache, keys.get(analysis_type))
+                if cached is not None:
+                    results.update(cached)
+                    hits += 1
+                    continue
+                
+                misses += 1
+                analysis_results = self.run_analysis(
+                    df,
+                    analysis_type,
+                    target_column=target_column,
+                    feature_columns=feature_columns,
+                    dataset_name=dataset_name,
+                    previous_results=results,
+                    cache_key=keys.get(analysis_type)
+                )
+                if cache is not None:
+                    cache.put(keys[analysis_type], analysis_results, source=dataset_name)
+                results.update(analysis_results)
+            
+            self.cache_hits, self.cache_misses = hits, misses
+            if cache is not None:
+                cache.flush()
+                print(f"Analysis cache: {hits} hits, {misses} tasks computed")
+            return self._save_results(results, dataset_name)
+            
+        except Exception as e:
+            self.handle_error(e)
+            return {}
+
+    def analyze_datasets(
+        self,
+        datasets: Dict[str, pd.DataFrame],
+        analysis_types: List[str],
+        target_column: str = None,
+        feature_columns: Dict[str, List[str]] = None,
+        exclude_outliers: bool = None,
+        executor: str = None,
+        max_workers: int = None,
+        timeout: float = None,
+        use_cache: bool = True
+    ) -> Dict[str, Dict[str, Any]]:
+        """Run every analysis type on every dataset concurrently in a thread or process pool.
+        
+        Process workers attach to each dataset packed once into shared memory
+        instead of receiving a pickled copy per task. At most ``max_workers``
+        tasks are in flight, so ``timeout`` (seconds) counts from when a task
+        starts. Timed-out tasks are abandoned rather than interrupted. Failed
+        tasks are listed in ``self.failed_tasks``; the results of the others
+        are kept. Memoized results are looked up and stored in this process,
+        so only cache misses reach the pool.
+        """
+        analysis_config = get_pipeline_config()["analysis"]
+        executor = executor or analysis_config["executor"]
+        max_workers = max_workers or analysis_config["max_workers"] or os.cpu_count() or 1
+        timeout = timeout if timeout is not None else analysis_config["task_timeout"]
+        feature_columns = feature_columns or {}
+        
+        self.failed_tasks = []
+        results = {name: {} for name in datasets}
+        frames = {name: self._exclude_outliers(df, exclude_outliers) for name, df in datasets.items()}
+        
+        cache = self._analysis_cache(use_cache)
+        keys = {
+            name: self._analysis_keys(cache, df, analysis_types, target_column, feature_columns.get(name))
+            for name, df in frames.items()
+        } if cache else {}
+        hits = misses = 0
+        waiting = []
+        finished = set()
+        for name in datasets:
+            for analysis_type in analysis_types:
+                # Dependent types are looked up only after their dependency, whose results they read
+                cached = None
+                if ANALYSIS_DEPENDENCIES.get(analysis_type) not in analysis_types:
+                    cached = self._cache_lookup(cache, keys.get(name, {}).get(analysis_type))
+                if cached is not None:
+                    results[name].update(cached)
+                    finished.add((name, analysis_type))
+                    hits += 1
+                else:
+                    waiting.append((name, analysis_type))
+        
+        # The pool and shared memory are only set up once there is something to compute
+        pool = None
+        owners = []
+        running = {}
+        # Timed-out tasks that are still occupying a worker
+        abandoned = set()
+        try:
+            while waiting or running:
+                abandoned = {future for future in abandoned if not future.done()}
+                if not running and len(abandoned) >= max_workers:
+                    wait(abandoned, return_when=FIRST_COMPLETED)
+                    continue
+                for name, analysis_type in list(waiting):
+                    if len(running) + len(abandoned) >= max_workers:
+                        break
+                    dependency = ANALYSIS_DEPENDENCIES.get(analysis_type)
+                    if dependency in analysis_types and (name, dependency) not in finished:
+                        continue
+                    waiting.remove((name, analysis_type))
+                    if dependency:
+                        cached = self._cache_lookup(cache, keys.get(name, {}).get(analysis_type))
+                        if cached is not None:
+                            results[name].update(cached)
+                            finished.add((name, analysis_type))
+                            hits += 1
+                            continue
+                    misses += 1
+                    if pool is None:
+                        if executor == "process":
+                            # Specs reach each worker once; tasks then name their dataset
+                            specs, owners = shared_frames(frames)
+                            pool = ProcessPoolExecutor(
+                                max_workers=max_workers,
+                                initializer=_init_analysis_worker,
+                                initargs=(specs,)
+                            )
+                        else:
+                            pool = ThreadPoolExecutor(max_workers=max_workers)
+                    options = {
+                        "target_column": target_column,
+                        "feature_columns": feature_columns.get(name),
+                        "dataset_name": name,
+                        "previous_results": results[name] if dependency else None,
+                        "cache_key": keys.get(name, {}).get(analysis_type)
+                    }
+                    frame = name if executor == "process" else frames[name]
+                    future = pool.submit(_analysis_task, frame, analysis_type, options)
+                    running[future] = (name, analysis_type, time.monotonic() + timeout if timeout else None)
+                
+                deadlines = [deadline for _, _, deadline in running.values() if deadline is not None]
+                wait_for = max(min(deadlines) - time.monotonic(), 0) if deadlines else None
+                done, _ = wait(running, timeout=wait_for, return_when=FIRST_COMPLETED)
+                
+                for future in done:
+                    name, analysis_type, _ = running.pop(future)
+                    finished.add((name, analysis_type))
+                    try:
+                        analysis_results = future.result()
+                        if cache is not None:
+                            cache.put(keys[name][analysis_type], analysis_results, source=name)
+                        results[name].update(analysis_results)
+                    except Exception as e:
+                        self._record_failure(name, analysis_type, e)
+                
+                now = time.monotonic()
+                for future, (name, analysis_type, deadline) in list(running.items()):
+                    if deadline is not None and now >= deadline:
+                        del running[future]
+                        finished.add((name, analysis_type))
+                        if not future.cancel():
+                            abandoned.add(future)
+                        self._record_failure(name, analysis_type, TimeoutError(f"exceeded {timeout}s"))
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=not any(not future.done() for future in abandoned), cancel_futures=True)
+            for owner in owners:
+                owner.close()
+        
+        self.cache_hits, self.cache_misses = hits, misses
+        if cache is not None:
+            cache.flush()
+            print(f"Analysis cache: {hits} hits, {misses} tasks computed")
+        if self.failed_tasks:
+            print(f"{len(self.failed_tasks)} analysis tasks failed, kept results of the others")
+        return {name: self._save_results(dataset_results, name) for name, dataset_results in results.items()}
+
+    def _record_failure(self, dataset_name: str, analysis_type: str, error: Exception) -> None:
+        self.failed_tasks.append({
+            "dataset": dataset_name,
+            "analysis": analysis_type,
+            "error": f"{type(error).__name__}: {error}"
+        })
+        print(f"Analysis task {analysis_type} for {dataset_name} failed: {error}")
+
+
+# Shared frame specs of the datasets, set once per process worker by the pool initializer
+_WORKER_SPECS: Dict[str, Dict[str, Any]] = {}
+
+def _init_analysis_worker(specs: Dict[str, Dict[str, Any]]) -> None:
+    _WORKER_SPECS.update(specs)
+
+def _analysis_task(frame, analysis_type: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Pool entry point: run one analysis type on a frame, or on the shared frame of the named dataset."""
+    if isinstance(frame, str):
+        frame = SharedFrame.attach(_WORKER_SPECS[frame])
+    return AnalyzerStage.run_analysis(frame, analysis_type, **options)
@@ -0,0 +1,15 @@
+class BaseStage:
+    """Pipeline stage logic that does not depend on autogen.
+
+    The agents combine a stage with ``BaseAgent``; ``pipeline.py`` uses the
+    stages on their own, so batch runs never import autogen or build LLM
+    clients.
+    """
+
+    name = "stage"
+
+    def handle_error(self, error: Exception) -> str:
+        """Handle errors during stage execution."""
+        error_message = f"Error in {self.name}: {str(error)}"
+        print(error_message)
+        return error_message
@@ -0,0 +1,265 @@
+from stages.base_stage import BaseStage
+from tools.data_tools import DataTools
+from tools.cache_tools import PreprocessCache
+from tools.codebook_tools import CategoryCodebook
+from config.pipeline_config import get_pipeline_config
+from typing import Dict, Any
+from pathlib import Path
+import pandas as pd
+import numpy as np
+import json
+
+class DataLoaderStage(BaseStage):
+    name = "data_loader"
+    
+    # Bump whenever preprocessing changes so stale cache entries are not reused
+    PREPROCESS_VERSION = 2
+    
+    def __init__(self):
+        self.tools = DataTools()
+        self.dataframes = {}
+        self.ingestion_stats = {}
+        self.chunked_outputs = {}
+        # Full frames of incremental feeds, so repeated refreshes only append the new rows
+        self.incremental_frames = {}
+        
+    def _preprocess_params(self) -> Dict[str, Any]:
+        """Parameters that change the preprocessed output and so belong in the cache key."""
+        return {
+            "version": self.PREPROCESS_VERSION,
+            "schema": get_pipeline_config()["ingestion"]["schema"],
+            "compact": get_pipeline_config()["compact"],
+            "codebook": get_pipeline_config()["codebook"],
+            "outliers": {
+                key: get_pipeline_config()["outliers"][key] for key in ("method", "threshold")
+            },
+            "steps": ["clean_data", "detect_outliers", "encode_categorical"]
+        }
+        
+    def _load_chunked_output(self, chunked_result: Dict[str, Any], full_data: bool = False) -> pd.DataFrame:
+        """Bring the streamed output of a large file back for the later stages, sampled unless full data is asked for."""
+        config = get_pipeline_config()
+        sampling_config = config["sampling"]
+        chunks = self.tools.iter_csv_chunks(
+            chunked_result["output_path"],
+            schema=config["ingestion"]["schema"],
+            chunksize=config["chunked"]["chunksize"]
+        )
+        if full_data or not sampling_config["enabled"]:
+            print(f"Loading all {chunked_result['rows_out']} processed rows of {chunked_result['output_path']} into memory")
+            df = pd.concat(chunks, ignore_index=True)
+        else:
+            # Same reservoir sampler as sample_datasets, fed straight from disk
+            df = self.tools.stratified_sample_chunked(
+                chunks,
+                sampling_config["strata_columns"],
+                sample_size=sampling_config["sample_size"],
+                seed=sampling_config["seed"]
+            )
+            print(f"Sampled {len(df)} of {chunked_result['rows_out']} processed rows from {chunked_result['output_path']}")
+        
+        if config["compact"]["enabled"]:
+            df = self.tools.compact_dataframe(df, config["compact"]["max_category_ratio"])
+        df.attrs["outlier_columns"] = chunked_result["outlier_columns"]
+        return df
+        
+    def load_and_preprocess(
+        self,
+        input_dir: str = "data/input",
+        use_cache: bool = True,
+        incremental: bool = None,
+        full_data: bool = False
+    ) -> Dict[str, pd.DataFrame]:
+        """Load and preprocess all CSV files, reusing cached results for unchanged inputs.
+        
+        Files above the chunked threshold are preprocessed out of core and
+        handed on as a stratified sample of the processed output, or in full
+        when sampling is off or ``full_data`` is set.
+        """
+        try:
+            config = get_pipeline_config()
+            ingestion_config = config["ingestion"]
+            cache_config = config["cache"]
+            chunked_config = config["chunked"]
+            incremental_config = config["incremental"]
+            if incremental is None:
+                incremental = incremental_config["enabled"]
+            
+            codebook = None
+            if config["codebook"]["enabled"]:
+                codebook = CategoryCodebook(config["codebook"]["codebook_dir"])
+            
+            cache = None
+            if use_cache and cache_config["enabled"] and not incremental:
+                cache = PreprocessCache(cache_config["cache_dir"], cache_config["max_size_mb"])
+            
+            csv_files = sorted(Path(input_dir).glob("*.csv"))
+            params = self._preprocess_params()
+            processed_dfs = {}
+            cache_keys = {}
+            pending_files = []
+            
+            self.chunked_outputs = {}
+            threshold_bytes = chunked_config["threshold_mb"] * 1024 * 1024
+            
+            for file_path in csv_files:
+                try:
+                    if file_path.stat().st_size > threshold_bytes:
+                        # Too large to hold in memory: stream it to disk instead
+                        output_path = f"data/processed/{file_path.stem}_processed.csv"
+                        chunked_result = self.tools.preprocess_chunked(
+                            str(file_path),
+                            output_path,
+                            schema=ingestion_config["schema"],
+                            chunksize=chunked_config["chunksize"],
+                            codebook=codebook,
+                            outlier_method=config["outliers"]["method"],
+                            outlier_threshold=config["outliers"]["threshold"]
+                        )
+                        self.chunked_outputs[file_path.stem] = output_path
+                        print(f"Saved processed data to: {output_path}")
+                        processed_dfs[file_path.stem] = self._load_chunked_output(chunked_result, full_data)
+                        continue
+                    
+                    if incremental:
+                        # Append-only feeds: only the new tail is parsed and preprocessed
+                        output_path = f"data/processed/{file_path.stem}_processed.csv"
+                        state_dir = str(Path(incremental_config["state_dir"]) / file_path.stem)
+                        df_tail, summary = self.tools.preprocess_incremental(
+                            str(file_path),
+                            state_dir,
+                            schema=ingestion_config["schema"],
+                            id_column=incremental_config["id_column"],
+                            params=params,
+                            csv_path=output_path,
+                            codebook=codebook,
+                            outlier_method=config["outliers"]["method"],
+                            outlier_threshold=config["outliers"]["threshold"]
+                        )
+                        df_incremental = self.incremental_frames.get(file_path.stem)
+                        if df_incremental is None or df_incremental.attrs.get("dataset_version") != summary["previous_version"]:
+                            # First refresh in this process (or the state was rebuilt): read the history once
+                            df_incremental = self.tools.read_incremental(state_dir)
+                            if config["compact"]["enabled"] and len(df_incremental):
+                                df_incremental = self.tools.compact_dataframe(
+                                    df_incremental, config["compact"]["max_category_ratio"]
+                                )
+                        elif len(df_tail):
+                            # Later refreshes only compact the new rows and append them to the kept frame
+                            if config["compact"]["enabled"]:
+                                df_tail = self.tools.compact_dataframe(df_tail, config["compact"]["max_category_ratio"])
+                            df_incremental = self.tools.append_rows(df_incremental, df_tail)
+                        df_incremental.attrs["dataset_version"] = summary["version"]
+                        self.incremental_frames[file_path.stem] = df_incremental
+                        processed_dfs[file_path.stem] = df_incremental
+                        continue
+                    
+                    if cache is None:
+                        pending_files.append(file_path)
+                        continue
+                    
+                    key = cache.make_key(file_path, params)
+                    cache_keys[file_path.stem] = key
+                    df_cached = cache.get(key)
+                    if df_cached is None:
+                        pending_files.append(file_path)
+                        continue
+                    
+                    df_cached.attrs["dataset_version"] = key
+                    processed_dfs[file_path.stem] = df_cached
+                    print(f"Cache hit for {file_path}, skipping preprocessing")
+                    
+                    output_path = f"data/processed/{file_path.stem}_processed.csv"
+                    if not Path(output_path).exists():
+                        df_cached.to_csv(output_path, index=False)
+                        print(f"Saved processed data to: {output_path}")
+                except Exception as e:
+                    # One unreadable or malformed file must not drop the other datasets
+                    print(f"Error preprocessing {file_path}: {str(e)}")
+            
+            self.ingestion_stats = {}
+            self.dataframes = self.tools.read_csv_files(
+                pending_files,
+                schema=ingestion_config["schema"],
+                engine=ingestion_config["engine"],
+                max_workers=ingestion_config["max_workers"],
+                executor=ingestion_config["executor"],
+                stats=self.ingestion_stats
+            ) if pending_files else {}
+            
+            if not csv_files:
+                print(f"No CSV files found in {input_dir}")
+            
+            compact_config = config["compact"]
+            for name, df in self.dataframes.items():
+                try:
+                    if compact_config["enabled"]:
+                        df = self.tools.compact_dataframe(df, compact_config["max_category_ratio"])
+                    
+                    df_cleaned = self.tools.clean_data(df)
+                    numeric_cols = df_cleaned.select_dtypes(include=[np.number]).columns
+                    outlier_mask = self.tools.detect_outliers(
+                        df_cleaned,
+                        numeric_cols,
+                        method=config["outliers"]["method"],
+                        threshold=config["outliers"]["threshold"]
+                    )
+                    
+                    categorical_cols = df_cleaned.select_dtypes(include=['object', 'category']).columns
+                    df_processed = self.tools.encode_categorical(
+                        df_cleaned,
+                        categorical_cols,
+                        compact=compact_config["enabled"],
+                        codebook=codebook
+                    )
+                    
+                    # Keep the outlier bitmask with the data so later stages need not recompute it
+                    for col in outlier_mask.columns:
+                        df_processed.insert(len(df_processed.columns), col, outlier_mask[col].to_numpy())
+                    df_processed.attrs["outlier_columns"] = outlier_mask.attrs["outlier_columns"]
+                    
+                    if name in cache_keys:
+                        df_processed.attrs["dataset_version"] = cache_keys[name]
+                    processed_dfs[name] = df_processed
+                    if cache is not None:
+                        cache.put(cache_keys[name], df_processed, source=name)
+                    
+                    output_path = f"data/processed/{name}_processed.csv"
+                    df_processed.to_csv(output_path, index=False)
+                    print(f"Saved processed data to: {output_path}")
+                except Exception as e:
+                    print(f"Error preprocessing {name}: {str(e)}")
+            
+            if cache is not None:
+                cache.flush()
+            return processed_dfs
+            
+        except Exception as e:
+            self.handle_error(e)
+            return {}
+
+    def sample_datasets(self, datasets: Dict[str, pd.DataFrame], full_data: bool = False) -> Dict[str, pd.DataFrame]:
+        """Replace large datasets with reproducible stratified samples for exploratory runs."""
+        try:
+            sampling_config = get_pipeline_config()["sampling"]
+            if full_data or not sampling_config["enabled"]:
+                return datasets
+            
+            sampled = {}
+            for name, df in datasets.items():
+                if len(df) < sampling_config["min_rows"]:
+                    sampled[name] = df
+                    continue
+                sampled[name] = self.tools.stratified_sample(
+                    df,
+                    sampling_config["strata_columns"],
+                    sample_size=sampling_config["sample_size"],
+                    seed=sampling_config["seed"],
+                    chunksize=sampling_config["chunksize"]
+                )
+                print(f"Sampled {len(sampled[name])} of {len(df)} rows from {name}")
+            return sampled
+            
+        except Exception as e:
+            self.handle_error(e)
+            return datasets
@@ -0,0 +1,375 @@
+from stages.base_stage import BaseStage
+from tools.media_tools import MediaTools
+from tools.cache_tools import PlotStore
+from tools.report_tools import ReportTools, StreamingReportWriter
+from config.pipeline_config import get_pipeline_config
+from typing import Dict, Any, List, Tuple, TYPE_CHECKING
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import json
+import os
+import time
+from datetime import datetime
+import pandas as pd
+
+if TYPE_CHECKING:
+    # python-docx is imported when the first report is created
+    from docx.document import Document
+
+# Format gambar yang bisa disisipkan oleh python-docx
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tif', '.tiff')
+
+def _report_task(job: Dict[str, Any], report_format: str) -> Tuple[str, List[Dict[str, Any]]]:
+    """Worker: membuat satu laporan dan mengembalikan path beserta statistiknya."""
+    reporter = ReporterStage()
+    report_path = reporter.create_report(report_format=report_format, **job)
+    return report_path, reporter.report_stats
+
+class ReporterStage(BaseStage):
+    name = "reporter"
+    
+    def __init__(self):
+        self.report_stats: List[Dict[str, Any]] = []
+        
+    def _report_media(self, files: List[str], stats: Dict[str, int]) -> List[Tuple[str, str]]:
+        """Pasangan (berkas, label) yang akan disisipkan: gambar diperkecil dan histogram per kolom digabung."""
+        media_config = get_pipeline_config()["report_media"]
+        if not media_config["enabled"]:
+            return [(file, os.path.basename(file)) for file in files]
+        
+        options = {
+            "media_dir": media_config["media_dir"],
+            "width_inches": media_config["width_inches"],
+            "dpi": media_config["dpi"],
+            "colors": media_config["colors"],
+            "stats": stats
+        }
+        histograms = [
+            file for file in files
+            if file.lower().endswith(IMAGE_EXTENSIONS) and os.path.basename(file).startswith("static_histogram_")
+        ]
+        if len(histograms) < media_config["contact_sheet_threshold"]:
+            histograms = []
+        
+        media = []
+        for file in files:
+            if not file.lower().endswith(IMAGE_EXTENSIONS):
+                media.append((file, os.path.basename(file)))
+            elif file in histograms:
+                # Semua histogram tampil sekali sebagai satu lembar kontak di posisi histogram pertama
+                if file == histograms[0]:
+                    sheet = MediaTools.contact_sheet(histograms, columns=media_config["contact_sheet_columns"], **options)
+                    media.append((sheet, f"Histogram {len(histograms)} kolom"))
+            else:
+                media.append((MediaTools.prepare_image(file, **options), os.path.basename(file)))
+        return media
+        
+    def create_report(
+        self,
+        analysis_results: Dict[str, Any],
+        visualization_files: Dict[str, List[str]],
+        report_type: str = "teknis",
+        report_format: str = None,
+        dataset_name: str = None,
+        prepared_media: Dict[str, List[Tuple[str, str]]] = None,
+        media_stats: Dict[str, int] = None
+    ) -> str:
+        """Membuat laporan komprehensif dari hasil analisis dalam format DOCX, HTML atau Markdown.
+        
+        ``prepared_media`` (per jenis visualisasi, hasil ``_report_media``)
+        dan ``media_stats`` diisi oleh ``create_reports`` agar gambar hanya
+        diproses sekali sebelum laporan dibagi ke worker.
+        """
+        doc = None
+        try:
+            reports_config = get_pipeline_config()["reports"]
+            report_format = report_format or reports_config["format"]
+            started = time.perf_counter()
+            media_stats = dict(media_stats or {"processed": 0, "reused": 0})
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            report_path = ReportTools.report_path(report_type, report_format, timestamp, dataset_name)
+            title = f'Laporan Analisis Data ({report_type.capitalize()})'
+            
+            if report_format == "docx":
+                from docx import Document
+                doc = Document()
+            else:
+                # HTML/Markdown ditulis ke disk per bagian, gambar cukup ditautkan
+                doc = StreamingReportWriter(report_path, report_format, title=title, template_dir=reports_config["template_dir"])
+            
+            # Menambahkan judul
+            doc.add_heading(title, 0)
+            doc.add_paragraph(f'Digenerate pada: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}')
+            
+            # Menambahkan ringkasan eksekutif
+            doc.add_heading('Ringkasan Eksekutif', level=1)
+            summary = self._generate_summary(analysis_results)
+            doc.add_paragraph(summary)
+            sample_note = self._sample_note(analysis_results)
+            if sample_note:
+                doc.add_paragraph(sample_note)
+            
+            # Menambahkan hasil analisis rinci
+            if report_type == "teknis":
+                self._add_technical_details(doc, analysis_results)
+            else:
+                self._add_business_insights(doc, analysis_results)
+            
+            # Menambahkan visualisasi
+            doc.add_heading('Visualisasi', level=1)
+            for viz_type, files in visualization_files.items():
+                doc.add_heading(f'Visualisasi {viz_type.capitalize()}', level=2)
+                if report_format == "docx" and prepared_media is not None:
+                    media = prepared_media.get(viz_type, [])
+                elif report_format == "docx":
+                    media = self._report_media(files, media_stats)
+                else:
+                    media = [(file, os.path.basename(file)) for file in files]
+                for file, label in media:
+                    if not file.lower().endswith(IMAGE_EXTENSIONS):
+                        if report_format == "docx":
+                            # Plot interaktif (HTML) tidak bisa disisipkan ke DOCX, cukup dirujuk
+                            doc.add_paragraph(f'Plot interaktif: {file}')
+                        else:
+                            doc.add_link(file, f'Plot interaktif: {label}')
+                        continue
+                    doc.add_picture(file, width=6000000)  # ~6 inci
+                    caption = 'Gambar (berbasis sampel)' if sample_note else 'Gambar'
+                    doc.add_paragraph(f'{caption}: {label}')
+            
+            # Menyimpan laporan
+            doc.save(report_path)
+            
+            report_stats = {
+                "path": report_path,
+                "format": report_format,
+                "size_kb": os.path.getsize(report_path) / 1024,
+                "seconds": time.perf_counter() - started,
+                **media_stats
+            }
+            self.report_stats.append(report_stats)
+            print(
+                f"Report {report_path}: {report_stats['size_kb']:.0f} KB in {report_stats['seconds']:.2f}s "
+                f"({media_stats['processed']} images processed, {media_stats['reused']} reused)"
+            )
+            
+            return report_path
+            
+        except Exception as e:
+            if isinstance(doc, StreamingReportWriter):
+                doc.discard()
+            self.handle_error(e)
+            return ""
+            
+    def create_reports(
+        self,
+        jobs: List[Dict[str, Any]],
+        report_format: str = None,
+        executor: str = None,
+        max_workers: int = None
+    ) -> List[str]:
+        """Membuat semua laporan (dataset × jenis laporan) secara paralel.
+        
+        Setiap job berisi argumen ``create_report``: analysis_results,
+        visualization_files, report_type dan dataset_name. Path laporan
+        dikembalikan dalam urutan job.
+        """
+        reports_config = get_pipeline_config()["reports"]
+        report_format = report_format or reports_config["format"]
+        executor = executor or reports_config["executor"]
+        max_workers = max_workers or reports_config["max_workers"]
+        
+        if executor == "serial" or len(jobs) <= 1:
+            report_paths = [self.create_report(report_format=report_format, **job) for job in jobs]
+            self._retain_plots(jobs, report_paths, report_format)
+            return report_paths
+        
+        if report_format == "docx":
+            # Gambar disiapkan sekali di sini; worker yang paralel akan memproses gambar yang sama berulang kali
+            prepared_jobs = []
+            for job in jobs:
+                media_stats = {"processed": 0, "reused": 0}
+                try:
+                    prepared_media = {
+                        viz_type: self._report_media(files, media_stats)
+                        for viz_type, files in job["visualization_files"].items()
+                    }
+                    prepared_jobs.append({**job, "prepared_media": prepared_media, "media_stats": media_stats})
+                except Exception as e:
+                    # Worker akan mencoba memproses gambarnya sendiri
+                    self.handle_error(e)
+                    prepared_jobs.append(job)
+            jobs = prepared_jobs
+        
+        pool_class = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+        with pool_class(max_workers=max_workers) as pool:
+            results = list(pool.map(_report_task, jobs, [report_format] * len(jobs)))
+        
+        report_paths = []
+        for report_path, report_stats in results:
+            self.report_stats.extend(report_stats)
+            report_paths.append(report_path)
+        self._retain_plots(jobs, report_paths, report_format)
+        return report_paths
+    
+    def _retain_plots(self, jobs: List[Dict[str, Any]], report_paths: List[str], report_format: str) -> None:
+        """Menandai run plot yang ditautkan laporan HTML/Markdown agar tidak dihapus oleh ``collect_plots``."""
+        store_config = get_pipeline_config()["plot_store"]
+        if report_format == "docx" or not store_config["enabled"]:
+            return  # DOCX menyimpan salinan gambarnya sendiri
+        reports = {
+            report_path: [file for files in job["visualization_files"].values() for file in files]
+            for job, report_path in zip(jobs, report_paths) if report_path
+        }
+        try:
+            PlotStore(store_config["store_dir"], store_config["max_size_mb"]).retain(reports)
+        except Exception as e:
+            self.handle_error(e)
+            
+    def _generate_summary(self, analysis_results: Dict[str, Any]) -> str:
+        """Membuat ringkasan eksekutif dari hasil analisis."""        
+        summary = []
+        
+        if "descriptive_statistics" in analysis_results:
+            summary.append("Analisis Statistik: Metrik utama dihitung untuk semua variabel numerik.")
+            
+        if "correlation_analysis" in analysis_results:
+            summary.append("Analisis Korelasi: Hubungan antar variabel diperiksa.")
+            
+        if "regression_analysis" in analysis_results:
+            reg_results = analysis_results["regression_analysis"]
+            r2 = reg_results.get("r_squared", 0)
+            summary.append(f"Analisis Regresi: Model mencapai nilai R-kuadrat sebesar {r2:.2f}.")
+            
+        if "timeseries_analysis" in analysis_results and "monthly" in analysis_results["timeseries_analysis"]:
+            ts_results = analysis_results["timeseries_analysis"]
+            monthly = ts_results["monthly"]
+            summary.append(
+                f"Analisis Deret Waktu: {ts_results['value_column']} dirangkum per hari, minggu dan bulan "
+                f"dari {ts_results['start']} hingga {ts_results['end']} ({len(monthly['periods'])} bulan)."
+            )
+            
+        if "approximate_analysis" in analysis_results and "distinct" in analysis_results["approximate_analysis"]:
+            distinct = analysis_results["approximate_analysis"]["distinct"]
+            estimates = ", ".join(
+                f"{col} sekitar {result['estimate']:,.0f} (±{result['relative_standard_error'] * 196:.1f}%)"
+                for col, result in distinct.items()
+            )
+            summary.append(f"Analisis Aproksimasi: Jumlah nilai unik diperkirakan dengan sketsa: {estimates}.")
+            
+        if "clustering_analysis" in analysis_results:
+            cluster_results = analysis_results["clustering_analysis"]
+            n_clusters = len(cluster_results.get("cluster_centers", {}))
+            summary.append(f"Analisis Klastering: Data dibagi menjadi {n_clusters} kelompok yang berbeda.")
+            
+        return "\n\n".join(summary)
+        
+    def _sample_note(self, analysis_results: Dict[str, Any]) -> str:
+        """Catatan untuk laporan yang angkanya dihitung dari sampel, atau string kosong untuk data penuh."""
+        if "sample_estimates" not in analysis_results:
+            return ""
+        sample = analysis_results["sample_estimates"]
+        return (
+            f"Catatan: angka dan gambar yang ditandai 'berbasis sampel' dihitung dari sampel berstrata "
+            f"{sample['sample_rows']:,} dari {sample['population_rows']:,} baris "
+            f"(strata: {', '.join(sample['strata_columns'])}, seed {sample['seed']}). "
+            f"Rentang kepercayaan {sample['confidence']:.0%} disertakan untuk rata-rata dan total."
+        )
+        
+    def _add_technical_details(self, doc: "Document", analysis_results: Dict[str, Any]):
+        """Menambahkan rincian teknis ke laporan."""        
+        sampled = "sample_estimates" in analysis_results
+        for analysis_type, results in analysis_results.items():
+            title = analysis_type.replace("_", " ").title()
+            doc.add_heading(f'{title} (berbasis sampel)' if sampled else title, level=1)
+            
+            if analysis_type == "sample_estimates":
+                for var, estimate in results["means"].items():
+                    total = results["totals"][var]
+                    doc.add_paragraph(
+                        f'{var}: rata-rata {estimate["estimate"]:,.4f} '
+                        f'[{estimate["lower"]:,.4f}; {estimate["upper"]:,.4f}], '
+                        f'total {total["estimate"]:,.2f} [{total["lower"]:,.2f}; {total["upper"]:,.2f}]'
+                    )
+                    
+            elif analysis_type == "descriptive_statistics":
+                for var, stats in results.items():
+                    doc.add_heading(f'Variabel: {var}', level=2)
+                    for stat, value in stats.items():
+                        doc.add_paragraph(f'{stat}: {value:.4f}')
+                        
+            elif analysis_type == "segmented_analysis":
+                self._add_segment_tables(doc, results)
+                        
+            elif analysis_type == "regression_analysis":
+                if "target" in results:
+                    doc.add_paragraph(f'Variabel target: {results["target"]}')
+                doc.add_paragraph(f'R-kuadrat: {results["r_squared"]:.4f}')
+                doc.add_heading('Koefisien', level=2)
+                standard_errors = results.get("standard_errors", {})
+                for feature, coef in results["coefficients"].items():
+                    if feature in standard_errors:
+                        doc.add_paragraph(f'{feature}: {coef:.4f} (galat baku: {standard_errors[feature]:.4f})')
+                    else:
+                        doc.add_paragraph(f'{feature}: {coef:.4f}')
+                    
+    def _add_segment_tables(self, doc: "Document", segmented_results: Dict[str, Any], value_columns: List[str] = None):
+        """Menambahkan tabel per segmen (jumlah baris dan rata-rata) untuk setiap dimensi kategori."""
+        for dimension, results in segmented_results.items():
+            doc.add_heading(f'Segmen: {dimension}', level=2)
+            columns = value_columns or list(results["descriptive"].keys())
+            table = doc.add_table(rows=1, cols=2 + len(columns))
+            table.style = 'Table Grid'
+            header = table.rows[0].cells
+            header[0].text = dimension
+            header[1].text = 'Jumlah baris'
+            for i, col in enumerate(columns):
+                header[2 + i].text = f'Rata-rata {col}'
+            
+            # Hasil tersimpan per kolom, sehingga setiap baris tabel cukup mengambil indeks segmen
+            for row, segment in enumerate(results["segments"]):
+                cells = table.add_row().cells
+                cells[0].text = str(segment)
+                cells[1].text = str(results["count"][row])
+                for i, col in enumerate(columns):
+                    cells[2 + i].text = f'{results["descriptive"][col]["mean"][row]:,.2f}'
+                    
+    def _add_business_insights(self, doc: "Document", analysis_results: Dict[str, Any]):
+        """Menambahkan wawasan bisnis ke laporan."""        
+        doc.add_heading('Wawasan Utama', level=1)
+        
+        if "sample_estimates" in analysis_results:
+            doc.add_paragraph('Perkiraan Populasi (berbasis sampel):')
+            sample = analysis_results["sample_estimates"]
+            for var, total in sample["totals"].items():
+                doc.add_paragraph(
+                    f"• Total {var} diperkirakan {total['estimate']:,.0f} "
+                    f"(rentang {sample['confidence']:.0%}: {total['lower']:,.0f} - {total['upper']:,.0f})"
+                )
+        
+        if "correlation_analysis" in analysis_results:
+            doc.add_paragraph('Hubungan Utama:')
+            correlations = pd.DataFrame(analysis_results["correlation_analysis"])
+            strong_corrs = []
+            
+            for col1 in correlations.columns:
+                for col2 in correlations.columns:
+                    if col1 < col2:
+                        corr = correlations.loc[col1, col2]
+                        if abs(corr) > 0.7:
+                            strong_corrs.append(
+                                f"• Hubungan kuat {'positif' if corr > 0 else 'negatif'} "
+                                f"antara {col1} dan {col2} (korelasi: {corr:.2f})"
+                            )
+                            
+            for insight in strong_corrs:
+                doc.add_paragraph(insight)
+                
+        if "segmented_analysis" in analysis_results:
+            doc.add_paragraph('Perbandingan Segmen:')
+            # Laporan bisnis cukup menampilkan variabel target, bila ada
+            target = analysis_results.get("regression_analysis", {}).get("target")
+            self._add_segment_tables(
+                doc,
+                analysis_results["segmented_analysis"],
+                value_columns=[target] if target else None
+            )
@@ -0,0 +1,320 @@
+from stages.base_stage import BaseStage
+from tools.visualization_tools import VisualizationTools
+from tools.data_tools import DataTools
+from tools.analysis_tools import AnalysisTools
+from tools.cache_tools import PlotStore
+from config.pipeline_config import get_pipeline_config
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Tuple
+import pandas as pd
+import os
+import shutil
+import time
+
+class VisualizationStage(BaseStage):
+    name = "visualizer"
+    
+    def __init__(self):
+        self.tools = VisualizationTools()
+        self.plot_timings: List[Dict[str, Any]] = []
+        self.run_id = time.strftime("%Y%m%d-%H%M%S")
+        self._pool = None
+        self._pool_workers = None
+        
+    def _plot_specs(
+        self,
+        df: pd.DataFrame,
+        columns: List[str],
+        target_column: str = None,
+        highlight_outliers: bool = None
+    ) -> List[Dict[str, Any]]:
+        """List the plots to draw for a dataset, each with the columns it reads.
+        
+        Correlations, outlier masks and, above the large-data threshold, the
+        binned aggregates are computed here once, so rendering a spec only
+        needs its own columns of the frame (none for binned plots).
+        """
+        specs = []
+        visualization_config = get_pipeline_config()["visualization"]
+        interactive_options = {}
+        if visualization_config["interactive_mode"] == "bundle":
+            # Figures sit in output/visualizations/{dataset}/{run_id}, next to nothing but each other
+            plotlyjs = os.path.basename(VisualizationTools.write_plotlyjs("output/visualizations"))
+            interactive_options = {
+                "plotlyjs": f"../../{plotlyjs}",
+                "webgl_threshold": visualization_config["webgl_threshold"]
+            }
+        
+        def add(kind: str, plot_type: str, data_columns: List[str], **kwargs):
+            if kind == 'interactive':
+                kwargs.update(interactive_options)
+            specs.append({
+                "kind": kind,
+                "plot_type": plot_type,
+                "data_columns": list(dict.fromkeys(data_columns)),
+                **kwargs
+            })
+        
+        numeric_columns = pd.Index(DataTools.feature_columns(df))
+        categorical_columns = df.select_dtypes(include=['object', 'category']).columns
+        datetime_columns = df.select_dtypes(include=['datetime64']).columns
+        
+        if highlight_outliers is None:
+            highlight_outliers = get_pipeline_config()["outliers"]["highlight_in_plots"]
+        
+        # Large frames are drawn from bin counts shared by the histograms and the pairplot
+        aggregates = None
+        if len(df) > visualization_config["large_threshold"] and len(numeric_columns):
+            aggregates = VisualizationTools.plot_aggregates(
+                df,
+                list(numeric_columns),
+                bins=visualization_config["histogram_bins"],
+                kde_sample=visualization_config["kde_sample"],
+                seed=visualization_config["seed"],
+                highlights={col: DataTools.outlier_rows(df, [col]) for col in numeric_columns} if highlight_outliers else None
+            )
+        
+        # Pairplot for numeric columns
+        if len(numeric_columns) > 1:
+            add(
+                'static', 'pairplot', [] if aggregates else list(numeric_columns),
+                x_column=numeric_columns[0],
+                columns=list(numeric_columns),
+                title='Pairplot of Numeric Variables',
+                aggregates=aggregates
+            )
+        
+        # Correlation heatmap for numeric columns
+        if len(numeric_columns) > 1:
+            add(
+                'static', 'heatmap', [],
+                x_column=numeric_columns[0],
+                title='Correlation Heatmap',
+                corr=AnalysisTools.correlation_analysis(
+                    df,
+                    list(numeric_columns),
+                    method=get_pipeline_config()["analysis"]["correlation_method"],
+                    missing=get_pipeline_config()["analysis"]["correlation_missing"]
+                )
+            )
+        
+        for col in columns:
+            if col in numeric_columns:
+                # Histogram
+                if aggregates:
+                    add(
+                        'static', 'histogram', [],
+                        x_column=col,
+                        title=f'Distribution of {col}',
+                        aggregates={"histograms": {col: aggregates["histograms"][col]}}
+                    )
+                else:
+                    add(
+                        'static', 'histogram', [col],
+                        x_column=col,
+                        title=f'Distribution of {col}',
+                        highlight=DataTools.outlier_rows(df, [col]) if highlight_outliers else None
+                    )
+                
+                # Box plot
+                if target_column and target_column in categorical_columns:
+                    add(
+                        'static', 'boxplot', [target_column, col],
+                        x_column=target_column,
+                        y_column=col,
+                        title=f'Box Plot of {col} by {target_column}'
+                    )
+                
+                # Interactive scatter plot
+                if target_column and target_column in numeric_columns and col != target_column:
+                    add(
+                        'interactive', 'scatter', [col, target_column],
+                        x_column=col,
+                        y_column=target_column,
+                        title=f'{col} vs {target_column}',
+                        highlight=DataTools.outlier_rows(df) if highlight_outliers else None
+                    )
+            
+            elif col in categorical_columns:
+                # Bar plot
+                add(
+                    'static', 'bar', [col],
+                    x_column=col,
+                    title=f'Distribution of {col}'
+                )
+            
+            elif col in datetime_columns:
+                # Time series plot
+                if target_column and target_column in numeric_columns:
+                    add(
+                        'interactive', 'line', [col, target_column],
+                        x_column=col,
+                        y_column=target_column,
+                        title=f'{target_column} over Time',
+                        sort_by=col
+                    )
+        
+        return specs
+        
+    def _plot_pool(self, max_workers: int) -> ProcessPoolExecutor:
+        """Worker processes kept alive across plots, datasets and calls."""
+        if self._pool is None or self._pool_workers != max_workers:
+            self.close()
+            self._pool = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_plot_worker)
+            self._pool_workers = max_workers
+        return self._pool
+        
+    def close(self) -> None:
+        """Shut down the rendering pool, if one was started."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        
+    def collect_plots(self, keep_runs: int = None) -> Dict[str, int]:
+        """Garbage-collect old plot runs and the stored images only they used."""
+        store_config = get_pipeline_config()["plot_store"]
+        if not store_config["enabled"]:
+            return {"runs": 0, "images": 0, "retained": 0}
+        store = PlotStore(store_config["store_dir"], store_config["max_size_mb"])
+        return store.collect(keep_runs if keep_runs is not None else store_config["keep_runs"])
+        
+    def create_visualizations(
+        self,
+        df: pd.DataFrame,
+        columns: List[str],
+        target_column: str = None,
+        highlight_outliers: bool = None,
+        executor: str = None,
+        max_workers: int = None,
+        dataset_name: str = "dataset",
+        use_store: bool = True
+    ) -> Dict[str, List[str]]:
+        """Create a suite of visualizations for the dataset.
+        
+        Files are written to ``output/visualizations/{dataset_name}/{run_id}``.
+        With the plot store enabled, plots whose spec and input columns are
+        unchanged are linked from the store instead of being rendered again.
+        With ``executor="process"`` the remaining plots are rendered by a
+        persistent pool of headless (Agg) worker processes, each task
+        receiving only the columns its plot reads. Render times per plot are
+        appended to ``self.plot_timings``; plots that fail are skipped.
+        """
+        try:
+            config = get_pipeline_config()
+            visualization_config = config["visualization"]
+            executor = executor or visualization_config["executor"]
+            max_workers = max_workers or visualization_config["max_workers"] or os.cpu_count() or 1
+            store = None
+            if use_store and config["plot_store"]["enabled"]:
+                store = PlotStore(config["plot_store"]["store_dir"], config["plot_store"]["max_size_mb"])
+            run_dir = os.path.join("output/visualizations", dataset_name, self.run_id)
+            
+            visualization_files = {
+                'static': [],
+                'interactive': []
+            }
+            
+            specs = self._plot_specs(df, columns, target_column, highlight_outliers)
+            outcomes = {}
+            pending = []
+            for i, spec in enumerate(specs):
+                data = _plot_data(df, spec)
+                key = store.make_key(spec, data) if store else None
+                if key and store.get(key) is not None:
+                    outcomes[i] = (key, 0.0, True)
+                else:
+                    output_dir = os.path.join(store.tmp_dir, key) if store else run_dir
+                    pending.append((i, key, spec, data, output_dir))
+            
+            if executor == "process" and pending:
+                pool = self._plot_pool(max_workers)
+                futures = [(i, key, spec, pool.submit(_render_plot, spec, data, output_dir)) for i, key, spec, data, output_dir in pending]
+                rendered = []
+                for i, key, spec, future in futures:
+                    try:
+                        rendered.append((i, key, future.result()))
+                    except Exception as e:
+                        print(f"Plot {spec['plot_type']} of {spec['x_column']} failed: {e}")
+            else:
+                rendered = [(i, key, _render_plot(spec, data, output_dir)) for i, key, spec, data, output_dir in pending]
+            
+            for i, key, (filename, seconds) in rendered:
+                if store:
+                    store.put(key, filename, source=dataset_name)
+                    shutil.rmtree(os.path.dirname(filename), ignore_errors=True)
+                    outcomes[i] = (key, seconds, False)
+                else:
+                    outcomes[i] = (filename, seconds, False)
+            
+            bundled = []
+            for i, spec in enumerate(specs):
+                if i not in outcomes:
+                    continue
+                file, seconds, cached = outcomes[i]
+                if store:
+                    name = VisualizationTools.plot_filename(spec['kind'], spec['plot_type'], spec['x_column'], spec.get('y_column'))
+                    file = store.link(file, self.run_id, dataset_name, name)
+                visualization_files[spec['kind']].append(file)
+                if spec.get('plotlyjs'):
+                    bundled.append(file)
+                self.plot_timings.append({
+                    "file": file,
+                    "plot_type": spec['plot_type'],
+                    "seconds": seconds,
+                    "cached": cached
+                })
+            
+            if bundled:
+                # One page per dataset and run that loads each figure page as it scrolls into view
+                dashboard = VisualizationTools.create_dashboard(
+                    bundled,
+                    os.path.join(run_dir, "dashboard.html"),
+                    title=f"Dashboard {dataset_name}"
+                )
+                visualization_files['interactive'].append(dashboard)
+            
+            if store:
+                store.flush()
+                hits = sum(cached for _, _, cached in outcomes.values())
+                print(f"Plot store: {hits} of {len(specs)} plots for {dataset_name} reused")
+            
+            return visualization_files
+            
+        except Exception as e:
+            self.handle_error(e)
+            return {'static': [], 'interactive': []}
+
+
+def _plot_data(df: pd.DataFrame, spec: Dict[str, Any]) -> pd.DataFrame:
+    """The slice of the frame a plot reads: only its columns, sorted if the plot needs it."""
+    data = df[spec["data_columns"]]
+    if spec.get("sort_by"):
+        data = data.sort_values(spec["sort_by"])
+    return data
+
+
+def _init_plot_worker() -> None:
+    """Pool initializer: render without a display."""
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+def _render_plot(spec: Dict[str, Any], data: pd.DataFrame, output_dir: str) -> Tuple[str, float]:
+    """Pool entry point: draw one plot spec and return its file and render time."""
+    start = time.perf_counter()
+    options = {
+        key: value for key, value in spec.items()
+        if key not in ("kind", "plot_type", "data_columns", "sort_by", "x_column", "y_column", "title")
+    }
+    
+    render = VisualizationTools.create_static_plot if spec["kind"] == "static" else VisualizationTools.create_interactive_plot
+    filename = render(
+        data,
+        spec["plot_type"],
+        x_column=spec["x_column"],
+        y_column=spec.get("y_column"),
+        title=spec.get("title"),
+        output_dir=output_dir,
+        **options
+    )
+    return filename, time.perf_counter() - start
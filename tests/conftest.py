@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The tools and stages are imported from the repository root, as main.py does
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+from tools.analysis_tools import AnalysisTools, _CORRELATION_CACHE, _CORRELATION_CACHE_SIZE
+
+
+@pytest.fixture
+def df() -> pd.DataFrame:
+    rng = np.random.default_rng(2)
+    x = rng.normal(size=4000)
+    return pd.DataFrame({
+        "x": x,
+        "y": 2 * x + rng.normal(size=4000),
+        "z": np.exp(x) + rng.normal(scale=0.5, size=4000),
+        "w": rng.integers(0, 5, 4000)
+    })
+
+
+def chunk_source(df: pd.DataFrame, chunksize: int = 450):
+    return lambda: (df.iloc[start:start + chunksize] for start in range(0, len(df), chunksize))
+
+
+@pytest.mark.parametrize("method", ["pearson", "spearman"])
+def test_in_memory_matches_pandas(df, method):
+    corr = AnalysisTools.correlation_analysis(df, method=method, use_cache=False)
+    pd.testing.assert_frame_equal(corr, df.astype(np.float64).corr(method=method), atol=1e-12)
+
+
+def test_chunked_pearson_matches_in_memory(df):
+    chunked = AnalysisTools.correlation_analysis_chunked(chunk_source(df), list(df.columns))
+    pd.testing.assert_frame_equal(chunked, AnalysisTools.correlation_analysis(df, use_cache=False), atol=1e-12)
+
+
+def test_chunked_spearman_is_within_sketch_error(df):
+    chunked = AnalysisTools.correlation_analysis_chunked(chunk_source(df), list(df.columns), method="spearman")
+    exact = AnalysisTools.correlation_analysis(df, method="spearman", use_cache=False)
+    np.testing.assert_allclose(chunked.to_numpy(), exact.to_numpy(), atol=0.02)
+
+
+def test_missing_values_pairwise_and_listwise(df):
+    df = df.copy()
+    df.loc[::5, "x"] = np.nan
+    df.loc[::9, "y"] = np.nan
+    pairwise = AnalysisTools.correlation_analysis(df, use_cache=False)
+    pd.testing.assert_frame_equal(pairwise, df.astype(np.float64).corr(), atol=1e-12)
+    listwise = AnalysisTools.correlation_analysis(df, use_cache=False, missing="listwise")
+    pd.testing.assert_frame_equal(listwise, df.dropna().astype(np.float64).corr(), atol=1e-12)
+    chunked = AnalysisTools.correlation_analysis_chunked(chunk_source(df), list(df.columns))
+    pd.testing.assert_frame_equal(chunked, listwise, atol=1e-12)
+
+
+def test_process_cache_is_bounded(df):
+    _CORRELATION_CACHE.clear()
+    for version in range(_CORRELATION_CACHE_SIZE + 3):
+        frame = df.copy()
+        frame.attrs["dataset_version"] = version
+        AnalysisTools.correlation_analysis(frame)
+    assert len(_CORRELATION_CACHE) == _CORRELATION_CACHE_SIZE
+    assert next(iter(_CORRELATION_CACHE))[0] == 3
@@ -0,0 +1,78 @@
+import json
+import numpy as np
+import pandas as pd
+from tools.cache_tools import DiskCache, PreprocessCache, AnalysisCache
+
+
+def frame(rows: int = 1000) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({"x": rng.normal(size=rows), "y": rng.integers(0, 10, rows)})
+
+
+def test_roundtrip_and_counters(tmp_path):
+    cache = PreprocessCache(str(tmp_path))
+    assert cache.get("missing") is None
+    cache.put("a", frame(), source="ds")
+    pd.testing.assert_frame_equal(cache.get("a"), frame())
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_lookups_do_not_write_index_until_flush(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    cache.put("a", [1, 2, 3], source="ds")
+    written = cache.index_path.read_text()
+    assert cache.get("a") == [1, 2, 3]
+    assert cache.index_path.read_text() == written
+    cache.flush()
+    assert json.loads(cache.index_path.read_text())["counters"]["hits"] == 1
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    payload = b"x" * 4096
+    for key in ("a", "b"):
+        cache.put(key, payload, source="ds")
+    cache.index["entries"]["a"]["last_access"] += 10  # "a" was read more recently
+    cache.max_bytes = 2 * cache.index["entries"]["a"]["size"]
+    cache.put("c", payload, source="ds")
+    assert set(cache.index["entries"]) == {"a", "c"}
+    assert not (tmp_path / "b.pkl").exists()
+
+
+def test_corrupt_parquet_entry_is_a_miss(tmp_path):
+    cache = PreprocessCache(str(tmp_path))
+    cache.put("a", frame(), source="ds")
+    (tmp_path / "a.parquet").write_bytes(b"not a parquet file")
+    assert cache.get("a") is None
+    assert "a" not in cache.index["entries"]
+    assert not (tmp_path / "a.parquet").exists()
+    assert cache.stats()["misses"] == 1
+
+
+def test_corrupt_and_missing_pickle_entries_are_misses(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    cache.put("a", {"value": 1}, source="ds")
+    cache.put("b", {"value": 2}, source="ds")
+    (tmp_path / "a.pkl").write_bytes(b"\x80\x05garbage")
+    (tmp_path / "b.pkl").unlink()
+    assert cache.get("a") is None
+    assert cache.get("b") is None
+    assert cache.index["entries"] == {}
+
+
+def test_corrupt_index_starts_fresh(tmp_path):
+    DiskCache(str(tmp_path)).put("a", 1, source="ds")
+    (tmp_path / "index.json").write_text("{ truncated")
+    assert DiskCache(str(tmp_path)).index["entries"] == {}
+
+
+def test_invalidate_removes_analysis_sidecars(tmp_path):
+    cache = AnalysisCache(str(tmp_path / "cache"))
+    labels = tmp_path / "labels.npy"
+    np.save(labels, np.arange(3))
+    cache.put("a", {"clustering_analysis": {"labels_path": str(labels)}}, source="ds")
+    cache.put("b", {"descriptive_statistics": {}}, source="other")
+    assert cache.invalidate("ds") == 1
+    assert not labels.exists()
+    assert set(cache.index["entries"]) == {"b"}
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+from tools.analysis_tools import AnalysisTools, MomentStats
+
+
+@pytest.fixture
+def df() -> pd.DataFrame:
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({
+        "normal": rng.normal(50, 10, 5000),
+        "skewed": rng.lognormal(0, 1, 5000),
+        "counts": rng.integers(0, 20, 5000),
+        "constant": np.full(5000, 3.0)
+    })
+    df.loc[::7, "normal"] = np.nan
+    return df
+
+
+def pandas_stats(df: pd.DataFrame) -> pd.DataFrame:
+    return pd.DataFrame({
+        "mean": df.mean(),
+        "median": df.median(),
+        "std": df.std(),
+        "min": df.min(),
+        "max": df.max(),
+        "skewness": df.skew(),
+        "kurtosis": df.kurt()
+    }).T
+
+
+def test_single_pass_matches_pandas(df):
+    stats = pd.DataFrame(AnalysisTools.descriptive_statistics(df))
+    expected = pandas_stats(df)
+    pd.testing.assert_frame_equal(stats.loc[expected.index, expected.columns], expected, rtol=1e-9, atol=1e-12)
+
+
+@pytest.mark.parametrize("chunksize", [7, 333, 5000])
+def test_chunked_matches_in_memory(df, chunksize):
+    chunks = (df.iloc[start:start + chunksize] for start in range(0, len(df), chunksize))
+    chunked = pd.DataFrame(AnalysisTools.descriptive_statistics_chunked(chunks, list(df.columns)))
+    exact = pd.DataFrame(AnalysisTools.descriptive_statistics(df))
+    moments = ["mean", "std", "min", "max", "skewness", "kurtosis"]
+    pd.testing.assert_frame_equal(chunked.loc[moments], exact.loc[moments], rtol=1e-8, atol=1e-10)
+
+
+def test_merge_handles_empty_partitions(df):
+    values = df.to_numpy(dtype=np.float64)
+    merged = MomentStats.from_array(values[:0], df.columns).merge(MomentStats.from_array(values, df.columns))
+    np.testing.assert_allclose(merged.mean, df.mean().to_numpy())
+    np.testing.assert_allclose(merged.m2, MomentStats.from_array(values, df.columns).m2)
+
+
+def test_short_columns_give_nan_shape_statistics():
+    stats = AnalysisTools.descriptive_statistics(pd.DataFrame({"x": [1.0, 2.0]}))
+    assert np.isnan(stats["x"]["skewness"]) and np.isnan(stats["x"]["kurtosis"])
+    assert stats["x"]["std"] == pytest.approx(np.std([1.0, 2.0], ddof=1))
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pathlib import Path
+from tools.cache_tools import PlotStore
+
+
+@pytest.fixture
+def store(tmp_path) -> PlotStore:
+    return PlotStore(str(tmp_path / "store"))
+
+
+def render(store: PlotStore, name: str) -> str:
+    """Stand-in for a rendered plot file in the store's scratch directory."""
+    store.tmp_dir.mkdir(parents=True, exist_ok=True)
+    path = store.tmp_dir / name
+    path.write_bytes(name.encode("utf-8"))
+    return str(path)
+
+
+def run(store: PlotStore, tmp_path, run_id: str, keys, created: float) -> list:
+    files = [store.link(key, run_id, "ds", f"{key}.png", output_dir=str(tmp_path / "viz")) for key in keys]
+    store.index["runs"][run_id]["created"] = created
+    return files
+
+
+def test_key_depends_on_spec_and_data(store):
+    data = pd.DataFrame({"x": np.arange(10.0)})
+    spec = {"plot_type": "histogram", "x_column": "x", "bins": 10}
+    key = store.make_key(spec, data)
+    assert store.make_key(dict(spec), data.copy()) == key
+    assert store.make_key({**spec, "bins": 20}, data) != key
+    assert store.make_key(spec, data.assign(x=data["x"] + 1)) != key
+    mask = {**spec, "mask": np.array([True, False] * 5)}
+    assert store.make_key(mask, data) != store.make_key({**spec, "mask": np.array([False, True] * 5)}, data)
+
+
+def test_links_share_one_stored_image(store, tmp_path):
+    store.put("a", render(store, "a.png"), source="ds")
+    first, = run(store, tmp_path, "run1", ["a"], 1.0)
+    second, = run(store, tmp_path, "run2", ["a"], 2.0)
+    assert Path(first).read_bytes() == Path(second).read_bytes() == b"a.png"
+    assert len(store.index["entries"]) == 1
+    assert store.get("a") == store.cache_dir / "a.png"
+
+
+def test_collect_keeps_newest_runs_and_their_images(store, tmp_path):
+    for key in "abc":
+        store.put(key, render(store, f"{key}.png"), source="ds")
+    old = run(store, tmp_path, "run1", ["a", "b"], 1.0)
+    run(store, tmp_path, "run2", ["b"], 2.0)
+    new = run(store, tmp_path, "run3", ["c"], 3.0)
+    removed = store.collect(keep_runs=2)
+    assert removed == {"runs": 1, "images": 1, "retained": 0}
+    assert set(store.index["runs"]) == {"run2", "run3"}
+    assert set(store.index["entries"]) == {"b", "c"}
+    assert not Path(old[0]).parent.exists()
+    assert Path(new[0]).exists()
+
+
+def test_collect_keeps_runs_linked_from_reports(store, tmp_path):
+    store.put("a", render(store, "a.png"), source="ds")
+    files = run(store, tmp_path, "run1", ["a"], 1.0)
+    run(store, tmp_path, "run2", ["a"], 2.0)
+    report = tmp_path / "report.html"
+    report.write_text("<img>")
+    assert store.retain({str(report): files}) == 1
+    assert store.collect(keep_runs=1)["retained"] == 1
+    assert Path(files[0]).exists()
+    report.unlink()
+    assert store.collect(keep_runs=1)["runs"] == 1
+    assert not Path(files[0]).exists()
+
+
+def test_missing_image_is_a_miss(store):
+    store.put("a", render(store, "a.png"), source="ds")
+    (store.cache_dir / "a.png").unlink()
+    assert store.get("a") is None
+    assert "a" not in store.index["entries"]
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+from tools.analysis_tools import AnalysisTools
+
+
+@pytest.fixture
+def df() -> pd.DataFrame:
+    rng = np.random.default_rng(3)
+    a = rng.normal(100, 20, 3000)
+    b = rng.uniform(0, 1, 3000)
+    c = rng.integers(0, 4, 3000)
+    df = pd.DataFrame({"a": a, "b": b, "c": c, "y": 3.0 + 0.5 * a - 7.0 * b + 2.0 * c + rng.normal(size=3000)})
+    df.loc[::11, "b"] = np.nan
+    return df
+
+
+def lstsq(df: pd.DataFrame, target: str, features):
+    complete = df[features + [target]].dropna()
+    design = np.column_stack([np.ones(len(complete)), complete[features].to_numpy()])
+    coef, *_ = np.linalg.lstsq(design, complete[target].to_numpy(), rcond=None)
+    residuals = complete[target].to_numpy() - design @ coef
+    sigma2 = residuals @ residuals / (len(complete) - len(features) - 1)
+    std_err = np.sqrt(sigma2 * np.diag(np.linalg.inv(design.T @ design)))
+    r_squared = 1 - residuals @ residuals / np.sum((complete[target] - complete[target].mean()) ** 2)
+    return coef, std_err, r_squared, len(complete)
+
+
+def assert_matches(results, expected, features):
+    coef, std_err, r_squared, n = expected
+    np.testing.assert_allclose([results["coefficients"][col] for col in features], coef[1:], rtol=1e-8)
+    np.testing.assert_allclose([results["standard_errors"][col] for col in features], std_err[1:], rtol=1e-6)
+    assert results["intercept"] == pytest.approx(coef[0], rel=1e-8)
+    assert results["intercept_standard_error"] == pytest.approx(std_err[0], rel=1e-6)
+    assert results["r_squared"] == pytest.approx(r_squared, rel=1e-10)
+    assert results["n_observations"] == n
+
+
+def test_closed_form_matches_least_squares(df):
+    features = ["a", "b", "c"]
+    assert_matches(AnalysisTools.regression_analysis(df, "y", features), lstsq(df, "y", features), features)
+
+
+@pytest.mark.parametrize("chunksize", [100, 1000, 3000])
+def test_chunked_matches_in_memory(df, chunksize):
+    features = ["a", "b", "c"]
+    chunks = (df.iloc[start:start + chunksize] for start in range(0, len(df), chunksize))
+    results = AnalysisTools.regression_analysis_chunked(chunks, "y", features)
+    assert_matches(results, lstsq(df, "y", features), features)
+    assert set(results["timing"]["feature_seconds"]) == {"a", "b", "c", "y"}
+
+
+def test_constant_feature_gets_nan_coefficient(df):
+    df = df.assign(flat=1.0)
+    results = AnalysisTools.regression_analysis(df, "y", ["a", "flat"])
+    assert np.isnan(results["coefficients"]["flat"])
+    assert results["coefficients"]["a"] == pytest.approx(lstsq(df, "y", ["a"])[0][1], rel=1e-8)
+
+
+def test_select_target_prefers_candidates_then_float_columns(df):
+    assert AnalysisTools.select_target(df, candidates=["missing", "c"]) == "c"
+    assert AnalysisTools.select_target(df[["c", "y"]]) == "y"
+    assert AnalysisTools.select_target(df[["c"]]) is None
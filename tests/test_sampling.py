@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+from tools.analysis_tools import AnalysisTools
+from tools.data_tools import DataTools
+
+
+@pytest.fixture
+def df() -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    region = rng.choice(["north", "south", "east", "rare"], size=20_000, p=[0.6, 0.3, 0.0995, 0.0005])
+    return pd.DataFrame({
+        "row": np.arange(20_000),
+        "region": region,
+        "amount": rng.gamma(2.0, 50.0, 20_000) * np.where(region == "north", 1.0, 2.0)
+    })
+
+
+def test_sample_does_not_depend_on_chunking(df):
+    small = DataTools.stratified_sample(df, ["region"], sample_size=1000, seed=3, chunksize=777)
+    large = DataTools.stratified_sample(df, ["region"], sample_size=1000, seed=3, chunksize=20_000)
+    pd.testing.assert_frame_equal(small, large)
+    other = DataTools.stratified_sample(df, ["region"], sample_size=1000, seed=4)
+    assert not small["row"].equals(other["row"])
+
+
+def test_proportional_allocation_with_minimum(df):
+    sample = DataTools.stratified_sample(df, ["region"], sample_size=1000, seed=3)
+    info = sample.attrs["sample"]
+    assert info["population_rows"] == len(df)
+    population = df["region"].value_counts()
+    for stratum in info["strata"]:
+        region = stratum["values"][0]
+        assert stratum["population"] == population[region]
+        expected = max(round(1000 * population[region] / len(df)), 2)
+        assert stratum["sample"] == min(expected, population[region])
+        assert (sample["region"] == region).sum() == stratum["sample"]
+    # Rows keep their original order
+    assert sample["row"].is_monotonic_increasing
+
+
+def test_small_inputs_are_returned_whole(df):
+    sample = DataTools.stratified_sample(df.head(500), ["region"], sample_size=1000)
+    pd.testing.assert_frame_equal(sample, df.head(500))
+    assert "sample" not in sample.attrs
+
+
+def test_weighted_estimates_cover_population_total(df):
+    sample = DataTools.stratified_sample(df, ["region"], sample_size=2000, seed=3)
+    weights = DataTools.sample_weights(sample)
+    assert weights.sum() == pytest.approx(len(df))
+    estimates = AnalysisTools.sample_estimates(sample, ["amount"], confidence=0.99)
+    mean, total = estimates["means"]["amount"], estimates["totals"]["amount"]
+    assert mean["lower"] <= df["amount"].mean() <= mean["upper"]
+    assert total["lower"] <= df["amount"].sum() <= total["upper"]
+    assert total["estimate"] == pytest.approx(np.sum(weights * sample["amount"]))
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+from tools.sketch_tools import QuantileSketch, HyperLogLog, CountMinSketch
+
+
+@pytest.fixture(scope="module")
+def values() -> np.ndarray:
+    return np.random.default_rng(4).lognormal(0, 1.5, 200_000)
+
+
+def merged_quantile_sketch(values: np.ndarray, chunksize: int = 25_000) -> QuantileSketch:
+    sketch = QuantileSketch()
+    for start in range(0, len(values), chunksize):
+        sketch.merge(QuantileSketch().update(values[start:start + chunksize]))
+    return sketch
+
+
+def test_quantile_sketch_is_exact_while_small():
+    values = np.random.default_rng(5).normal(size=150)
+    sketch = QuantileSketch().update(values)
+    assert sketch.is_exact and sketch.rank_error() == 0.0
+    assert sketch.quantile(0.3) == pytest.approx(pd.Series(values).quantile(0.3))
+
+
+def test_quantile_sketch_rank_error_bound(values):
+    sketch = merged_quantile_sketch(values)
+    assert not sketch.is_exact
+    qs = np.linspace(0.01, 0.99, 99)
+    ordered = np.sort(values)
+    ranks = np.searchsorted(ordered, sketch.quantiles(qs)) / len(values)
+    assert np.max(np.abs(ranks - qs)) <= sketch.rank_error()
+    assert (sketch.min, sketch.max, sketch.count) == (values.min(), values.max(), len(values))
+
+
+def test_median_absolute_deviation_within_rank_error(values):
+    sketch = merged_quantile_sketch(values)
+    center = sketch.quantile(0.5)
+    deviations = np.sort(np.abs(values - center))
+    rank = np.searchsorted(deviations, sketch.median_absolute_deviation(center)) / len(values)
+    assert abs(rank - 0.5) <= 2 * sketch.rank_error()
+
+
+def test_quantile_sketch_roundtrip(values):
+    sketch = merged_quantile_sketch(values[:50_000])
+    restored = QuantileSketch.from_dict(sketch.to_dict())
+    np.testing.assert_array_equal(restored.quantiles([0.1, 0.5, 0.9]), sketch.quantiles([0.1, 0.5, 0.9]))
+
+
+@pytest.mark.parametrize("distinct", [100, 5_000, 300_000])
+def test_hyperloglog_relative_error(distinct):
+    ids = pd.Series(np.arange(distinct)).astype(str)
+    halves = HyperLogLog().update(ids[:distinct // 2]).merge(HyperLogLog().update(ids[distinct // 2:]))
+    # Four standard errors; small cardinalities use linear counting and are tighter
+    assert abs(halves.estimate() / distinct - 1) <= 4 * halves.relative_error
+    restored = HyperLogLog.from_dict(halves.to_dict())
+    assert restored.estimate() == halves.estimate()
+
+
+def test_count_min_error_bound_and_heavy_hitters():
+    rng = np.random.default_rng(6)
+    values = pd.Series(np.concatenate([rng.zipf(1.3, 100_000) % 50_000, np.full(5_000, 7)]))
+    exact = values.value_counts()
+    sketch = CountMinSketch(width=1024)
+    for start in range(0, len(values), 20_000):
+        sketch.merge(CountMinSketch(width=1024).update(values[start:start + 20_000]))
+    estimates = sketch.estimate(pd.Series(exact.index))
+    overcount = estimates - exact.to_numpy()
+    assert overcount.min() >= 0
+    assert np.mean(overcount <= sketch.error_bound) >= sketch.confidence
+    top = [value for value, _ in sketch.heavy_hitters(3)]
+    assert top == list(exact.index[:3])
+    restored = CountMinSketch.from_dict(sketch.to_dict())
+    assert restored.heavy_hitters(3) == sketch.heavy_hitters(3)
@@ -1,60 +1,515 @@
 import pandas as pd
 import numpy as np
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
-from typing import Dict, List, Any
-from sklearn.linear_model import LinearRegression
+from typing import Dict, List, Any, Optional, Sequence, Callable, Iterable, Tuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from statistics import NormalDist
+import time
+from tools.sketch_tools import QuantileSketch, HyperLogLog, CountMinSketch
+from tools.data_tools import DataTools
+import json
+
+class MomentStats:
+    """Mergeable first four central moments, min and max for a block of numeric columns.
+    
+    Built in one vectorized pass over a 2-D array and combined with the
+    pairwise update of Chan et al. / Pébay, so statistics computed per chunk,
+    per increment or per worker merge to the same result as a single pass.
+    Medians come from optional per-column quantile sketches.
+    """
+    
+    def __init__(
+        self,
+        columns: Sequence[str],
+        n: np.ndarray,
+        mean: np.ndarray,
+        m2: np.ndarray,
+        m3: np.ndarray,
+        m4: np.ndarray,
+        minimum: np.ndarray,
+        maximum: np.ndarray,
+        sketches: Optional[List[QuantileSketch]] = None
+    ):
+        self.columns = list(columns)
+        self.n = n
+        self.mean = mean
+        self.m2 = m2
+        self.m3 = m3
+        self.m4 = m4
+        self.min = minimum
+        self.max = maximum
+        self.sketches = sketches
+        
+    @classmethod
+    def from_array(cls, values: np.ndarray, columns: Sequence[str], with_sketches: bool = False) -> "MomentStats":
+        """Compute moments for every column of ``values`` at once, ignoring NaNs."""
+        # Column-major layout keeps every per-column reduction on contiguous memory
+        values = np.asfortranarray(values, dtype=np.float64)
+        present = ~np.isnan(values)
+        has_missing = not present.all()
+        filled = np.where(present, values, 0.0) if has_missing else values
+        n = present.sum(axis=0).astype(np.float64)
+        
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = filled.sum(axis=0) / n
+            deviation = filled - mean
+            if has_missing:
+                deviation[~present] = 0.0
+            # einsum fuses the powers and the column sums without full-size temporaries
+            m2 = np.einsum("ij,ij->j", deviation, deviation)
+            m3 = np.einsum("ij,ij,ij->j", deviation, deviation, deviation)
+            m4 = np.einsum("ij,ij,ij,ij->j", deviation, deviation, deviation, deviation)
+            minimum = np.where(n > 0, np.fmin.reduce(values, axis=0, initial=np.inf), np.nan)
+            maximum = np.where(n > 0, np.fmax.reduce(values, axis=0, initial=-np.inf), np.nan)
+        
+        sketches = None
+        if with_sketches:
+            sketches = [QuantileSketch().update(values[:, i]) for i in range(values.shape[1])]
+        
+        return cls(columns, n, mean, m2, m3, m4, minimum, maximum, sketches)
+        
+    def merge(self, other: "MomentStats") -> "MomentStats":
+        """Combine with statistics for other rows of the same columns."""
+        na, nb = self.n, other.n
+        n = na + nb
+        with np.errstate(invalid="ignore", divide="ignore"):
+            delta = np.where(nb > 0, other.mean, 0.0) - np.where(na > 0, self.mean, 0.0)
+            share = np.where(n > 0, na * nb / n, 0.0)
+            safe_n = np.where(n > 0, n, 1.0)
+            
+            mean = np.where(
+                n > 0,
+                np.where(na > 0, self.mean, 0.0) + delta * nb / safe_n,
+                np.nan
+            )
+            m2 = self.m2 + other.m2 + delta ** 2 * share
+            m3 = (
+                self.m3 + other.m3
+                + delta ** 3 * share * (na - nb) / safe_n
+                + 3 * delta * (na * other.m2 - nb * self.m2) / safe_n
+            )
+            m4 = (
+                self.m4 + other.m4
+                + delta ** 4 * share * (na * na - na * nb + nb * nb) / safe_n ** 2
+                + 6 * delta ** 2 * (na * na * other.m2 + nb * nb * self.m2) / safe_n ** 2
+                + 4 * delta * (na * other.m3 - nb * self.m3) / safe_n
+            )
+        
+        self.n = n
+        self.mean = mean
+        self.m2, self.m3, self.m4 = m2, m3, m4
+        self.min = np.fmin(self.min, other.min)
+        self.max = np.fmax(self.max, other.max)
+        if self.sketches is not None and other.sketches is not None:
+            for sketch, other_sketch in zip(self.sketches, other.sketches):
+                sketch.merge(other_sketch)
+        else:
+            self.sketches = None
+        return self
+        
+    def to_stats(self, medians: Optional[np.ndarray] = None) -> Dict[str, Dict[str, float]]:
+        """Per-column summary matching pandas' sample std, skew and excess kurtosis."""
+        n = self.n
+        if medians is None:
+            if self.sketches is not None:
+                medians = np.array([sketch.quantile(0.5) for sketch in self.sketches])
+            else:
+                medians = np.full(len(self.columns), np.nan)
+        
+        with np.errstate(invalid="ignore", divide="ignore"):
+            std = np.sqrt(self.m2 / (n - 1))
+            variance = self.m2 / n
+            constant = variance <= 1e-14 * np.maximum(self.mean ** 2, 1.0)
+            # Adjusted Fisher-Pearson skewness and bias-corrected excess kurtosis, as in pandas
+            g1 = (self.m3 / n) / variance ** 1.5
+            skewness = np.sqrt(n * (n - 1)) / (n - 2) * g1
+            g2 = (self.m4 / n) / variance ** 2 - 3
+            kurtosis = ((n + 1) * g2 + 6) * (n - 1) / ((n - 2) * (n - 3))
+        skewness = np.where(n < 3, np.nan, np.where(constant, 0.0, skewness))
+        kurtosis = np.where(n < 4, np.nan, np.where(constant, 0.0, kurtosis))
+        std = np.where(n < 2, np.nan, std)
+        
+        return {
+            col: {
+                'mean': float(self.mean[i]),
+                'median': float(medians[i]),
+                'std': float(std[i]),
+                'min': float(self.min[i]),
+                'max': float(self.max[i]),
+                'skewness': float(skewness[i]),
+                'kurtosis': float(kurtosis[i])
+            }
+            for i, col in enumerate(self.columns)
+        }
+
+
+class CoMomentStats:
+    """Mergeable sufficient statistics for a correlation matrix.
+    
+    Keeps the row count, column means and the co-moment matrix
+    ``sum((x - mean)(x - mean)^T)`` over complete rows. Partitions merge with
+    the pairwise update, so chunked, incremental and multi-process callers
+    never need the whole frame in memory.
+    """
+    
+    def __init__(self, columns: Sequence[str], n: float, mean: np.ndarray, comoment: np.ndarray):
+        self.columns = list(columns)
+        self.n = n
+        self.mean = mean
+        self.comoment = comoment
+        
+    @classmethod
+    def from_array(cls, values: np.ndarray, columns: Sequence[str]) -> "CoMomentStats":
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values).any(axis=1)]
+        n = float(len(values))
+        if n == 0:
+            k = values.shape[1]
+            return cls(columns, 0.0, np.zeros(k), np.zeros((k, k)))
+        mean = values.mean(axis=0)
+        deviation = values - mean
+        return cls(columns, n, mean, deviation.T @ deviation)
+        
+    def merge(self, other: "CoMomentStats") -> "CoMomentStats":
+        if other.n == 0:
+            return self
+        if self.n == 0:
+            self.n, self.mean, self.comoment = other.n, other.mean.copy(), other.comoment.copy()
+            return self
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.comoment = self.comoment + other.comoment + np.outer(delta, delta) * self.n * other.n / n
+        self.mean = self.mean + delta * other.n / n
+        self.n = n
+        return self
+        
+    def correlation(self) -> pd.DataFrame:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            scale = np.sqrt(np.diag(self.comoment))
+            corr = self.comoment / np.outer(scale, scale)
+        corr = np.clip(corr, -1.0, 1.0)
+        np.fill_diagonal(corr, np.where(scale > 0, 1.0, np.nan))
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+
+# Bump whenever an analysis changes its output so memoized results are not reused
+ANALYSIS_VERSION = 3
+
+# Label of the bucket that collects every segment beyond the cap
+OTHER_SEGMENT = "other"
+
+# Correlation matrices recently computed in this process, keyed by dataset version, least
+# recently used first; results that must outlive the process go through AnalysisCache
+_CORRELATION_CACHE: "OrderedDict[Tuple, pd.DataFrame]" = OrderedDict()
+_CORRELATION_CACHE_SIZE = 8
 
 class AnalysisTools:
     @staticmethod
-    def descriptive_statistics(df: pd.DataFrame, columns: List[str] = None) -> Dict[str, Dict[str, float]]:
-        """Calculate descriptive statistics for specified columns."""
+    def descriptive_statistics(
+        df: pd.DataFrame,
+        columns: List[str] = None,
+        exact_median: bool = True
+    ) -> Dict[str, Dict[str, float]]:
+        """Calculate descriptive statistics for specified columns.
+        
+        All columns are summarized in one fused pass over the numeric block.
+        With ``exact_median=False`` medians come from quantile sketches, which
+        is what chunked and incremental callers merge.
+        """
         if columns is None:
             columns = df.select_dtypes(include=[np.number]).columns
+        columns = [col for col in columns if pd.api.types.is_numeric_dtype(df[col])]
         
-        stats = {}
-        for col in columns:
-            if df[col].dtype in ['int64', 'float64']:
-                stats[col] = {
-                    'mean': df[col].mean(),
-                    'median': df[col].median(),
-                    'std': df[col].std(),
-                    'min': df[col].min(),
-                    'max': df[col].max(),
-                    'skewness': df[col].skew(),
-                    'kurtosis': df[col].kurtosis()
-                }
+        values = np.asfortranarray(df[columns].to_numpy(dtype=np.float64, na_value=np.nan))
+        moments = MomentStats.from_array(values, columns, with_sketches=not exact_median)
+        medians = None
+        if exact_median and len(values):
+            medians = np.nanmedian(values, axis=0) if np.isnan(values).any() else np.median(values, axis=0)
         
-        return stats
+        return moments.to_stats(medians)
 
     @staticmethod
-    def correlation_analysis(df: pd.DataFrame, columns: List[str] = None) -> pd.DataFrame:
-        """Calculate correlation matrix for specified columns."""
+    def moment_stats(df: pd.DataFrame, columns: List[str] = None) -> MomentStats:
+        """Mergeable moments (with median sketches) for one chunk, increment or partition."""
         if columns is None:
             columns = df.select_dtypes(include=[np.number]).columns
+        values = df[list(columns)].to_numpy(dtype=np.float64, na_value=np.nan)
+        return MomentStats.from_array(values, columns, with_sketches=True)
+
+    @staticmethod
+    def descriptive_statistics_chunked(chunks, columns: List[str]) -> Dict[str, Dict[str, float]]:
+        """Descriptive statistics over an iterable of frames without holding them all in memory."""
+        merged = None
+        for chunk in chunks:
+            stats = AnalysisTools.moment_stats(chunk, columns)
+            merged = stats if merged is None else merged.merge(stats)
+        return merged.to_stats() if merged is not None else {}
+
+    @staticmethod
+    def comoment_stats(df: pd.DataFrame, columns: List[str], method: str = "pearson", sketches=None) -> CoMomentStats:
+        """Correlation sufficient statistics for one chunk or partition.
         
-        return df[columns].corr()
+        For Spearman, values are first mapped to ranks with ``sketches`` (one
+        ``QuantileSketch`` per column, built over the whole dataset) so that
+        partitions share a common ranking.
+        """
+        values = df[list(columns)].to_numpy(dtype=np.float64, na_value=np.nan)
+        if method == "spearman":
+            values = np.column_stack([sketch.cdf(values[:, i]) for i, sketch in enumerate(sketches)])
+        return CoMomentStats.from_array(values, columns)
 
     @staticmethod
-    def regression_analysis(df: pd.DataFrame, target: str, features: List[str]) -> Dict[str, Any]:
-        """Perform linear regression analysis."""
-        X = df[features]
-        y = df[target]
+    def correlation_analysis(
+        df: pd.DataFrame,
+        columns: List[str] = None,
+        method: str = "pearson",
+        use_cache: bool = True,
+        missing: str = "pairwise"
+    ) -> pd.DataFrame:
+        """Calculate correlation matrix for specified columns.
         
-        model = LinearRegression()
-        model.fit(X, y)
+        Uses one matrix product over complete rows (Pearson) or their exact
+        average ranks (Spearman). With ``missing="pairwise"`` (the default,
+        as in pandas) columns containing NaN fall back to pairwise deletion;
+        ``missing="listwise"`` drops incomplete rows and always takes the
+        fast path. The last few results are kept per
+        ``df.attrs['dataset_version']`` so heatmaps and reports reuse them.
+        """
+        if columns is None:
+            columns = df.select_dtypes(include=[np.number]).columns
+        columns = list(columns)
         
-        results = {
-            'coefficients': dict(zip(features, model.coef_)),
-            'intercept': model.intercept_,
-            'r_squared': model.score(X, y)
+        if method not in ("pearson", "spearman"):
+            raise ValueError(f"Unsupported correlation method: {method}")
+        if missing not in ("pairwise", "listwise"):
+            raise ValueError(f"Unsupported missing-value handling: {missing}")
+        
+        version = df.attrs.get("dataset_version")
+        cache_key = (version, tuple(columns), method, missing, len(df))
+        if use_cache and version is not None and cache_key in _CORRELATION_CACHE:
+            _CORRELATION_CACHE.move_to_end(cache_key)
+            return _CORRELATION_CACHE[cache_key].copy()
+        
+        values = df[columns].to_numpy(dtype=np.float64, na_value=np.nan)
+        complete = ~np.isnan(values).any(axis=1)
+        if missing == "pairwise" and not complete.all():
+            # Every pair uses all rows where both columns are present
+            corr = df[columns].astype(np.float64).corr(method=method)
+        else:
+            values = values[complete]
+            if method == "spearman":
+                values = pd.DataFrame(values).rank(method="average").to_numpy()
+            corr = CoMomentStats.from_array(values, columns).correlation()
+        
+        if use_cache and version is not None:
+            _CORRELATION_CACHE[cache_key] = corr.copy()
+            while len(_CORRELATION_CACHE) > _CORRELATION_CACHE_SIZE:
+                _CORRELATION_CACHE.popitem(last=False)
+        return corr
+
+    @staticmethod
+    def correlation_analysis_chunked(
+        chunk_source: Callable[[], Iterable[pd.DataFrame]],
+        columns: List[str],
+        method: str = "pearson"
+    ) -> pd.DataFrame:
+        """Correlation matrix over chunks produced by ``chunk_source()``.
+        
+        Pearson needs one pass. Spearman makes a first pass to build per-column
+        quantile sketches and ranks values against them in the second, so it
+        is approximate (within the sketch rank error) on large inputs.
+        """
+        sketches = None
+        if method == "spearman":
+            sketches = [QuantileSketch() for _ in columns]
+            for chunk in chunk_source():
+                values = chunk[list(columns)].to_numpy(dtype=np.float64, na_value=np.nan)
+                # Rank only complete rows, as the correlation itself does
+                values = values[~np.isnan(values).any(axis=1)]
+                for i, sketch in enumerate(sketches):
+                    sketch.update(values[:, i])
+        
+        merged = CoMomentStats.from_array(np.empty((0, len(columns))), columns)
+        for chunk in chunk_source():
+            merged.merge(AnalysisTools.comoment_stats(chunk, columns, method, sketches))
+        return merged.correlation()
+
+    @staticmethod
+    def select_target(df: pd.DataFrame, columns: List[str] = None, candidates: Sequence[str] = ()) -> Optional[str]:
+        """Pick a regression target: the first candidate present, else the most continuous float column."""
+        if columns is None:
+            columns = df.select_dtypes(include=[np.number]).columns
+        columns = list(columns)
+        for candidate in candidates:
+            if candidate in columns:
+                return candidate
+        # Encoded categories are integer codes, so measured quantities are the float columns
+        floats = [col for col in columns if pd.api.types.is_float_dtype(df[col])]
+        if not floats:
+            return None
+        return max(floats, key=lambda col: df[col].nunique())
+
+    @staticmethod
+    def regression_stats(
+        df: pd.DataFrame,
+        target: str,
+        features: List[str],
+        column_seconds: Optional[Dict[str, float]] = None
+    ) -> CoMomentStats:
+        """Regression sufficient statistics (means and co-moments of features and target) for one chunk.
+        
+        The design matrix is built one column at a time; when ``column_seconds``
+        is given, the time spent converting each column is added to it.
+        """
+        columns = list(features) + [target]
+        values = np.empty((len(df), len(columns)), dtype=np.float64)
+        for i, col in enumerate(columns):
+            started = time.perf_counter()
+            values[:, i] = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            if column_seconds is not None:
+                column_seconds[col] = column_seconds.get(col, 0.0) + time.perf_counter() - started
+        return CoMomentStats.from_array(values, columns)
+
+    @staticmethod
+    def regression_from_stats(stats: CoMomentStats) -> Dict[str, Any]:
+        """Solve ordinary least squares from merged sufficient statistics.
+        
+        The last column of ``stats`` is the target. The centered normal
+        equations are scaled to unit diagonal and solved by Cholesky, falling
+        back to least squares when features are collinear. Features without
+        variance get a NaN coefficient.
+        """
+        features, target = stats.columns[:-1], stats.columns[-1]
+        n = stats.n
+        cxx = stats.comoment[:-1, :-1]
+        cxy = stats.comoment[:-1, -1]
+        syy = stats.comoment[-1, -1]
+        
+        scale = np.sqrt(np.diag(cxx))
+        active = scale > 0
+        coef = np.full(len(features), np.nan)
+        std_err = np.full(len(features), np.nan)
+        p = int(active.sum())
+        
+        # Correlation-scaled system keeps the condition number independent of units
+        a = cxx[np.ix_(active, active)] / np.outer(scale[active], scale[active])
+        b = cxy[active] / scale[active]
+        try:
+            lower = np.linalg.cholesky(a)
+            beta = np.linalg.solve(lower.T, np.linalg.solve(lower, b))
+            a_inv = np.linalg.solve(lower.T, np.linalg.solve(lower, np.eye(p)))
+        except np.linalg.LinAlgError:
+            beta = np.linalg.lstsq(a, b, rcond=None)[0]
+            a_inv = np.linalg.pinv(a)
+        
+        coef[active] = beta / scale[active]
+        sse = max(syy - float(coef[active] @ cxy[active]), 0.0)
+        dof = n - p - 1
+        sigma2 = sse / dof if dof > 0 else np.nan
+        std_err[active] = np.sqrt(sigma2 * np.diag(a_inv)) / scale[active]
+        
+        mean_x = stats.mean[:-1]
+        intercept = stats.mean[-1] - float(np.nansum(coef * mean_x))
+        # Intercept variance: sigma^2 (1/n + mean_x^T Cxx^-1 mean_x)
+        scaled_mean = mean_x[active] / scale[active]
+        intercept_se = np.sqrt(sigma2 * (1 / n + scaled_mean @ a_inv @ scaled_mean)) if n else np.nan
+        
+        return {
+            'target': target,
+            'coefficients': dict(zip(features, coef)),
+            'standard_errors': dict(zip(features, std_err)),
+            'intercept': intercept,
+            'intercept_standard_error': intercept_se,
+            'r_squared': 1 - sse / syy if syy > 0 else np.nan,
+            'n_observations': int(n)
         }
+
+    @staticmethod
+    def regression_analysis(df: pd.DataFrame, target: str, features: List[str]) -> Dict[str, Any]:
+        """Perform linear regression analysis in closed form over complete rows."""
+        features = [col for col in features if col != target]
+        started = time.perf_counter()
+        column_seconds = {}
+        stats = AnalysisTools.regression_stats(df, target, features, column_seconds)
+        accumulated = time.perf_counter()
+        results = AnalysisTools.regression_from_stats(stats)
+        solved = time.perf_counter()
         
+        results['timing'] = AnalysisTools._regression_timing(started, accumulated, solved, column_seconds)
         return results
 
     @staticmethod
-    def clustering_analysis(df: pd.DataFrame, columns: List[str], n_clusters: int = 3) -> Dict[str, Any]:
-        """Perform K-means clustering analysis."""
+    def regression_analysis_chunked(chunks, target: str, features: List[str]) -> Dict[str, Any]:
+        """Linear regression over an iterable of frames, merging per-chunk sufficient statistics."""
+        features = [col for col in features if col != target]
+        started = time.perf_counter()
+        merged = CoMomentStats.from_array(np.empty((0, len(features) + 1)), list(features) + [target])
+        column_seconds = {}
+        for chunk in chunks:
+            merged.merge(AnalysisTools.regression_stats(chunk, target, features, column_seconds))
+        accumulated = time.perf_counter()
+        results = AnalysisTools.regression_from_stats(merged)
+        solved = time.perf_counter()
+        
+        results['timing'] = AnalysisTools._regression_timing(started, accumulated, solved, column_seconds)
+        return results
+
+    @staticmethod
+    def _regression_timing(started: float, accumulated: float, solved: float, column_seconds: Dict[str, float]) -> Dict[str, Any]:
+        """Stage times, plus the measured design-matrix build time of each feature (and the target)."""
+        return {
+            'accumulate_seconds': accumulated - started,
+            'solve_seconds': solved - accumulated,
+            'feature_seconds': column_seconds
+        }
+
+    @staticmethod
+    def _fit_kmeans(data_scaled: np.ndarray, init: np.ndarray, mini_batch: bool, batch_size: int):
+        """Fit one k-means model from the given initial centers."""
+        from sklearn.cluster import KMeans, MiniBatchKMeans
+        
+        if mini_batch:
+            model = MiniBatchKMeans(
+                n_clusters=len(init), init=init, n_init=1, batch_size=batch_size, random_state=42
+            )
+        else:
+            model = KMeans(n_clusters=len(init), init=init, n_init=1, random_state=42)
+        return model.fit(data_scaled)
+
+    @staticmethod
+    def _elbow(ks: List[int], inertias: List[float]) -> int:
+        """Pick k at the point of the inertia curve farthest below the chord (kneedle)."""
+        if len(ks) < 3:
+            return ks[0]
+        x = (np.asarray(ks, dtype=np.float64) - ks[0]) / (ks[-1] - ks[0])
+        y = np.asarray(inertias, dtype=np.float64)
+        spread = y.max() - y.min()
+        y = (y - y.min()) / spread if spread > 0 else np.zeros_like(y)
+        return ks[int(np.argmax((1 - x) - y))]
+
+    @staticmethod
+    def clustering_analysis(
+        df: pd.DataFrame,
+        columns: List[str],
+        n_clusters: int = 3,
+        k_range: Optional[Sequence[int]] = None,
+        selection: str = "elbow",
+        mini_batch_threshold: int = 100_000,
+        batch_size: int = 4096,
+        silhouette_sample: int = 5_000,
+        max_workers: Optional[int] = None,
+        labels_path: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Perform K-means clustering analysis.
+        
+        Inputs with more than ``mini_batch_threshold`` rows use mini-batch
+        k-means. When ``k_range`` is given, every candidate k is fitted in a
+        thread pool, warm-started from a shared k-means++ seeding, and the
+        best k is chosen by the inertia elbow or a sampled silhouette score.
+        Row labels are written to ``labels_path`` as a compact ``.npy``
+        sidecar; the result itself holds only centers, sizes and that path.
+        """
         # Ensure that columns provided are from the DataFrame
         if not isinstance(df, pd.DataFrame):
             raise TypeError("Expected a DataFrame for clustering analysis.")
@@ -62,18 +517,497 @@ class AnalysisTools:
         if not columns:
             columns = df.select_dtypes(include=[np.number]).columns.tolist()  # Default to numeric columns
         
+        # sklearn takes about a second to import, so it is loaded on first use
+        from sklearn.cluster import kmeans_plusplus
+        from sklearn.metrics import silhouette_score
+        from sklearn.preprocessing import StandardScaler
+        
         scaler = StandardScaler()
         data_scaled = scaler.fit_transform(df[columns])
+        mini_batch = len(data_scaled) > mini_batch_threshold
+        
+        ks = sorted(set(k_range)) if k_range else [n_clusters]
+        ks = [k for k in ks if 1 <= k <= len(data_scaled)] or [min(n_clusters, len(data_scaled))]
+        
+        # One k-means++ seeding for the largest k; its first k centers seed every smaller k
+        rng = np.random.default_rng(42)
+        seed_rows = data_scaled
+        if len(data_scaled) > silhouette_sample:
+            seed_rows = data_scaled[rng.choice(len(data_scaled), silhouette_sample, replace=False)]
+        seeds, _ = kmeans_plusplus(seed_rows, n_clusters=max(ks), random_state=42)
         
-        kmeans = KMeans(n_clusters=n_clusters, random_state=42)
-        clusters = kmeans.fit_predict(data_scaled)
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            models = dict(zip(ks, pool.map(
+                lambda k: AnalysisTools._fit_kmeans(data_scaled, seeds[:k], mini_batch, batch_size),
+                ks
+            )))
         
+        scores = {k: {'inertia': float(model.inertia_)} for k, model in models.items()}
+        if len(ks) == 1:
+            best_k = ks[0]
+        elif selection == "silhouette" and any(k > 1 for k in ks):
+            sample = min(silhouette_sample, len(data_scaled))
+            candidates = [k for k in ks if k > 1]
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                silhouettes = pool.map(
+                    lambda k: silhouette_score(data_scaled, models[k].labels_, sample_size=sample, random_state=42),
+                    candidates
+                )
+                for k, score in zip(candidates, silhouettes):
+                    scores[k]['silhouette'] = float(score)
+            best_k = max(candidates, key=lambda k: scores[k]['silhouette'])
+        else:
+            best_k = AnalysisTools._elbow(ks, [scores[k]['inertia'] for k in ks])
+        
+        kmeans = models[best_k]
+        labels = kmeans.labels_.astype(np.min_scalar_type(max(best_k - 1, 0)))
         cluster_centers = scaler.inverse_transform(kmeans.cluster_centers_)
+        sizes = np.bincount(labels, minlength=best_k)
         
         results = {
-            'clusters': clusters.tolist(),
+            'n_clusters': best_k,
+            'algorithm': 'minibatch_kmeans' if mini_batch else 'kmeans',
             'cluster_centers': {f'cluster_{i}': dict(zip(columns, centers)) for i, centers in enumerate(cluster_centers)},
+            'cluster_sizes': {f'cluster_{i}': int(size) for i, size in enumerate(sizes)},
             'inertia': kmeans.inertia_
         }
+        if len(ks) > 1:
+            results['k_selection'] = {'method': selection, 'scores': {str(k): scores[k] for k in ks}}
+        
+        if labels_path:
+            Path(labels_path).parent.mkdir(parents=True, exist_ok=True)
+            np.save(labels_path, labels)
+            results['labels_path'] = str(labels_path)
+            results['labels_dtype'] = str(labels.dtype)
+        else:
+            results['labels'] = labels
+        
+        return results
+
+    @staticmethod
+    def _period_starts(days: np.ndarray, frequency: str) -> np.ndarray:
+        """Label each day with the first day of its daily, weekly (Monday) or monthly period."""
+        if frequency == "daily":
+            return days
+        if frequency == "weekly":
+            # 1970-01-01 was a Thursday, so (day + 3) % 7 is the weekday with Monday = 0
+            return days - ((days.astype(np.int64) + 3) % 7).astype("timedelta64[D]")
+        if frequency == "monthly":
+            return days.astype("datetime64[M]").astype("datetime64[D]")
+        raise ValueError(f"Unsupported frequency: {frequency}")
+
+    @staticmethod
+    def _rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+        """Trailing mean along the last axis, NaN until a full window is available."""
+        result = np.full(values.shape, np.nan)
+        if window < 1 or values.shape[-1] < window:
+            return result
+        cumulative = np.cumsum(values, axis=-1)
+        cumulative = np.concatenate([np.zeros(values.shape[:-1] + (1,)), cumulative], axis=-1)
+        result[..., window - 1:] = (cumulative[..., window:] - cumulative[..., :-window]) / window
+        return result
+
+    @staticmethod
+    def _growth_rate(values: np.ndarray) -> np.ndarray:
+        """Period-over-period relative change along the last axis, NaN where the base is zero."""
+        result = np.full(values.shape, np.nan)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            result[..., 1:] = np.diff(values, axis=-1) / values[..., :-1]
+        result[~np.isfinite(result)] = np.nan
+        return result
+
+    @staticmethod
+    def timeseries_analysis(
+        df: pd.DataFrame,
+        date_column: str = "Tanggal",
+        value_column: str = "Jumlah",
+        group_columns: List[str] = None,
+        frequencies: Sequence[str] = ("daily", "weekly", "monthly"),
+        rolling_windows: Dict[str, int] = None,
+        weights: np.ndarray = None
+    ) -> Dict[str, Any]:
+        """Totals and counts of ``value_column`` per day, week and month, overall and per group.
+        
+        Rows are binned once into a (day x observed group combination) table
+        with ``np.bincount``; weekly and monthly totals and the per-column
+        breakdowns are sums over that table, so no step loops over periods or
+        rows. Every series is a dense array over the full period range.
+        Per-row ``weights`` (e.g. sample weights) scale totals and counts to
+        population estimates.
+        """
+        group_columns = [col for col in (group_columns or []) if col in df.columns]
+        rolling_windows = rolling_windows or {}
+        
+        dates = df[date_column]
+        if getattr(dates.dt, "tz", None) is not None:
+            dates = dates.dt.tz_localize(None)
+        values = df[value_column].to_numpy(dtype=np.float64, na_value=np.nan)
+        valid = dates.notna().to_numpy() & ~np.isnan(values)
+        if not valid.any():
+            return {}
+        
+        days = dates.to_numpy()[valid].astype("datetime64[D]")
+        values = values[valid]
+        row_weights = None if weights is None else np.asarray(weights, dtype=np.float64)[valid]
+        first_day, last_day = days.min(), days.max()
+        day_index = (days - first_day).astype(np.int64)
+        n_days = int(day_index.max()) + 1
+        
+        # One code per observed combination of group values
+        group_codes = []
+        for col in group_columns:
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                codes, labels = df[col].cat.codes.to_numpy()[valid].astype(np.int64), df[col].cat.categories
+            else:
+                codes, labels = pd.factorize(df[col].to_numpy()[valid], sort=True)
+            group_codes.append((codes, labels))
+        if group_codes:
+            combined = np.zeros(len(values), dtype=np.int64)
+            for codes, labels in group_codes:
+                combined = combined * (len(labels) + 1) + (codes + 1)
+            combo, combo_keys = pd.factorize(combined)
+        else:
+            combo, combo_keys = np.zeros(len(values), dtype=np.int64), np.zeros(1, dtype=np.int64)
+        n_combos = len(combo_keys)
+        
+        key = day_index * n_combos + combo
+        if row_weights is None:
+            daily_sum = np.bincount(key, weights=values, minlength=n_days * n_combos).reshape(n_days, n_combos)
+            daily_count = np.bincount(key, minlength=n_days * n_combos).reshape(n_days, n_combos)
+        else:
+            daily_sum = np.bincount(key, weights=values * row_weights, minlength=n_days * n_combos).reshape(n_days, n_combos)
+            daily_count = np.bincount(key, weights=row_weights, minlength=n_days * n_combos).reshape(n_days, n_combos)
+        
+        # Map each combination back to the code of every group column for the marginal sums
+        combo_members = {}
+        for col, (codes, labels) in zip(group_columns, group_codes):
+            member = np.empty(n_combos, dtype=np.int64)
+            member[combo] = codes
+            combo_members[col] = (member, labels)
+        
+        all_days = first_day + np.arange(n_days).astype("timedelta64[D]")
+        results = {
+            'date_column': date_column,
+            'value_column': value_column,
+            'start': str(first_day),
+            'end': str(last_day)
+        }
+        
+        for frequency in frequencies:
+            starts = AnalysisTools._period_starts(all_days, frequency)
+            boundaries = np.flatnonzero(np.r_[True, starts[1:] != starts[:-1]])
+            sums = np.add.reduceat(daily_sum, boundaries, axis=0)
+            counts = np.add.reduceat(daily_count, boundaries, axis=0)
+            window = rolling_windows.get(frequency, 0)
+            
+            def series(period_sums: np.ndarray, period_counts: np.ndarray) -> Dict[str, np.ndarray]:
+                return {
+                    'sum': period_sums,
+                    # Weighted counts are estimates; round them to whole rows
+                    'count': pd.to_numeric(np.rint(period_counts).astype(np.int64).ravel(), downcast="unsigned").reshape(period_counts.shape),
+                    'rolling_mean': AnalysisTools._rolling_mean(period_sums, window),
+                    'growth_rate': AnalysisTools._growth_rate(period_sums)
+                }
+            
+            frequency_results = {
+                'periods': np.datetime_as_string(starts[boundaries], unit="D"),
+                'rolling_window': window,
+                'total': series(sums.sum(axis=1), counts.sum(axis=1))
+            }
+            
+            by_group = {}
+            for col, (member, labels) in combo_members.items():
+                # (periods x combos) @ (combos x labels) gives the per-label totals of every period
+                # Missing values (code -1) land in an extra last column that is dropped
+                indicator = np.zeros((n_combos, len(labels) + 1))
+                indicator[np.arange(n_combos), member] = 1
+                indicator = indicator[:, :-1]
+                group_result = series((sums @ indicator).T, (counts @ indicator).T)
+                group_result['labels'] = [str(label) for label in labels]
+                by_group[col] = group_result
+            if by_group:
+                frequency_results['by_group'] = by_group
+            
+            results[frequency] = frequency_results
+        
+        return results
+
+    @staticmethod
+    def segment_codes(values: pd.Series, max_segments: int = 10) -> Tuple[np.ndarray, List[str]]:
+        """Code rows by their most frequent values, folding the rest into an ``other`` bucket.
+        
+        Missing values get code -1 and belong to no segment.
+        """
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            codes, labels = values.cat.codes.to_numpy().astype(np.int64), values.cat.categories
+        else:
+            codes, labels = pd.factorize(values.to_numpy(), sort=True)
+        counts = np.bincount(codes[codes >= 0], minlength=len(labels))
+        
+        # Most frequent first, ties in label order
+        ranked = np.argsort(-counts, kind="stable")
+        ranked = ranked[counts[ranked] > 0]
+        top = ranked[:max_segments]
+        has_other = len(ranked) > len(top)
+        
+        remap = np.full(len(labels) + 1, -1, dtype=np.int64)
+        if has_other:
+            remap[ranked[max_segments:]] = len(top)
+        remap[top] = np.arange(len(top))
+        segment_labels = [str(labels[i]) for i in top] + ([OTHER_SEGMENT] if has_other else [])
+        # Index -1 (missing) reads the trailing -1 slot
+        return remap[codes], segment_labels
+
+    @staticmethod
+    def segmented_analysis(
+        df: pd.DataFrame,
+        segment_columns: List[str],
+        value_columns: List[str],
+        max_segments: int = 10,
+        cluster_labels: Optional[np.ndarray] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """Descriptive, correlation and cluster breakdowns per segment of each categorical column.
+        
+        Rows are sorted once by segment so every segment is a contiguous
+        block that is summarized by the same moment kernels as the whole
+        dataset. Output is columnar: each statistic is a list aligned with
+        ``segments``.
+        """
+        values = df[value_columns].to_numpy(dtype=np.float64, na_value=np.nan)
+        pairs = [(a, b) for i, a in enumerate(value_columns) for b in value_columns[i + 1:]]
+        n_clusters = int(cluster_labels.max()) + 1 if cluster_labels is not None and len(cluster_labels) else 0
+        results = {}
+        
+        for segment_column in segment_columns:
+            if segment_column not in df.columns:
+                continue
+            codes, labels = AnalysisTools.segment_codes(df[segment_column], max_segments)
+            order = np.argsort(codes, kind="stable")
+            order = order[codes[order] >= 0]
+            bounds = np.searchsorted(codes[order], np.arange(len(labels) + 1))
+            grouped = np.asfortranarray(values[order])
+            grouped_labels = cluster_labels[order] if n_clusters else None
+            
+            descriptive = {col: {} for col in value_columns}
+            correlation = {f'{a} ~ {b}': [] for a, b in pairs}
+            cluster_sizes = {f'cluster_{c}': [] for c in range(n_clusters)}
+            for start, end in zip(bounds[:-1], bounds[1:]):
+                block = grouped[start:end]
+                medians = np.nanmedian(block, axis=0) if len(block) else np.full(len(value_columns), np.nan)
+                stats = MomentStats.from_array(block, value_columns).to_stats(medians)
+                for col, col_stats in stats.items():
+                    for stat, value in col_stats.items():
+                        descriptive[col].setdefault(stat, []).append(value)
+                
+                corr = CoMomentStats.from_array(block, value_columns).correlation()
+                for a, b in pairs:
+                    correlation[f'{a} ~ {b}'].append(float(corr.loc[a, b]))
+                
+                if n_clusters:
+                    sizes = np.bincount(grouped_labels[start:end], minlength=n_clusters)
+                    for c in range(n_clusters):
+                        cluster_sizes[f'cluster_{c}'].append(int(sizes[c]))
+            
+            segment_results = {
+                'segments': labels,
+                'count': np.diff(bounds),
+                'descriptive': descriptive,
+                'correlation': correlation
+            }
+            if n_clusters:
+                segment_results['cluster_sizes'] = cluster_sizes
+            results[segment_column] = segment_results
+        
+        return results
+
+    @staticmethod
+    def approximate_sketches(
+        df: pd.DataFrame,
+        distinct_columns: List[str] = (),
+        frequency_columns: List[str] = (),
+        quantile_columns: List[str] = (),
+        hll_precision: int = 14,
+        cms_width: int = 2048,
+        cms_depth: int = 5,
+        cms_capacity: int = 100,
+        kll_k: int = 200
+    ) -> Dict[str, Dict[str, Any]]:
+        """Build distinct-count, frequency and quantile sketches for one chunk or partition."""
+        return {
+            'distinct': {
+                col: HyperLogLog(hll_precision).update(df[col]) for col in distinct_columns if col in df.columns
+            },
+            'frequency': {
+                col: CountMinSketch(cms_width, cms_depth, cms_capacity).update(df[col])
+                for col in frequency_columns if col in df.columns
+            },
+            'quantiles': {
+                col: QuantileSketch(kll_k).update(df[col].to_numpy(dtype=np.float64, na_value=np.nan))
+                for col in quantile_columns if col in df.columns
+            },
+            'rows': len(df)
+        }
+
+    @staticmethod
+    def merge_sketches(merged: Optional[Dict[str, Any]], sketches: Dict[str, Any]) -> Dict[str, Any]:
+        """Fold the sketches of another chunk, increment or worker into ``merged``."""
+        if merged is None:
+            return sketches
+        for kind in ('distinct', 'frequency', 'quantiles'):
+            for col, sketch in sketches[kind].items():
+                if col in merged[kind]:
+                    merged[kind][col].merge(sketch)
+                else:
+                    merged[kind][col] = sketch
+        merged['rows'] += sketches['rows']
+        return merged
+
+    @staticmethod
+    def save_sketches(sketches: Dict[str, Any], path: str) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        data = {kind: {col: sketch.to_dict() for col, sketch in sketches[kind].items()} for kind in ('distinct', 'frequency', 'quantiles')}
+        data['rows'] = sketches['rows']
+        with open(path, 'w') as f:
+            json.dump(data, f)
+
+    @staticmethod
+    def load_sketches(path: str) -> Dict[str, Any]:
+        """Read sketches saved next to earlier results, e.g. to merge in a new increment."""
+        with open(path, 'r') as f:
+            data = json.load(f)
+        return {
+            'distinct': {col: HyperLogLog.from_dict(d) for col, d in data['distinct'].items()},
+            'frequency': {col: CountMinSketch.from_dict(d) for col, d in data['frequency'].items()},
+            'quantiles': {col: QuantileSketch.from_dict(d) for col, d in data['quantiles'].items()},
+            'rows': data['rows']
+        }
+
+    @staticmethod
+    def approximate_summary(
+        sketches: Dict[str, Any],
+        quantiles: Sequence[float] = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99),
+        top_k: int = 10
+    ) -> Dict[str, Any]:
+        """Estimates with their error bounds from merged sketches."""
+        distinct = {}
+        for col, sketch in sketches['distinct'].items():
+            estimate = sketch.estimate()
+            # 95% interval from the relative standard error
+            margin = 1.96 * sketch.relative_error * estimate
+            distinct[col] = {
+                'estimate': estimate,
+                'lower': max(estimate - margin, 0.0),
+                'upper': estimate + margin,
+                'relative_standard_error': sketch.relative_error,
+                'confidence': 0.95
+            }
+        
+        top_values = {}
+        for col, sketch in sketches['frequency'].items():
+            hitters = sketch.heavy_hitters(top_k)
+            top_values[col] = {
+                'values': [value for value, _ in hitters],
+                'counts': [count for _, count in hitters],
+                'max_overcount': sketch.error_bound,
+                'confidence': sketch.confidence
+            }
+        
+        quantile_results = {}
+        for col, sketch in sketches['quantiles'].items():
+            quantile_results[col] = {
+                'count': sketch.count,
+                'quantiles': dict(zip([str(q) for q in quantiles], sketch.quantiles(quantiles))),
+                'median': sketch.quantile(0.5),
+                'rank_error': sketch.rank_error()
+            }
+        
+        return {
+            'rows': sketches['rows'],
+            'distinct': distinct,
+            'top_values': top_values,
+            'quantiles': quantile_results
+        }
+
+    @staticmethod
+    def approximate_analysis_chunked(
+        chunks,
+        sketches_path: str = None,
+        quantiles: Sequence[float] = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99),
+        top_k: int = 10,
+        **sketch_params
+    ) -> Dict[str, Any]:
+        """Sketch-based approximate analysis over an iterable of frames in constant memory.
+        
+        ``sketch_params`` are passed to ``approximate_sketches``. The merged
+        sketches are saved to ``sketches_path`` so later increments or other
+        workers can be merged in with ``load_sketches`` and ``merge_sketches``.
+        """
+        merged = None
+        for chunk in chunks:
+            merged = AnalysisTools.merge_sketches(merged, AnalysisTools.approximate_sketches(chunk, **sketch_params))
+        if merged is None:
+            return {}
         
+        results = AnalysisTools.approximate_summary(merged, quantiles, top_k)
+        if sketches_path:
+            AnalysisTools.save_sketches(merged, sketches_path)
+            results['sketches_path'] = str(sketches_path)
         return results
+
+    @staticmethod
+    def approximate_analysis(df: pd.DataFrame, chunksize: int = 1_000_000, **kwargs) -> Dict[str, Any]:
+        """Approximate analysis of an in-memory frame, sketched in row slices of ``chunksize``."""
+        chunks = (df.iloc[start:start + chunksize] for start in range(0, len(df), chunksize))
+        return AnalysisTools.approximate_analysis_chunked(chunks, **kwargs)
+
+    @staticmethod
+    def sample_estimates(df: pd.DataFrame, columns: List[str] = None, confidence: float = 0.95) -> Dict[str, Any]:
+        """Stratified estimates of population means and totals with confidence intervals.
+        
+        ``df`` is a sample from ``DataTools.stratified_sample``. Standard errors
+        use the stratified variance with finite population correction,
+        computed for all strata at once with ``np.bincount``.
+        """
+        if columns is None:
+            columns = DataTools.feature_columns(df)
+        info = df.attrs["sample"]
+        codes, populations, _ = DataTools.sample_strata(df)
+        n_strata = len(populations)
+        total = populations.sum()
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        
+        means = {}
+        totals = {}
+        for col in columns:
+            values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            present = ~np.isnan(values)
+            n_h = np.bincount(codes[present], minlength=n_strata).astype(np.float64)
+            sums = np.bincount(codes[present], weights=values[present], minlength=n_strata)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                stratum_means = sums / n_h
+                deviations = values[present] - stratum_means[codes[present]]
+                s2 = np.bincount(codes[present], weights=deviations ** 2, minlength=n_strata) / (n_h - 1)
+                variance_terms = (populations / total) ** 2 * (1 - n_h / populations) * s2 / n_h
+            # Strata with a single sampled row add no variance estimate
+            variance = float(np.nansum(np.where(n_h > 1, variance_terms, 0.0)))
+            observed = n_h > 0
+            mean = float(np.sum(populations[observed] * stratum_means[observed]) / populations[observed].sum())
+            se = np.sqrt(variance)
+            
+            means[col] = {'estimate': mean, 'standard_error': se, 'lower': mean - z * se, 'upper': mean + z * se}
+            totals[col] = {
+                'estimate': mean * total,
+                'standard_error': se * total,
+                'lower': (mean - z * se) * total,
+                'upper': (mean + z * se) * total
+            }
+        
+        return {
+            'confidence': confidence,
+            'population_rows': info['population_rows'],
+            'sample_rows': info['sample_rows'],
+            'strata_columns': info['strata_columns'],
+            'seed': info['seed'],
+            'means': means,
+            'totals': totals
+        }
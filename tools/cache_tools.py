@@ -0,0 +1,428 @@
+import pandas as pd
+import numpy as np
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import sys
+import time
+from typing import Dict, Any, Optional, List
+from pathlib import Path
+
+# Errors raised when reading a damaged cache file (Parquet raises ArrowInvalid, a ValueError)
+READ_ERRORS = (OSError, EOFError, ValueError, pickle.UnpicklingError)
+try:
+    from pyarrow import ArrowException
+    READ_ERRORS += (ArrowException,)
+except ImportError:
+    pass
+
+class DiskCache:
+    """Persistent, size-bounded LRU cache of values stored one file per key next to a JSON index.
+
+    The index also keeps hit and miss counters across runs. Lookups only
+    update the index in memory; it is written on ``put``, ``invalidate`` and
+    ``flush``. Subclasses pick the file format by overriding
+    ``_read``/``_write``; the default is pickle.
+    """
+
+    suffix = ".pkl"
+
+    def __init__(self, cache_dir: str, max_size_mb: float = 1024):
+        self.cache_dir = Path(cache_dir)
+        self.index_path = self.cache_dir / "index.json"
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.index = self._load_index()
+        self.dirty = False
+
+    def _load_index(self) -> Dict[str, Any]:
+        """Load the cache index, starting fresh if it is missing or corrupt."""
+        try:
+            with open(self.index_path, "r") as f:
+                index = json.load(f)
+            index.setdefault("entries", {})
+            index.setdefault("hashes", {})
+            index.setdefault("counters", {"hits": 0, "misses": 0})
+            return index
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"entries": {}, "hashes": {}, "counters": {"hits": 0, "misses": 0}}
+
+    def _save_index(self) -> None:
+        """Write the index atomically so an interrupted run cannot corrupt it."""
+        tmp_path = self.index_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self.index, f, indent=4)
+        os.replace(tmp_path, self.index_path)
+        self.dirty = False
+
+    def flush(self) -> None:
+        """Write access times and counters recorded by lookups since the last save."""
+        if self.dirty:
+            self._save_index()
+
+    def _read(self, path: Path) -> Any:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    def _write(self, path: Path, value: Any) -> None:
+        with open(path, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _miss(self) -> None:
+        self.index["counters"]["misses"] += 1
+        self.dirty = True
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for a key, or None on a miss; unreadable entries are evicted."""
+        entry = self.index["entries"].get(key)
+        if entry is None:
+            self._miss()
+            return None
+
+        path = self.cache_dir / entry["file"]
+        try:
+            value = self._read(path)
+        except READ_ERRORS as e:
+            if not isinstance(e, FileNotFoundError):
+                print(f"Evicting unreadable cache entry {path}: {e}")
+            self._remove(key)
+            self._miss()
+            return None
+
+        entry["last_access"] = time.time()
+        entry["hits"] = entry.get("hits", 0) + 1
+        self.index["counters"]["hits"] += 1
+        self.dirty = True
+        return value
+
+    def put(self, key: str, value: Any, source: str, suffix: Optional[str] = None) -> None:
+        """Store a value and evict least recently used entries over the size limit."""
+        file_name = f"{key}{suffix or self.suffix}"
+        path = self.cache_dir / file_name
+        self._write(path, value)
+
+        self.index["entries"][key] = {
+            "file": file_name,
+            "source": source,
+            "size": path.stat().st_size,
+            "created": time.time(),
+            "last_access": time.time(),
+            "hits": 0
+        }
+        self.evict()
+        self._save_index()
+
+    def evict(self) -> int:
+        """Evict least recently used entries until the cache fits in its size budget."""
+        entries = self.index["entries"]
+        total = sum(entry["size"] for entry in entries.values())
+        removed = 0
+
+        for key in sorted(entries, key=lambda k: entries[k]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            total -= entries[key]["size"]
+            self._remove(key)
+            removed += 1
+
+        if removed:
+            print(f"Evicted {removed} cache entries to stay under {self.max_bytes / (1024 * 1024):.0f} MB")
+        return removed
+
+    def invalidate(self, source: Optional[str] = None) -> int:
+        """Drop cached entries for one dataset, or every entry when no source is given."""
+        keys = [
+            key for key, entry in self.index["entries"].items()
+            if source is None or entry["source"] == source
+        ]
+        for key in keys:
+            self._remove(key)
+        if source is None:
+            self.index["hashes"] = {}
+
+        self._save_index()
+        print(f"Invalidated {len(keys)} entries in {self.cache_dir}")
+        return len(keys)
+
+    def _remove(self, key: str) -> None:
+        entry = self.index["entries"].pop(key)
+        try:
+            (self.cache_dir / entry["file"]).unlink()
+        except FileNotFoundError:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Summarize the cache contents and its hit rate."""
+        entries = self.index["entries"]
+        counters = self.index["counters"]
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            "entries": len(entries),
+            "size_mb": sum(entry["size"] for entry in entries.values()) / (1024 * 1024),
+            "max_size_mb": self.max_bytes / (1024 * 1024),
+            "hits": counters["hits"],
+            "misses": counters["misses"],
+            "hit_rate": counters["hits"] / lookups if lookups else None,
+            "sources": sorted({entry["source"] for entry in entries.values()})
+        }
+
+
+class PreprocessCache(DiskCache):
+    """Persistent, size-bounded LRU cache of preprocessed datasets.
+
+    Entries are keyed by the input file's content hash combined with the
+    preprocessing parameters and stored as Parquet files next to a JSON index.
+    """
+
+    suffix = ".parquet"
+
+    def __init__(self, cache_dir: str = "data/cache/preprocessed", max_size_mb: float = 1024):
+        super().__init__(cache_dir, max_size_mb)
+
+    def _read(self, path: Path) -> pd.DataFrame:
+        return pd.read_parquet(path)
+
+    def _write(self, path: Path, value: pd.DataFrame) -> None:
+        value.to_parquet(path, index=False)
+
+    def file_hash(self, file_path: str, chunk_size: int = 1 << 20) -> str:
+        """Hash a file's content, reusing the previous digest if size and mtime are unchanged."""
+        stat = os.stat(file_path)
+        memo = self.index["hashes"].get(str(file_path))
+        if memo and memo["size"] == stat.st_size and memo["mtime_ns"] == stat.st_mtime_ns:
+            return memo["digest"]
+
+        digest = hashlib.blake2b(digest_size=20)
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(chunk_size), b""):
+                digest.update(block)
+
+        self.index["hashes"][str(file_path)] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "digest": digest.hexdigest()
+        }
+        self.dirty = True
+        return digest.hexdigest()
+
+    def make_key(self, file_path: str, params: Dict[str, Any]) -> str:
+        """Combine the file content hash with the preprocessing parameters."""
+        payload = json.dumps(
+            {"content": self.file_hash(file_path), "params": params},
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=20).hexdigest()
+
+
+# Result entries that point at files written next to the results
+SIDECAR_KEYS = ("labels_path", "sketches_path")
+
+class AnalysisCache(DiskCache):
+    """Persistent, size-bounded LRU memo of analysis results.
+
+    Keys combine the dataset fingerprint, the analysis type, its parameters
+    and the analysis code version, so results are reused across runs until
+    any of them changes. Sidecar files a result points at are removed along
+    with its entry.
+    """
+
+    def __init__(self, cache_dir: str = "data/cache/analysis", max_size_mb: float = 256):
+        super().__init__(cache_dir, max_size_mb)
+
+    def put(self, key: str, value: Any, source: str, suffix: Optional[str] = None) -> None:
+        super().put(key, value, source, suffix)
+        sidecars = [
+            str(result[name]) for result in value.values() if isinstance(result, dict)
+            for name in SIDECAR_KEYS if name in result
+        ]
+        if sidecars and key in self.index["entries"]:
+            self.index["entries"][key]["sidecars"] = sidecars
+            self._save_index()
+
+    def _remove(self, key: str) -> None:
+        sidecars = self.index["entries"][key].get("sidecars", [])
+        super()._remove(key)
+        for path in sidecars:
+            try:
+                Path(path).unlink()
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def fingerprint(df: pd.DataFrame) -> str:
+        """Identify a frame's content: its preprocessing version when known, else a hash of the rows."""
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(json.dumps([list(map(str, df.columns)), list(map(str, df.dtypes)), len(df)]).encode("utf-8"))
+        # Samples of the same dataset differ by seed and size
+        digest.update(json.dumps(df.attrs.get("sample"), sort_keys=True, default=str).encode("utf-8"))
+        version = df.attrs.get("dataset_version")
+        if version is not None:
+            # Row filters keep attrs, so the columns and length above tell filtered views apart
+            digest.update(str(version).encode("utf-8"))
+        elif len(df.columns):
+            digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+        return digest.hexdigest()
+
+    def make_key(self, fingerprint: str, analysis_type: str, params: Dict[str, Any]) -> str:
+        payload = json.dumps(
+            {"dataset": fingerprint, "analysis": analysis_type, "params": params},
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=20).hexdigest()
+
+
+# Bump when plot rendering changes so stored images are redrawn
+PLOT_VERSION = 1
+
+class PlotStore(DiskCache):
+    """Content-addressed store of rendered plots with per-dataset, per-run namespaces.
+
+    Each image is stored once, keyed by a hash of the plot spec and of the
+    columns it reads. Each run links them (hard links, copies where
+    unsupported) into ``{output_dir}/{dataset}/{run_id}/`` and records the
+    links in the manifest, so ``collect`` can remove old run directories
+    and every image no kept run refers to. Runs that an existing HTML or
+    Markdown report links to are kept regardless of age.
+    """
+
+    def __init__(self, store_dir: str = "output/plot_store", max_size_mb: float = 512):
+        super().__init__(store_dir, max_size_mb)
+        # Plots are rendered here, then moved into the store
+        self.tmp_dir = self.cache_dir / "tmp"
+
+    def _load_index(self) -> Dict[str, Any]:
+        index = super()._load_index()
+        index.setdefault("runs", {})
+        return index
+
+    def _read(self, path: Path) -> Path:
+        if not path.exists():
+            raise FileNotFoundError(path)
+        return path
+
+    def _write(self, path: Path, value: str) -> None:
+        # The value is the freshly rendered file; move it into the store
+        os.replace(value, path)
+
+    @staticmethod
+    def _update(digest, value: Any) -> None:
+        if isinstance(value, dict):
+            for key in sorted(value, key=str):
+                digest.update(str(key).encode("utf-8"))
+                PlotStore._update(digest, value[key])
+        elif isinstance(value, (list, tuple)):
+            digest.update(f"[{len(value)}".encode("utf-8"))
+            for item in value:
+                PlotStore._update(digest, item)
+        elif isinstance(value, np.ndarray):
+            digest.update(f"{value.dtype.str}{value.shape}".encode("utf-8"))
+            digest.update(np.ascontiguousarray(value).tobytes())
+        elif isinstance(value, (pd.DataFrame, pd.Series)):
+            digest.update(AnalysisCache.fingerprint(value.to_frame() if isinstance(value, pd.Series) else value).encode("utf-8"))
+        else:
+            digest.update(repr(value).encode("utf-8"))
+
+    def make_key(self, spec: Dict[str, Any], data: pd.DataFrame) -> str:
+        """Hash the plot spec, including masks and aggregates, with a fingerprint of its input columns."""
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(str(PLOT_VERSION).encode("utf-8"))
+        self._update(digest, spec)
+        digest.update(AnalysisCache.fingerprint(data).encode("utf-8"))
+        return digest.hexdigest()
+
+    def put(self, key: str, value: str, source: str, suffix: Optional[str] = None) -> None:
+        super().put(key, value, source, suffix or Path(value).suffix)
+
+    def link(self, key: str, run_id: str, dataset: str, name: str, output_dir: str = "output/visualizations") -> str:
+        """Expose a stored image as ``{output_dir}/{dataset}/{run_id}/{name}`` and record it in the manifest.
+
+        The manifest is written by the next ``put`` or ``flush``.
+        """
+        source = self.cache_dir / self.index["entries"][key]["file"]
+        target = Path(output_dir) / dataset / run_id / name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if target.exists():
+            target.unlink()
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copy2(source, target)
+
+        run = self.index["runs"].setdefault(run_id, {"created": time.time(), "datasets": {}})
+        run["datasets"].setdefault(dataset, {})[str(target)] = key
+        self.dirty = True
+        return str(target)
+
+    def retain(self, reports: Dict[str, List[str]]) -> int:
+        """Keep the runs holding each report's linked files for as long as that report exists."""
+        retained = 0
+        for run in self.index["runs"].values():
+            run_dirs = {Path(file).parent for files in run["datasets"].values() for file in files}
+            for report_path, files in reports.items():
+                if run_dirs & {Path(file).parent for file in files} and report_path not in run.setdefault("reports", []):
+                    run["reports"].append(report_path)
+                    retained += 1
+        if retained:
+            self._save_index()
+        return retained
+
+    def collect(self, keep_runs: int = 3) -> Dict[str, int]:
+        """Remove all but the newest ``keep_runs`` runs, then every image none of them references.
+
+        Older runs still linked from a report that exists are kept.
+        """
+        runs = self.index["runs"]
+        for run in runs.values():
+            if "reports" in run:
+                run["reports"] = [report for report in run["reports"] if Path(report).exists()]
+        oldest = sorted(runs, key=lambda run_id: runs[run_id]["created"])[:max(len(runs) - keep_runs, 0)]
+        expired = [run_id for run_id in oldest if not runs[run_id].get("reports")]
+        for run_id in expired:
+            for files in runs.pop(run_id)["datasets"].values():
+                # The run directory also holds files built from the links, such as dashboards
+                for run_dir in {Path(file).parent for file in files}:
+                    shutil.rmtree(run_dir, ignore_errors=True)
+
+        referenced = {key for run in runs.values() for files in run["datasets"].values() for key in files.values()}
+        unreferenced = [key for key in self.index["entries"] if key not in referenced]
+        for key in unreferenced:
+            self._remove(key)
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+        self._save_index()
+        print(
+            f"Plot store: removed {len(expired)} runs and {len(unreferenced)} unreferenced images, "
+            f"kept {len(oldest) - len(expired)} older runs linked from reports"
+        )
+        return {"runs": len(expired), "images": len(unreferenced), "retained": len(oldest) - len(expired)}
+
+
+if __name__ == "__main__":
+    # Usage: python -m tools.cache_tools invalidate [dataset ...]
+    #        python -m tools.cache_tools stats
+    #        python -m tools.cache_tools gc [keep_runs]
+    from config.pipeline_config import get_pipeline_config
+
+    config = get_pipeline_config()
+    caches = {
+        "preprocess": PreprocessCache(config["cache"]["cache_dir"], config["cache"]["max_size_mb"]),
+        "analysis": AnalysisCache(config["analysis_cache"]["cache_dir"], config["analysis_cache"]["max_size_mb"]),
+        "plots": PlotStore(config["plot_store"]["store_dir"], config["plot_store"]["max_size_mb"])
+    }
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+
+    if command == "invalidate":
+        for cache in caches.values():
+            for source in sys.argv[2:] or [None]:
+                cache.invalidate(source)
+    elif command == "gc":
+        caches["plots"].collect(int(sys.argv[2]) if len(sys.argv) > 2 else config["plot_store"]["keep_runs"])
+    elif command == "stats":
+        print(json.dumps({name: cache.stats() for name, cache in caches.items()}, indent=4))
+    else:
+        print(f"Unknown command: {command}")
+        sys.exit(1)
@@ -0,0 +1,137 @@
+import pandas as pd
+import numpy as np
+import hashlib
+import json
+import re
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are still atomic per write, just not serialized
+    fcntl = None
+
+class CategoryCodebook:
+    """Persistent, append-only mapping from category values to integer codes.
+
+    Each column's codebook is a JSON-lines file where the code of a value is
+    its line number, so codes never change once assigned and encoded shards
+    from different files, chunks or worker processes can be concatenated
+    directly. Appends take an exclusive file lock and first pick up values
+    appended by other processes. Without a ``codebook_dir`` the codebook
+    lives only in memory.
+    """
+
+    def __init__(self, codebook_dir: Optional[str] = "data/codebook"):
+        self.codebook_dir = Path(codebook_dir) if codebook_dir else None
+        if self.codebook_dir:
+            self.codebook_dir.mkdir(parents=True, exist_ok=True)
+        # Per column: sorted-by-age list of Index segments, their total size and the file offset read so far
+        self._segments: Dict[str, List[pd.Index]] = {}
+        self._sizes: Dict[str, int] = {}
+        self._offsets: Dict[str, int] = {}
+
+    def _path(self, column: str) -> Path:
+        safe_name = re.sub(r"[^\w.-]+", "_", column)
+        digest = hashlib.blake2b(column.encode("utf-8"), digest_size=4).hexdigest()
+        return self.codebook_dir / f"{safe_name}-{digest}.jsonl"
+
+    @contextmanager
+    def _locked(self, column: str):
+        if self.codebook_dir is None or fcntl is None:
+            yield
+            return
+        with open(self._path(column).with_suffix(".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _add_segment(self, column: str, values: List) -> None:
+        if not values:
+            return
+        segments = self._segments.setdefault(column, [])
+        segments.append(pd.Index(values, dtype=object))
+        self._sizes[column] = self._sizes.get(column, 0) + len(values)
+        # Merge segments geometrically so lookups probe only a few hash tables
+        while len(segments) > 1 and len(segments[-2]) <= 2 * len(segments[-1]):
+            last = segments.pop()
+            segments[-1] = segments[-1].append(last)
+
+    def _refresh(self, column: str) -> None:
+        """Read values appended to the file since the last refresh."""
+        if self.codebook_dir is None:
+            return
+        path = self._path(column)
+        if not path.exists():
+            return
+        with open(path, "rb") as f:
+            f.seek(self._offsets.get(column, 0))
+            data = f.read()
+        data = data[:data.rfind(b"\n") + 1]
+        if data:
+            self._add_segment(column, [json.loads(line) for line in data.splitlines()])
+            self._offsets[column] = self._offsets.get(column, 0) + len(data)
+
+    def size(self, column: str) -> int:
+        self._refresh(column)
+        return self._sizes.get(column, 0)
+
+    def values(self, column: str) -> pd.Index:
+        """All known values of a column, in code order."""
+        self._refresh(column)
+        segments = self._segments.get(column, [])
+        if not segments:
+            return pd.Index([], dtype=object)
+        return segments[0].append(segments[1:]) if len(segments) > 1 else segments[0]
+
+    def _lookup(self, column: str, values: pd.Index) -> np.ndarray:
+        codes = np.full(len(values), -1, dtype=np.int64)
+        base = 0
+        for segment in self._segments.get(column, []):
+            found = segment.get_indexer(values)
+            hit = (found >= 0) & (codes < 0)
+            codes[hit] = found[hit] + base
+            base += len(segment)
+        return codes
+
+    def _append(self, column: str, new_values: List) -> None:
+        with self._locked(column):
+            self._refresh(column)
+            # Another process may have added some of these values meanwhile
+            pending = pd.Index(new_values, dtype=object)
+            pending = pending[self._lookup(column, pending) < 0]
+            if len(pending) == 0:
+                return
+            if self.codebook_dir is not None:
+                lines = "".join(
+                    json.dumps(value.item() if isinstance(value, np.generic) else value) + "\n"
+                    for value in pending
+                )
+                with open(self._path(column), "a", encoding="utf-8") as f:
+                    f.write(lines)
+                self._offsets[column] = self._offsets.get(column, 0) + len(lines.encode("utf-8"))
+            self._add_segment(column, pending.tolist())
+
+    def encode(self, values: pd.Series, column: Optional[str] = None) -> np.ndarray:
+        """Map values to their stable codes, appending unseen values. Missing values get -1."""
+        column = column or values.name
+        self._refresh(column)
+
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Look up only the categories, then gather through the category codes
+            local_codes = values.cat.codes.to_numpy()
+            uniques = pd.Index(values.cat.categories, dtype=object)
+        else:
+            local_codes, uniques = pd.factorize(values)
+            uniques = pd.Index(uniques, dtype=object)
+
+        lookup = self._lookup(column, uniques)
+        if (lookup < 0).any():
+            self._append(column, uniques[lookup < 0].tolist())
+            lookup = self._lookup(column, uniques)
+        codes = np.where(local_codes >= 0, lookup[local_codes] if len(lookup) else -1, -1)
+
+        return pd.to_numeric(codes, downcast="integer")
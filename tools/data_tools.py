@@ -1,22 +1,303 @@
 import pandas as pd
 import numpy as np
-from typing import List, Dict
+import os
+import io
+import json
+import hashlib
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple, Iterator
 from pathlib import Path
+from tools.sketch_tools import QuantileSketch
+from tools.codebook_tools import CategoryCodebook
+
+# Per-row bitmask column written by detect_outliers and preprocess_chunked; frames with
+# more than OUTLIER_MASK_WORD_BITS numeric columns add outlier_mask_1, outlier_mask_2, ...
+OUTLIER_MASK_COLUMN = "outlier_mask"
+OUTLIER_MASK_WORD_BITS = 64
+
+# Bump whenever the layout of preprocess_incremental's state changes; older states are rebuilt
+INCREMENTAL_STATE_VERSION = 3
+
+class PreprocessStats:
+    """Mergeable column statistics for chunked preprocessing.
+    
+    Numeric columns keep a quantile sketch (medians and IQR bounds),
+    categorical columns keep value counts (modes). Both can be merged across
+    chunks or workers and serialized to JSON.
+    """
+    
+    def __init__(self, max_categories: int = 10000, sketch_k: int = 200):
+        self.max_categories = max_categories
+        self.sketch_k = sketch_k
+        self.rows = 0
+        self.numeric: Dict[str, QuantileSketch] = {}
+        self.sums: Dict[str, float] = {}
+        self.sq_sums: Dict[str, float] = {}
+        self.value_counts: Dict[str, pd.Series] = {}
+        
+    def update(self, chunk: pd.DataFrame) -> "PreprocessStats":
+        """Fold one chunk of raw rows into the statistics."""
+        self.rows += len(chunk)
+        
+        for col in chunk.select_dtypes(include=[np.number]).columns:
+            sketch = self.numeric.setdefault(col, QuantileSketch(k=self.sketch_k))
+            values = chunk[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            sketch.update(values)
+            self.sums[col] = self.sums.get(col, 0.0) + float(np.nansum(values))
+            self.sq_sums[col] = self.sq_sums.get(col, 0.0) + float(np.nansum(values * values))
+            
+        for col in chunk.select_dtypes(include=['object', 'category']).columns:
+            counts = chunk[col].value_counts()
+            self._add_counts(col, counts[counts > 0])
+            
+        return self
+        
+    def merge(self, other: "PreprocessStats") -> "PreprocessStats":
+        """Fold statistics gathered elsewhere into this object."""
+        self.rows += other.rows
+        for col, sketch in other.numeric.items():
+            self.numeric.setdefault(col, QuantileSketch(k=self.sketch_k)).merge(sketch)
+        for col, total in other.sums.items():
+            self.sums[col] = self.sums.get(col, 0.0) + total
+        for col, total in other.sq_sums.items():
+            self.sq_sums[col] = self.sq_sums.get(col, 0.0) + total
+        for col, counts in other.value_counts.items():
+            self._add_counts(col, counts)
+        return self
+        
+    def _add_counts(self, col: str, counts: pd.Series) -> None:
+        counts = counts.astype(np.int64)
+        counts.index = counts.index.astype(object)
+        if col in self.value_counts:
+            counts = self.value_counts[col].add(counts, fill_value=0).astype(np.int64)
+        # Keep only the most frequent values so high-cardinality columns stay bounded;
+        # the mode is then approximate, as in a heavy-hitters summary
+        if len(counts) > self.max_categories:
+            counts = counts.nlargest(self.max_categories)
+        self.value_counts[col] = counts
+        
+    def counts(self) -> Dict[str, int]:
+        """Non-missing values seen per numeric column."""
+        return {col: sketch.count for col, sketch in self.numeric.items()}
+        
+    def means(self) -> Dict[str, float]:
+        return {
+            col: self.sums[col] / sketch.count if sketch.count else np.nan
+            for col, sketch in self.numeric.items()
+        }
+        
+    def medians(self) -> Dict[str, float]:
+        return {col: sketch.quantile(0.5) for col, sketch in self.numeric.items()}
+        
+    def modes(self) -> Dict[str, Any]:
+        modes = {}
+        for col, counts in self.value_counts.items():
+            if len(counts):
+                top = counts[counts == counts.max()]
+                modes[col] = sorted(top.index, key=str)[0]
+        return modes
+        
+    def iqr_bounds(self, multiplier: float = 1.5) -> Dict[str, Tuple[float, float]]:
+        bounds = {}
+        for col, sketch in self.numeric.items():
+            q1, q3 = sketch.quantiles([0.25, 0.75])
+            iqr = q3 - q1
+            bounds[col] = (q1 - multiplier * iqr, q3 + multiplier * iqr)
+        return bounds
+        
+    def mad_bounds(self, threshold: float = 3.5) -> Dict[str, Tuple[float, float]]:
+        """Median ± ``threshold`` MAD / 0.6745 (modified z-score), from the sketches."""
+        bounds = {}
+        for col, sketch in self.numeric.items():
+            median = sketch.quantile(0.5)
+            spread = sketch.median_absolute_deviation(median) / 0.6745
+            bounds[col] = (median - threshold * spread, median + threshold * spread)
+        return bounds
+        
+    def outlier_bounds(self, method: str = "iqr", threshold: Optional[float] = None) -> Dict[str, Tuple[float, float]]:
+        """Bounds per numeric column with the same rules and defaults as ``DataTools.outlier_bounds``."""
+        if method == "iqr":
+            return self.iqr_bounds(1.5 if threshold is None else threshold)
+        elif method == "zscore":
+            return self.zscore_bounds(3.0 if threshold is None else threshold)
+        elif method == "mad":
+            return self.mad_bounds(3.5 if threshold is None else threshold)
+        raise ValueError(f"Unknown outlier method: {method}")
+        
+    def zscore_bounds(self, threshold: float = 3.0) -> Dict[str, Tuple[float, float]]:
+        """Mean ± ``threshold`` sample standard deviations, from the running sums."""
+        bounds = {}
+        means = self.means()
+        for col, sketch in self.numeric.items():
+            n = sketch.count
+            variance = (self.sq_sums.get(col, 0.0) - n * means[col] ** 2) / (n - 1) if n > 1 else np.nan
+            spread = np.sqrt(max(variance, 0.0))
+            bounds[col] = (means[col] - threshold * spread, means[col] + threshold * spread)
+        return bounds
+        
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "max_categories": self.max_categories,
+            "sketch_k": self.sketch_k,
+            "rows": self.rows,
+            "numeric": {col: sketch.to_dict() for col, sketch in self.numeric.items()},
+            "sums": self.sums,
+            "sq_sums": self.sq_sums,
+            "value_counts": {
+                col: {"values": counts.index.tolist(), "counts": counts.tolist()}
+                for col, counts in self.value_counts.items()
+            }
+        }
+        
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PreprocessStats":
+        stats = cls(max_categories=data["max_categories"], sketch_k=data["sketch_k"])
+        stats.rows = data["rows"]
+        stats.numeric = {col: QuantileSketch.from_dict(sketch) for col, sketch in data["numeric"].items()}
+        stats.sums = data.get("sums", {})
+        stats.sq_sums = data.get("sq_sums", {})
+        stats.value_counts = {
+            col: pd.Series(counts["counts"], index=pd.Index(counts["values"], dtype=object), dtype=np.int64)
+            for col, counts in data["value_counts"].items()
+        }
+        return stats
+
+
+class _SeenRows:
+    """Set of 64-bit row hashes kept as a few sorted runs for vectorized lookups.
+    
+    Memory is 8 bytes per distinct row, which is the only part of chunked
+    preprocessing that grows with the input.
+    """
+    
+    def __init__(self):
+        self.runs: List[np.ndarray] = []
+        
+    def filter_new(self, hashes: np.ndarray) -> np.ndarray:
+        """Return a mask of hashes not seen before (first occurrence only) and record them."""
+        mask = ~pd.Series(hashes).duplicated().to_numpy()
+        for run in self.runs:
+            positions = np.clip(np.searchsorted(run, hashes), 0, len(run) - 1)
+            mask &= run[positions] != hashes
+            
+        self.runs.append(np.sort(hashes[mask]))
+        # Merge runs geometrically so lookups touch O(log n) arrays
+        while len(self.runs) > 1 and len(self.runs[-2]) <= 2 * len(self.runs[-1]):
+            last = self.runs.pop()
+            self.runs[-1] = np.sort(np.concatenate([self.runs[-1], last]), kind="mergesort")
+        return mask
+
 
 class DataTools:
     @staticmethod
-    def load_csv_files(input_dir: str) -> Dict[str, pd.DataFrame]:
-        """Load all CSV files from the input directory."""
-        csv_files = list(Path(input_dir).glob("*.csv"))
-        dataframes = {}
+    def read_csv_file(
+        file_path: str,
+        schema: Optional[Dict[str, str]] = None,
+        engine: str = "c"
+    ) -> Tuple[pd.DataFrame, Dict[str, float]]:
+        """Read one CSV file with an explicit schema and measure its throughput."""
+        schema = schema or {}
+        header = pd.read_csv(file_path, nrows=0).columns
+        dtypes = {
+            col: dtype for col, dtype in schema.items()
+            if col in header and not str(dtype).startswith("datetime")
+        }
+        date_columns = [
+            col for col, dtype in schema.items()
+            if col in header and str(dtype).startswith("datetime")
+        ]
         
-        for file_path in csv_files:
+        start = time.perf_counter()
+        df = pd.read_csv(
+            file_path,
+            engine=engine,
+            dtype=dtypes or None,
+            parse_dates=date_columns or None
+        )
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        
+        size_mb = os.path.getsize(file_path) / (1024 * 1024)
+        stats = {
+            "rows": len(df),
+            "size_mb": size_mb,
+            "seconds": elapsed,
+            "rows_per_second": len(df) / elapsed,
+            "mb_per_second": size_mb / elapsed
+        }
+        
+        return df, stats
+
+    @staticmethod
+    def read_csv_files(
+        file_paths: List[Path],
+        schema: Optional[Dict[str, str]] = None,
+        engine: str = "c",
+        max_workers: Optional[int] = None,
+        executor: str = "thread",
+        stats: Optional[Dict[str, Dict[str, float]]] = None
+    ) -> Dict[str, pd.DataFrame]:
+        """Read CSV files concurrently in a worker pool.
+        
+        Per-file throughput is printed and, when a ``stats`` dict is given,
+        recorded into it keyed by dataset name.
+        """
+        if engine == "pyarrow":
             try:
-                df = pd.read_csv(file_path)
-                dataframes[file_path.stem] = df
-                print(f"Successfully loaded: {file_path}")
-            except Exception as e:
-                print(f"Error loading {file_path}: {str(e)}")
+                import pyarrow  # noqa: F401
+            except ImportError:
+                print("pyarrow is not installed, falling back to the C engine")
+                engine = "c"
+        
+        pool_class = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+        dataframes = {}
+        
+        start = time.perf_counter()
+        with pool_class(max_workers=max_workers) as pool:
+            futures = {
+                pool.submit(DataTools.read_csv_file, str(file_path), schema, engine): Path(file_path)
+                for file_path in file_paths
+            }
+            
+            for future, file_path in futures.items():
+                try:
+                    df, file_stats = future.result()
+                    dataframes[file_path.stem] = df
+                    if stats is not None:
+                        stats[file_path.stem] = file_stats
+                    print(
+                        f"Successfully loaded: {file_path} "
+                        f"({file_stats['rows']} rows, {file_stats['size_mb']:.2f} MB "
+                        f"in {file_stats['seconds']:.3f}s, {file_stats['mb_per_second']:.1f} MB/s)"
+                    )
+                except Exception as e:
+                    print(f"Error loading {file_path}: {str(e)}")
+        
+        if dataframes:
+            print(f"Loaded {len(dataframes)} files in {time.perf_counter() - start:.3f}s using the {engine} engine")
+        
+        return dataframes
+
+    @staticmethod
+    def load_csv_files(
+        input_dir: str,
+        schema: Optional[Dict[str, str]] = None,
+        engine: str = "c",
+        max_workers: Optional[int] = None,
+        executor: str = "thread",
+        stats: Optional[Dict[str, Dict[str, float]]] = None
+    ) -> Dict[str, pd.DataFrame]:
+        """Load all CSV files from the input directory."""
+        csv_files = sorted(Path(input_dir).glob("*.csv"))
+        dataframes = DataTools.read_csv_files(
+            csv_files,
+            schema=schema,
+            engine=engine,
+            max_workers=max_workers,
+            executor=executor,
+            stats=stats
+        )
         
         if not dataframes:
             print(f"No CSV files found in {input_dir}")
@@ -28,11 +309,12 @@ class DataTools:
         """Clean the dataframe by handling missing values and outliers."""
         # Handle missing values
         numeric_cols = df.select_dtypes(include=[np.number]).columns
-        categorical_cols = df.select_dtypes(include=['object']).columns
+        categorical_cols = df.select_dtypes(include=['object', 'category']).columns
         
         # Fill missing values
         df[numeric_cols] = df[numeric_cols].fillna(df[numeric_cols].median())
-        df[categorical_cols] = df[categorical_cols].fillna(df[categorical_cols].mode().iloc[0])
+        if len(categorical_cols):
+            df[categorical_cols] = df[categorical_cols].fillna(df[categorical_cols].mode().iloc[0])
         
         # Remove duplicates
         df_cleaned = df.drop_duplicates()
@@ -42,33 +324,683 @@ class DataTools:
         return df_cleaned
 
     @staticmethod
-    def detect_outliers(df: pd.DataFrame, columns: List[str]) -> Dict[str, List[int]]:
-        """Detect outliers using IQR method."""
-        outliers = {}
+    def outlier_mask_dtype(n_columns: int) -> np.dtype:
+        """Smallest unsigned integer type with one bit per column; wider masks use several uint64 words."""
+        for dtype in (np.uint8, np.uint16, np.uint32):
+            if n_columns <= np.iinfo(dtype).bits:
+                return np.dtype(dtype)
+        return np.dtype(np.uint64)
+
+    @staticmethod
+    def outlier_mask_columns(n_columns: int) -> List[str]:
+        """Mask column names for ``n_columns`` flagged columns: one word of 64 bits per column name."""
+        words = max(1, -(-n_columns // OUTLIER_MASK_WORD_BITS))
+        return [OUTLIER_MASK_COLUMN] + [f"{OUTLIER_MASK_COLUMN}_{word}" for word in range(1, words)]
+
+    @staticmethod
+    def is_outlier_mask_column(col: Any) -> bool:
+        """True for the bitmask word columns, which are bookkeeping rather than data."""
+        suffix = str(col)[len(OUTLIER_MASK_COLUMN) + 1:]
+        return col == OUTLIER_MASK_COLUMN or (str(col).startswith(f"{OUTLIER_MASK_COLUMN}_") and suffix.isdigit())
+
+    @staticmethod
+    def outlier_bounds(
+        values: np.ndarray,
+        method: str = "iqr",
+        threshold: Optional[float] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Lower and upper outlier bounds for every column of a 2-D array at once."""
+        if method == "iqr":
+            threshold = 1.5 if threshold is None else threshold
+            q1, q3 = np.nanquantile(values, [0.25, 0.75], axis=0)
+            spread = q3 - q1
+            return q1 - threshold * spread, q3 + threshold * spread
+        elif method == "zscore":
+            threshold = 3.0 if threshold is None else threshold
+            center = np.nanmean(values, axis=0)
+            spread = np.nanstd(values, axis=0, ddof=1)
+            return center - threshold * spread, center + threshold * spread
+        elif method == "mad":
+            # Modified z-score (Iglewicz & Hoaglin): 0.6745 * (x - median) / MAD
+            threshold = 3.5 if threshold is None else threshold
+            center = np.nanmedian(values, axis=0)
+            spread = np.nanmedian(np.abs(values - center), axis=0) / 0.6745
+            return center - threshold * spread, center + threshold * spread
+        raise ValueError(f"Unknown outlier method: {method}")
+
+    @staticmethod
+    def outlier_mask_from_bounds(values: np.ndarray, lower: np.ndarray, upper: np.ndarray) -> np.ndarray:
+        """Pack per-column out-of-bounds flags into integer words, shape (rows, words).
         
-        for col in columns:
-            if df[col].dtype in ['int64', 'float64']:
-                Q1 = df[col].quantile(0.25)
-                Q3 = df[col].quantile(0.75)
-                IQR = Q3 - Q1
-                outlier_indices = df[(df[col] < (Q1 - 1.5 * IQR)) | (df[col] > (Q3 + 1.5 * IQR))].index.tolist()
-                outliers[col] = outlier_indices
+        Bit ``i % 64`` of word ``i // 64`` is set when the row is out of bounds
+        in column ``i``; up to 64 columns fit in a single word.
+        """
+        n_columns = values.shape[1]
+        dtype = DataTools.outlier_mask_dtype(n_columns)
+        words = len(DataTools.outlier_mask_columns(n_columns))
+        mask = np.zeros((len(values), words), dtype=dtype)
+        if n_columns == 0:
+            return mask
+        
+        with np.errstate(invalid="ignore"):
+            flags = (values < lower) | (values > upper)
+        for word in range(words):
+            block = flags[:, word * OUTLIER_MASK_WORD_BITS:(word + 1) * OUTLIER_MASK_WORD_BITS]
+            bits = np.arange(block.shape[1], dtype=dtype)
+            mask[:, word] = np.bitwise_or.reduce(block.astype(dtype) << bits, axis=1)
+        return mask
+
+    @staticmethod
+    def set_outlier_mask(df: pd.DataFrame, mask: np.ndarray, outlier_columns: List[str]) -> pd.DataFrame:
+        """Append the mask words from ``outlier_mask_from_bounds`` as columns and record the flagged columns."""
+        for word, col in enumerate(DataTools.outlier_mask_columns(len(outlier_columns))):
+            df[col] = mask[:, word]
+        df.attrs["outlier_columns"] = list(outlier_columns)
+        return df
+
+    @staticmethod
+    def detect_outliers(
+        df: pd.DataFrame,
+        columns: List[str],
+        method: str = "iqr",
+        threshold: Optional[float] = None
+    ) -> pd.DataFrame:
+        """Detect outliers with the IQR, z-score or MAD rule.
+        
+        All columns are handled in one vectorized pass over the numeric block.
+        Returns the per-row bitmask columns named by ``outlier_mask_columns``:
+        bit ``i % 64`` of word ``i // 64`` is set when the row is an outlier in
+        ``columns[i]``.
+        """
+        columns = [col for col in columns if pd.api.types.is_numeric_dtype(df[col])]
+        values = df[columns].to_numpy(dtype=np.float64, na_value=np.nan)
+        
+        lower, upper = DataTools.outlier_bounds(values, method, threshold)
+        mask = DataTools.set_outlier_mask(
+            pd.DataFrame(index=df.index),
+            DataTools.outlier_mask_from_bounds(values, lower, upper),
+            columns
+        )
         
-        print(f"Outliers detected in {len(outliers)} columns")
+        print(f"Outliers detected in {len(columns)} columns ({method}): {int(mask.to_numpy().any(axis=1).sum())} rows flagged")
         
-        return outliers
+        return mask
+
+    @staticmethod
+    def outlier_rows(df: pd.DataFrame, columns: Optional[List[str]] = None) -> np.ndarray:
+        """Boolean row selector for rows flagged as outliers in any of ``columns`` (default all)."""
+        mask_columns = [col for col in df.columns if DataTools.is_outlier_mask_column(col)]
+        if not mask_columns:
+            return np.zeros(len(df), dtype=bool)
+        
+        if columns is None:
+            return df[mask_columns].to_numpy().any(axis=1)
+        
+        flagged = df.attrs.get("outlier_columns", [])
+        word_columns = DataTools.outlier_mask_columns(len(flagged))
+        selected: Dict[int, int] = {}
+        for col in columns:
+            if col in flagged:
+                word, bit = divmod(flagged.index(col), OUTLIER_MASK_WORD_BITS)
+                selected[word] = selected.get(word, 0) | (1 << bit)
+        
+        rows = np.zeros(len(df), dtype=bool)
+        for word, bits in selected.items():
+            if word_columns[word] in df.columns:
+                # Masks read back from CSV and compacted may be signed; the bits are the same
+                mask = df[word_columns[word]].to_numpy().astype(np.uint64)
+                rows |= (mask & np.uint64(bits)) != 0
+        return rows
+
+    @staticmethod
+    def feature_columns(df: pd.DataFrame) -> List[str]:
+        """Numeric columns usable as analysis features (excludes bookkeeping columns)."""
+        return [
+            col for col in df.select_dtypes(include=[np.number]).columns
+            if not DataTools.is_outlier_mask_column(col)
+        ]
 
     @staticmethod
-    def encode_categorical(df: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
-        """Encode categorical variables."""
-        df_encoded = df.copy()
+    def encode_categorical(
+        df: pd.DataFrame,
+        columns: List[str],
+        compact: bool = False,
+        codebook: Optional[CategoryCodebook] = None
+    ) -> pd.DataFrame:
+        """Encode categorical variables.
+        
+        With a ``codebook`` the codes are stable across files and runs;
+        otherwise they follow first-seen order within ``df``. In compact mode
+        the frame is modified in place instead of copied and codes use the
+        narrowest integer type.
+        """
+        df_encoded = df if compact else df.copy()
         encoded_columns = []
         
         for col in columns:
-            if df_encoded[col].dtype == 'object':
-                df_encoded[f"{col}_encoded"] = pd.factorize(df_encoded[col])[0]
-                encoded_columns.append(f"{col}_encoded")
+            if codebook is not None and (
+                df_encoded[col].dtype == 'object' or isinstance(df_encoded[col].dtype, pd.CategoricalDtype)
+            ):
+                codes = codebook.encode(df_encoded[col], col)
+            elif compact and isinstance(df_encoded[col].dtype, pd.CategoricalDtype):
+                codes = df_encoded[col].cat.codes
+            elif df_encoded[col].dtype == 'object' or isinstance(df_encoded[col].dtype, pd.CategoricalDtype):
+                codes = pd.factorize(df_encoded[col])[0]
+                if compact:
+                    codes = pd.to_numeric(codes, downcast='integer')
+            else:
+                continue
+                
+            if compact and f"{col}_encoded" not in df_encoded.columns:
+                # insert() adds the column in place without tripping the copy-on-slice check
+                df_encoded.insert(len(df_encoded.columns), f"{col}_encoded", codes)
+            else:
+                df_encoded[f"{col}_encoded"] = codes
+            encoded_columns.append(f"{col}_encoded")
         
         print(f"Encoded {len(encoded_columns)} categorical columns")
         
-        return df_encoded
\ No newline at end of file
+        return df_encoded
+
+    @staticmethod
+    def compact_dataframe(df: pd.DataFrame, max_category_ratio: float = 0.5) -> pd.DataFrame:
+        """Shrink a frame in memory without losing information.
+        
+        Date-like text columns are parsed, low-cardinality text columns become
+        ``category`` and numeric columns are downcast to the smallest width
+        that round-trips exactly.
+        """
+        memory_before = df.memory_usage(deep=True).sum()
+        df_compact = df.copy(deep=False)
+        
+        for col in df_compact.select_dtypes(include=['object']).columns:
+            values = df_compact[col]
+            sample = values.dropna().head(100)
+            if len(sample) and pd.api.types.infer_dtype(sample, skipna=True) == 'string':
+                try:
+                    pd.to_datetime(sample, format='ISO8601')
+                    df_compact[col] = pd.to_datetime(values, format='ISO8601')
+                    continue
+                except (ValueError, TypeError):
+                    pass
+            if values.nunique(dropna=True) <= max_category_ratio * len(values):
+                df_compact[col] = values.astype('category')
+        
+        for col in df_compact.select_dtypes(include=['integer']).columns:
+            df_compact[col] = pd.to_numeric(df_compact[col], downcast='integer')
+        
+        for col in df_compact.select_dtypes(include=['floating']).columns:
+            values = df_compact[col].to_numpy()
+            downcast = values.astype(np.float32)
+            # Only keep float32 when every value survives the round trip
+            if np.array_equal(downcast.astype(values.dtype), values, equal_nan=True):
+                df_compact[col] = downcast
+        
+        memory_after = df_compact.memory_usage(deep=True).sum()
+        print(
+            f"Compacted data: {memory_before / (1024 * 1024):.2f} MB -> "
+            f"{memory_after / (1024 * 1024):.2f} MB "
+            f"({memory_before / max(memory_after, 1):.1f}x smaller)"
+        )
+        
+        return df_compact
+
+    @staticmethod
+    def iter_csv_chunks(
+        file_path: str,
+        schema: Optional[Dict[str, str]] = None,
+        chunksize: int = 100_000
+    ) -> Iterator[pd.DataFrame]:
+        """Stream a CSV file in row batches using the explicit schema."""
+        schema = schema or {}
+        header = pd.read_csv(file_path, nrows=0).columns
+        dtypes = {
+            col: dtype for col, dtype in schema.items()
+            if col in header and not str(dtype).startswith("datetime")
+        }
+        date_columns = [
+            col for col, dtype in schema.items()
+            if col in header and str(dtype).startswith("datetime")
+        ]
+        
+        # The pyarrow engine cannot stream, so chunked reads use the C parser
+        yield from pd.read_csv(
+            file_path,
+            dtype=dtypes or None,
+            parse_dates=date_columns or None,
+            chunksize=chunksize
+        )
+
+    @staticmethod
+    def collect_preprocess_stats(
+        file_path: str,
+        schema: Optional[Dict[str, str]] = None,
+        chunksize: int = 100_000
+    ) -> PreprocessStats:
+        """First pass of chunked preprocessing: gather mergeable fill and outlier statistics."""
+        stats = PreprocessStats()
+        for chunk in DataTools.iter_csv_chunks(file_path, schema, chunksize):
+            stats.update(chunk)
+        return stats
+
+    @staticmethod
+    def fill_missing(chunk: pd.DataFrame, medians: Dict[str, float], modes: Dict[str, Any]) -> pd.DataFrame:
+        """Fill missing values with precomputed medians (numeric) and modes (categorical)."""
+        for col, median in medians.items():
+            if col in chunk.columns:
+                chunk[col] = chunk[col].fillna(median)
+        for col in chunk.select_dtypes(include=['object', 'category']).columns:
+            if col not in modes:
+                continue
+            if isinstance(chunk[col].dtype, pd.CategoricalDtype) and modes[col] not in chunk[col].cat.categories:
+                chunk[col] = chunk[col].cat.add_categories([modes[col]])
+            chunk[col] = chunk[col].fillna(modes[col])
+        return chunk
+
+    @staticmethod
+    def preprocess_chunked(
+        file_path: str,
+        output_path: str,
+        schema: Optional[Dict[str, str]] = None,
+        chunksize: int = 100_000,
+        stats: Optional[PreprocessStats] = None,
+        codebook: Optional[CategoryCodebook] = None,
+        outlier_method: str = "iqr",
+        outlier_threshold: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Clean, flag outliers and encode a CSV that does not fit in memory.
+        
+        Rows are streamed twice: once to build ``PreprocessStats`` and once to
+        fill, deduplicate, flag and encode each chunk, appending it to
+        ``output_path``. Categories are encoded through ``codebook`` (an
+        in-memory one by default) so codes agree across chunks. Outliers are
+        flagged with ``outlier_method`` using bounds from the statistics and recorded
+        in the ``outlier_mask`` columns using the same bit layout as
+        ``detect_outliers``.
+        """
+        start = time.perf_counter()
+        if stats is None:
+            stats = DataTools.collect_preprocess_stats(file_path, schema, chunksize)
+            
+        medians = stats.medians()
+        modes = stats.modes()
+        bounds = stats.outlier_bounds(outlier_method, outlier_threshold)
+        outlier_columns = list(bounds)
+        lower = np.array([bounds[col][0] for col in outlier_columns])
+        upper = np.array([bounds[col][1] for col in outlier_columns])
+        
+        seen_rows = _SeenRows()
+        codebook = codebook if codebook is not None else CategoryCodebook(None)
+        rows_in = rows_out = outlier_rows = 0
+        
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        for chunk_number, chunk in enumerate(DataTools.iter_csv_chunks(file_path, schema, chunksize)):
+            rows_in += len(chunk)
+            
+            # Fill missing values with the global statistics
+            categorical_cols = chunk.select_dtypes(include=['object', 'category']).columns
+            chunk = DataTools.fill_missing(chunk, medians, modes)
+            
+            # Drop rows already seen in this or earlier chunks
+            hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+            chunk = chunk[seen_rows.filter_new(hashes)].copy()
+            
+            # Flag outliers as one bit per numeric column
+            values = chunk[outlier_columns].to_numpy(dtype=np.float64, na_value=np.nan)
+            mask = DataTools.outlier_mask_from_bounds(values, lower, upper)
+            outlier_rows += int(mask.any(axis=1).sum())
+            
+            # Encode with codes that stay consistent across chunks
+            for col in categorical_cols:
+                chunk[f"{col}_encoded"] = codebook.encode(chunk[col], col)
+            DataTools.set_outlier_mask(chunk, mask, outlier_columns)
+            
+            chunk.to_csv(output_path, mode="w" if chunk_number == 0 else "a", header=chunk_number == 0, index=False)
+            rows_out += len(chunk)
+            
+        elapsed = time.perf_counter() - start
+        print(
+            f"Chunked preprocessing of {file_path}: {rows_in} rows in, {rows_out} rows out, "
+            f"{rows_in - rows_out} duplicates removed, {outlier_rows} outlier rows flagged in {elapsed:.3f}s"
+        )
+        
+        return {
+            "output_path": str(output_path),
+            "rows_in": rows_in,
+            "rows_out": rows_out,
+            "duplicates_removed": rows_in - rows_out,
+            "outlier_rows": outlier_rows,
+            "outlier_columns": outlier_columns,
+            "seconds": elapsed
+        }
+
+    @staticmethod
+    def _prefix_hash(file_path: str, length: int) -> str:
+        """Hash the first ``length`` bytes of a file to detect rewrites."""
+        with open(file_path, "rb") as f:
+            return hashlib.blake2b(f.read(min(length, 1 << 16)), digest_size=16).hexdigest()
+
+    @staticmethod
+    def _load_seen(path: Path) -> _SeenRows:
+        seen = _SeenRows()
+        if path.exists():
+            with np.load(path) as runs:
+                seen.runs = [runs[f"run_{i}"] for i in range(len(runs.files))]
+        return seen
+
+    @staticmethod
+    def _save_seen(seen: _SeenRows, path: Path) -> None:
+        tmp_path = path.with_name(f".{path.stem}.tmp.npz")
+        np.savez(tmp_path, **{f"run_{i}": run for i, run in enumerate(seen.runs)})
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _incremental_version(params_key: str, state: Dict[str, Any]) -> str:
+        return hashlib.blake2b(
+            f"{params_key}:{state['prefix_hash']}:{state['offset']}".encode("utf-8"), digest_size=20
+        ).hexdigest()
+
+    @staticmethod
+    def preprocess_incremental(
+        file_path: str,
+        state_dir: str,
+        schema: Optional[Dict[str, str]] = None,
+        id_column: Optional[str] = None,
+        params: Optional[Dict[str, Any]] = None,
+        csv_path: Optional[str] = None,
+        codebook: Optional[CategoryCodebook] = None,
+        outlier_method: str = "iqr",
+        outlier_threshold: Optional[float] = None
+    ) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        """Preprocess only the rows appended to a CSV since the previous run.
+        
+        The byte offset of the last complete line read is the append cursor;
+        it is kept in ``state_dir/_state.json`` together with running
+        ``PreprocessStats``. Categories are encoded through ``codebook`` (one
+        kept under ``state_dir`` by default). Rows identical to any row
+        ingested before, and rows whose ``id_column`` value was ingested
+        before, are dropped using hash sets kept next to the state (8 bytes per
+        row). The new tail is filled with the updated running medians/modes,
+        flagged against bounds from the updated statistics (``outlier_method``,
+        as in ``preprocess_chunked``), encoded with the stored codes
+        and written as a new Parquet part (and appended to ``csv_path`` when
+        given). Earlier rows keep the fills and flags they were written with.
+        The file is reprocessed from scratch if it was truncated or rewritten,
+        or if ``params`` changed.
+        
+        Returns only the new rows, so the work per refresh depends on the size
+        of the tail; ``read_incremental`` loads the whole history. The summary
+        holds the dataset version before and after the refresh, so callers
+        keeping the full frame can tell whether appending the tail to it is
+        valid.
+        """
+        start = time.perf_counter()
+        state_dir = Path(state_dir)
+        state_path = state_dir / "_state.json"
+        seen_rows_path = state_dir / "_seen_rows.npz"
+        seen_ids_path = state_dir / "_seen_ids.npz"
+        params_key = json.dumps(params or {}, sort_keys=True, default=str)
+        
+        state = None
+        if state_path.exists():
+            with open(state_path, "r") as f:
+                state = json.load(f)
+            size = os.path.getsize(file_path)
+            if (
+                state.get("version") != INCREMENTAL_STATE_VERSION
+                or state["params"] != params_key
+                or size < state["offset"]
+                or DataTools._prefix_hash(file_path, state["offset"]) != state["prefix_hash"]
+            ):
+                print(f"{file_path} was rewritten or settings changed, rebuilding incremental state")
+                state = None
+        
+        previous_version = DataTools._incremental_version(params_key, state) if state else None
+        if state is None:
+            shutil.rmtree(state_dir, ignore_errors=True)
+            state_dir.mkdir(parents=True, exist_ok=True)
+            with open(file_path, "rb") as f:
+                header = f.readline()
+            state = {
+                "version": INCREMENTAL_STATE_VERSION,
+                "params": params_key,
+                "header": header.decode("utf-8"),
+                "offset": len(header),
+                "prefix_hash": None,
+                "rows": 0,
+                "parts": 0,
+                "stats": PreprocessStats().to_dict()
+            }
+        if codebook is None:
+            # Underscore-prefixed like the state files, so it is kept apart from the Parquet parts
+            codebook = CategoryCodebook(str(state_dir / "_codebook"))
+        
+        # Read only complete lines past the cursor
+        with open(file_path, "rb") as f:
+            f.seek(state["offset"])
+            tail = f.read()
+        tail = tail[:tail.rfind(b"\n") + 1]
+        
+        chunk = pd.DataFrame()
+        summary = {"new_rows": 0, "total_rows": state["rows"], "seconds": 0.0, "previous_version": previous_version}
+        if tail.strip():
+            header = pd.read_csv(io.StringIO(state["header"]), nrows=0).columns
+            chunk = pd.read_csv(
+                io.BytesIO(state["header"].encode("utf-8") + tail),
+                dtype={
+                    col: dtype for col, dtype in (schema or {}).items()
+                    if col in header and not str(dtype).startswith("datetime")
+                } or None,
+                parse_dates=[
+                    col for col, dtype in (schema or {}).items()
+                    if col in header and str(dtype).startswith("datetime")
+                ] or None
+            )
+            
+            # Drop rows re-sent with an ID that was already ingested, then exact repeats of earlier rows
+            seen_ids = None
+            if id_column and id_column in chunk.columns:
+                seen_ids = DataTools._load_seen(seen_ids_path)
+                ids = chunk[id_column]
+                keep = ids.isna().to_numpy()
+                known = ~keep
+                id_hashes = pd.util.hash_array(ids[known].astype(str).to_numpy(dtype=object))
+                keep[known] = seen_ids.filter_new(id_hashes)
+                chunk = chunk[keep]
+            seen_rows = DataTools._load_seen(seen_rows_path)
+            chunk = chunk[seen_rows.filter_new(pd.util.hash_pandas_object(chunk, index=False).to_numpy())]
+            
+            stats = PreprocessStats.from_dict(state["stats"]).update(chunk)
+            bounds = stats.outlier_bounds(outlier_method, outlier_threshold)
+            outlier_columns = list(bounds)
+            
+            categorical_cols = chunk.select_dtypes(include=['object', 'category']).columns
+            chunk = DataTools.fill_missing(chunk.copy(), stats.medians(), stats.modes())
+            
+            values = chunk[outlier_columns].to_numpy(dtype=np.float64, na_value=np.nan)
+            mask = DataTools.outlier_mask_from_bounds(
+                values,
+                np.array([bounds[col][0] for col in outlier_columns]),
+                np.array([bounds[col][1] for col in outlier_columns])
+            )
+            
+            for col in categorical_cols:
+                chunk[f"{col}_encoded"] = codebook.encode(chunk[col], col)
+            DataTools.set_outlier_mask(chunk, mask, outlier_columns)
+            
+            # Parts store plain values; category dictionaries would differ between parts
+            for col in chunk.select_dtypes(include=['category']).columns:
+                chunk[col] = chunk[col].astype(object)
+            chunk.to_parquet(state_dir / f"part-{state['parts']:05d}.parquet", index=False)
+            if csv_path:
+                chunk.to_csv(csv_path, mode="a" if state["parts"] else "w", header=not state["parts"], index=False)
+            
+            DataTools._save_seen(seen_rows, seen_rows_path)
+            if seen_ids is not None:
+                DataTools._save_seen(seen_ids, seen_ids_path)
+            state["offset"] += len(tail)
+            state["prefix_hash"] = DataTools._prefix_hash(file_path, state["offset"])
+            state["rows"] += len(chunk)
+            state["parts"] += 1
+            state["stats"] = stats.to_dict()
+            state["outlier_columns"] = outlier_columns
+            
+            tmp_path = state_path.with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(state, f, default=str)
+            os.replace(tmp_path, state_path)
+            
+            summary["new_rows"] = len(chunk)
+            summary["total_rows"] = state["rows"]
+        
+        chunk.attrs["outlier_columns"] = state.get("outlier_columns", [])
+        chunk.attrs["dataset_version"] = summary["version"] = DataTools._incremental_version(params_key, state)
+        summary["seconds"] = time.perf_counter() - start
+        print(
+            f"Incremental ingestion of {file_path}: {summary['new_rows']} new rows, "
+            f"{summary['total_rows']} total in {summary['seconds']:.3f}s"
+        )
+        
+        return chunk, summary
+
+    @staticmethod
+    def read_incremental(state_dir: str) -> pd.DataFrame:
+        """Every row ingested so far by ``preprocess_incremental`` into ``state_dir``."""
+        state_path = Path(state_dir) / "_state.json"
+        if not state_path.exists():
+            return pd.DataFrame()
+        with open(state_path, "r") as f:
+            state = json.load(f)
+        
+        parts = [str(Path(state_dir) / f"part-{part:05d}.parquet") for part in range(state["parts"])]
+        df = pd.read_parquet(parts) if parts else pd.DataFrame()
+        df.attrs["outlier_columns"] = state.get("outlier_columns", [])
+        df.attrs["dataset_version"] = DataTools._incremental_version(state["params"], state)
+        return df
+
+    @staticmethod
+    def append_rows(df: pd.DataFrame, tail: pd.DataFrame) -> pd.DataFrame:
+        """Append ``tail`` to ``df``, extending category dictionaries so categorical columns stay categorical.
+        
+        Existing codes are left alone, so the cost beyond the concatenation
+        depends only on the size of ``tail``.
+        """
+        if not len(df):
+            return tail
+        df = df.copy(deep=False)
+        tail = tail.copy(deep=False)
+        for col in df.columns.intersection(tail.columns):
+            right = tail[col]
+            if isinstance(right.dtype, pd.CategoricalDtype):
+                right = right.astype(object)
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                categories = df[col].cat.categories
+                new = pd.Index(right.dropna().unique()).difference(categories)
+                if len(new):
+                    df[col] = df[col].cat.add_categories(new)
+                tail[col] = pd.Categorical(right, categories=df[col].cat.categories)
+            else:
+                tail[col] = right
+        combined = pd.concat([df, tail], ignore_index=True)
+        combined.attrs = {**df.attrs, **tail.attrs}
+        return combined
+
+    @staticmethod
+    def stratified_sample_chunked(
+        chunks: Iterator[pd.DataFrame],
+        strata_columns: List[str],
+        sample_size: int = 100_000,
+        seed: int = 42,
+        min_per_stratum: int = 2
+    ) -> pd.DataFrame:
+        """Reproducible stratified sample of a stream of frames, with proportional allocation.
+        
+        Every row gets a uniform random key from one seeded generator, and
+        each stratum keeps the rows with the smallest keys (a reservoir of at
+        most ``sample_size`` rows), so the result depends only on the seed and
+        the row order, not on the chunking. Once the stream ends each stratum
+        contributes its share of ``sample_size``, at least ``min_per_stratum``
+        rows. Population and sample sizes per stratum are stored in
+        ``attrs['sample']``. Inputs no larger than ``sample_size`` are
+        returned whole, without that entry.
+        """
+        rng = np.random.default_rng(seed)
+        reservoirs: Dict[tuple, Tuple[np.ndarray, pd.DataFrame]] = {}
+        population: Dict[tuple, int] = {}
+        attrs = {}
+        offset = 0
+        
+        for chunk in chunks:
+            attrs = attrs or dict(chunk.attrs)
+            keys = rng.random(len(chunk))
+            chunk = chunk.assign(_position=np.arange(offset, offset + len(chunk)))
+            offset += len(chunk)
+            columns = [col for col in strata_columns if col in chunk.columns]
+            groups = chunk.groupby(columns, observed=True, dropna=False, sort=False).indices if columns else {(): np.arange(len(chunk))}
+            
+            for stratum, positions in groups.items():
+                stratum = tuple(str(value) for value in (stratum if isinstance(stratum, tuple) else (stratum,)))
+                population[stratum] = population.get(stratum, 0) + len(positions)
+                old_keys, old_rows = reservoirs.get(stratum, (np.empty(0), chunk.iloc[:0]))
+                pooled_keys = np.concatenate([old_keys, keys[positions]])
+                pooled_rows = pd.concat([old_rows, chunk.iloc[positions]]) if len(old_rows) else chunk.iloc[positions]
+                if len(pooled_keys) > sample_size:
+                    keep = np.argpartition(pooled_keys, sample_size - 1)[:sample_size]
+                    pooled_keys, pooled_rows = pooled_keys[keep], pooled_rows.iloc[keep]
+                reservoirs[stratum] = (pooled_keys, pooled_rows)
+        
+        total = sum(population.values())
+        if total <= sample_size:
+            full = pd.concat([rows for _, rows in reservoirs.values()]) if reservoirs else pd.DataFrame()
+            full = full.sort_values("_position").drop(columns="_position").reset_index(drop=True) if len(full) else full
+            full.attrs.update(attrs)
+            return full
+        
+        parts = []
+        strata = []
+        for stratum, (keys, rows) in reservoirs.items():
+            allocated = max(int(round(sample_size * population[stratum] / total)), min_per_stratum)
+            allocated = min(allocated, population[stratum], len(keys))
+            parts.append(rows.iloc[np.argsort(keys, kind="stable")[:allocated]])
+            strata.append({"values": list(stratum), "population": population[stratum], "sample": allocated})
+        
+        sample = pd.concat(parts).sort_values("_position").drop(columns="_position").reset_index(drop=True)
+        sample.attrs.update(attrs)
+        sample.attrs["sample"] = {
+            "strata_columns": [col for col in strata_columns],
+            "seed": seed,
+            "population_rows": total,
+            "sample_rows": len(sample),
+            "strata": strata
+        }
+        return sample
+
+    @staticmethod
+    def stratified_sample(df: pd.DataFrame, strata_columns: List[str], sample_size: int = 100_000, seed: int = 42, chunksize: int = 1_000_000, **kwargs) -> pd.DataFrame:
+        """Stratified sample of an in-memory frame, streamed in row slices of ``chunksize``."""
+        chunks = (df.iloc[start:start + chunksize] for start in range(0, len(df), chunksize))
+        return DataTools.stratified_sample_chunked(chunks, strata_columns, sample_size, seed, **kwargs)
+
+    @staticmethod
+    def sample_strata(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Stratum code of every row of a sample, with the population and sample size of each stratum."""
+        info = df.attrs["sample"]
+        lookup = {tuple(stratum["values"]): i for i, stratum in enumerate(info["strata"])}
+        columns = [col for col in info["strata_columns"] if col in df.columns]
+        codes = np.zeros(len(df), dtype=np.int64)
+        if columns:
+            # Stratum keys are the string form of the values, as recorded when sampling
+            for stratum, positions in df.groupby(columns, observed=True, dropna=False, sort=False).indices.items():
+                stratum = tuple(str(value) for value in (stratum if isinstance(stratum, tuple) else (stratum,)))
+                codes[positions] = lookup[stratum]
+        populations = np.array([stratum["population"] for stratum in info["strata"]], dtype=np.float64)
+        sizes = np.array([stratum["sample"] for stratum in info["strata"]], dtype=np.float64)
+        return codes, populations, sizes
+
+    @staticmethod
+    def sample_weights(df: pd.DataFrame) -> Optional[np.ndarray]:
+        """Number of population rows each sampled row stands for, or None for full data."""
+        if "sample" not in df.attrs:
+            return None
+        codes, populations, sizes = DataTools.sample_strata(df)
+        return (populations / sizes)[codes]
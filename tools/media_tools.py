@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Any, List, Tuple
+
+# Source file digests by (path, size, mtime), so each figure is hashed once per process
+_DIGESTS: Dict[Tuple[str, int, int], str] = {}
+
+class MediaTools:
+    """Report-ready copies of figures, made once and shared by every report that embeds them.
+
+    Processed images are named by a hash of the source content and the
+    processing parameters, so both report variants, later runs and other
+    datasets with identical plots reuse the same file.
+    """
+
+    @staticmethod
+    def file_digest(path: str) -> str:
+        stat = os.stat(path)
+        memo_key = (str(path), stat.st_size, stat.st_mtime_ns)
+        if memo_key not in _DIGESTS:
+            digest = hashlib.blake2b(digest_size=16)
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+            _DIGESTS[memo_key] = digest.hexdigest()
+        return _DIGESTS[memo_key]
+
+    @staticmethod
+    def _media_path(media_dir: str, sources: List[str], params: Dict[str, Any]) -> Path:
+        payload = json.dumps(
+            {"sources": [MediaTools.file_digest(source) for source in sources], "params": params},
+            sort_keys=True
+        )
+        key = hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+        return Path(media_dir) / f"{key}.png"
+
+    @staticmethod
+    def _save(image, path: Path, dpi: int, colors: int) -> None:
+        """Flatten onto white, optionally reduce to a palette, and write an optimized PNG."""
+        from PIL import Image
+
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, "white")
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        else:
+            image = image.convert("RGB")
+        if colors:
+            # Plots use few distinct colors, so a palette keeps them sharp at a fraction of the size
+            image = image.quantize(colors=colors, method=Image.Quantize.MEDIANCUT, dither=Image.Dither.NONE)
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Unique per process so parallel report workers never share a temporary file
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        image.save(tmp_path, format="PNG", optimize=True, dpi=(dpi, dpi))
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def prepare_image(
+        path: str,
+        media_dir: str = "output/reports/media",
+        width_inches: float = 6.0,
+        dpi: int = 150,
+        colors: int = 256,
+        stats: Dict[str, int] = None
+    ) -> str:
+        """Downscale a figure to ``width_inches`` at ``dpi`` and recompress it, reusing an earlier result."""
+        params = {"kind": "image", "width_inches": width_inches, "dpi": dpi, "colors": colors}
+        target = MediaTools._media_path(media_dir, [path], params)
+        if stats is not None:
+            stats["reused" if target.exists() else "processed"] += 1
+        if target.exists():
+            return str(target)
+
+        from PIL import Image
+
+        with Image.open(path) as image:
+            image.load()
+            max_width = int(width_inches * dpi)
+            if image.width > max_width:
+                height = max(1, round(image.height * max_width / image.width))
+                image = image.resize((max_width, height), Image.Resampling.LANCZOS)
+            MediaTools._save(image, target, dpi, colors)
+        return str(target)
+
+    @staticmethod
+    def contact_sheet(
+        paths: List[str],
+        media_dir: str = "output/reports/media",
+        columns: int = 3,
+        width_inches: float = 6.0,
+        dpi: int = 150,
+        colors: int = 256,
+        stats: Dict[str, int] = None
+    ) -> str:
+        """Tile several figures, each labelled with its file name, into one page-wide image."""
+        params = {"kind": "contact_sheet", "columns": columns, "width_inches": width_inches, "dpi": dpi, "colors": colors}
+        target = MediaTools._media_path(media_dir, paths, params)
+        if stats is not None:
+            stats["reused" if target.exists() else "processed"] += 1
+        if target.exists():
+            return str(target)
+
+        from PIL import Image, ImageDraw
+
+        columns = max(1, min(columns, len(paths)))
+        tile_width = int(width_inches * dpi) // columns
+        label_height = max(12, dpi // 8)
+        tiles = []
+        for path in paths:
+            with Image.open(path) as image:
+                image = image.convert("RGB")
+                height = max(1, round(image.height * tile_width / image.width))
+                tiles.append((Path(path).stem, image.resize((tile_width, height), Image.Resampling.LANCZOS)))
+
+        tile_height = max(tile.height for _, tile in tiles) + label_height
+        rows = -(-len(tiles) // columns)
+        sheet = Image.new("RGB", (tile_width * columns, tile_height * rows), "white")
+        draw = ImageDraw.Draw(sheet)
+        for i, (label, tile) in enumerate(tiles):
+            x, y = (i % columns) * tile_width, (i // columns) * tile_height
+            sheet.paste(tile, (x, y + label_height))
+            draw.text((x + 4, y + 1), label, fill="black")
+        MediaTools._save(sheet, target, dpi, colors)
+        return str(target)
@@ -0,0 +1,150 @@
+import pandas as pd
+import numpy as np
+from multiprocessing import shared_memory
+from typing import Dict, Any, List, Tuple
+
+# Frames already attached in this (worker) process, keyed by shared memory name
+_ATTACHED: Dict[str, Tuple[shared_memory.SharedMemory, pd.DataFrame]] = {}
+
+class SharedFrame:
+    """A DataFrame packed once into shared memory for process pool workers.
+
+    Numeric, boolean and datetime columns are laid out back to back in one
+    block, each in its own dtype. Categorical and object columns are stored
+    as integer codes, and their category values (when they are all strings)
+    as one UTF-8 buffer with offsets; a non-range index is packed the same
+    way. Workers rebuild the frame from read-only views of the block, so the
+    ``spec`` they receive only holds offsets, dtypes and ``attrs``. Numeric
+    columns are not copied; object columns are rebuilt once per worker.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self._arrays: List[np.ndarray] = []
+        columns = [self._pack(df[col], col) for col in df.columns]
+        if isinstance(df.index, pd.RangeIndex):
+            index = {"kind": "range", "start": df.index.start, "stop": df.index.stop, "step": df.index.step, "name": df.index.name}
+        elif isinstance(df.index, pd.MultiIndex):
+            index = {"kind": "pickled", "values": df.index}
+        else:
+            index = self._pack(pd.Series(df.index, copy=False), df.index.name)
+
+        size = sum(array.nbytes for array in self._arrays)
+        self.shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        blocks = []
+        offset = 0
+        for array in self._arrays:
+            np.ndarray(array.shape, dtype=array.dtype, buffer=self.shm.buf, offset=offset)[:] = array
+            blocks.append({"offset": offset, "dtype": array.dtype.str, "length": len(array)})
+            offset += array.nbytes
+        self._arrays = []
+
+        self.spec = {
+            "shm_name": self.shm.name,
+            "blocks": blocks,
+            "columns": columns,
+            "index": index,
+            "attrs": dict(df.attrs)
+        }
+
+    def _block(self, array: np.ndarray) -> int:
+        self._arrays.append(np.ascontiguousarray(array))
+        return len(self._arrays) - 1
+
+    def _pack_values(self, values) -> Dict[str, Any]:
+        """Category values: strings go into the block as UTF-8 with offsets, anything else stays in the spec."""
+        if not all(isinstance(value, str) for value in values):
+            return {"pickled": values}
+        encoded = [value.encode("utf-8") for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        return {
+            "strings": self._block(np.frombuffer(b"".join(encoded), dtype=np.uint8)),
+            "offsets": self._block(offsets)
+        }
+
+    def _pack(self, series: pd.Series, name: Any) -> Dict[str, Any]:
+        dtype = series.dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            return {
+                "name": name,
+                "kind": "categorical",
+                "codes": self._block(series.cat.codes.to_numpy()),
+                "categories": self._pack_values(list(series.cat.categories)),
+                "ordered": dtype.ordered
+            }
+        if isinstance(dtype, np.dtype) and (pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_datetime64_dtype(dtype)):
+            return {"name": name, "kind": "array", "values": self._block(series.to_numpy())}
+
+        # Object columns (IDs, names, tz-aware dates, ...) as codes into their unique values
+        codes, uniques = pd.factorize(series)
+        return {
+            "name": name,
+            "kind": "object",
+            "codes": self._block(codes.astype(np.min_scalar_type(-(len(uniques) + 1)))),
+            "uniques": self._pack_values(list(uniques))
+        }
+
+    @staticmethod
+    def _view(shm: shared_memory.SharedMemory, block: Dict[str, Any]) -> np.ndarray:
+        array = np.ndarray(block["length"], dtype=np.dtype(block["dtype"]), buffer=shm.buf, offset=block["offset"])
+        array.flags.writeable = False
+        return array
+
+    @staticmethod
+    def _unpack_values(shm: shared_memory.SharedMemory, blocks: List[Dict[str, Any]], packed: Dict[str, Any]) -> list:
+        if "pickled" in packed:
+            return list(packed["pickled"])
+        raw = SharedFrame._view(shm, blocks[packed["strings"]]).tobytes()
+        offsets = SharedFrame._view(shm, blocks[packed["offsets"]])
+        return [raw[start:stop].decode("utf-8") for start, stop in zip(offsets[:-1], offsets[1:])]
+
+    @staticmethod
+    def _unpack(shm: shared_memory.SharedMemory, blocks: List[Dict[str, Any]], column: Dict[str, Any]):
+        if column["kind"] == "array":
+            return SharedFrame._view(shm, blocks[column["values"]])
+        codes = SharedFrame._view(shm, blocks[column["codes"]])
+        if column["kind"] == "categorical":
+            categories = SharedFrame._unpack_values(shm, blocks, column["categories"])
+            return pd.Categorical.from_codes(codes, dtype=pd.CategoricalDtype(categories, ordered=column["ordered"]))
+        # Code -1 (missing) picks the trailing NaN
+        uniques = np.array(SharedFrame._unpack_values(shm, blocks, column["uniques"]) + [np.nan], dtype=object)
+        return uniques.take(codes)
+
+    @staticmethod
+    def attach(spec: Dict[str, Any]) -> pd.DataFrame:
+        """Rebuild the frame from its spec without copying the shared numeric columns."""
+        name = spec["shm_name"]
+        if name in _ATTACHED:
+            return _ATTACHED[name][1]
+
+        shm = shared_memory.SharedMemory(name=name)
+        blocks = spec["blocks"]
+
+        index_spec = spec["index"]
+        if index_spec["kind"] == "range":
+            index = pd.RangeIndex(index_spec["start"], index_spec["stop"], index_spec["step"], name=index_spec["name"])
+        elif index_spec["kind"] == "pickled":
+            index = index_spec["values"]
+        else:
+            index = pd.Index(SharedFrame._unpack(shm, blocks, index_spec), name=index_spec["name"])
+
+        # Build in the original column order; selecting columns afterwards would copy them
+        df = pd.DataFrame(
+            {column["name"]: SharedFrame._unpack(shm, blocks, column) for column in spec["columns"]},
+            index=index,
+            copy=False
+        )
+        df.attrs.update(spec["attrs"])
+        _ATTACHED[name] = (shm, df)
+        return df
+
+    def close(self) -> None:
+        """Release and remove the shared block; call once every worker is done."""
+        self.shm.close()
+        self.shm.unlink()
+
+
+def shared_frames(datasets: Dict[str, pd.DataFrame]) -> Tuple[Dict[str, Dict[str, Any]], List[SharedFrame]]:
+    """Pack several frames; returns their specs and the owners to close afterwards."""
+    frames = {name: SharedFrame(df) for name, df in datasets.items()}
+    return {name: frame.spec for name, frame in frames.items()}, list(frames.values())
@@ -0,0 +1,163 @@
+import html
+import os
+from pathlib import Path
+from string import Template
+from urllib.parse import quote
+from typing import Dict, Optional
+
+# Built-in templates per format and element. A template directory can
+# override any of them with a file named ``{format}_{element}.tmpl``.
+REPORT_TEMPLATES = {
+    "html": {
+        "header": (
+            '<!DOCTYPE html>\n<html lang="id">\n<head>\n<meta charset="utf-8">\n<title>$title</title>\n'
+            '<style>\n'
+            'body { font-family: sans-serif; max-width: 60em; margin: 2em auto; padding: 0 1em; line-height: 1.5; }\n'
+            'table { border-collapse: collapse; margin: 1em 0; }\n'
+            'th, td { border: 1px solid #999; padding: 0.25em 0.75em; text-align: left; }\n'
+            'figure { margin: 1em 0; } img { max-width: 100%; }\n'
+            '</style>\n</head>\n<body>\n'
+        ),
+        "heading": "<h$level>$text</h$level>\n",
+        "paragraph": "<p>$text</p>\n",
+        "picture": '<figure><img src="$src" alt="$alt" loading="lazy"></figure>\n',
+        "link": '<p><a href="$href">$text</a></p>\n',
+        "table": "<table>\n<thead><tr>$header</tr></thead>\n<tbody>\n$rows</tbody>\n</table>\n",
+        "table_header_cell": "<th>$text</th>",
+        "table_row": "<tr>$cells</tr>\n",
+        "table_cell": "<td>$text</td>",
+        "footer": "</body>\n</html>\n",
+    },
+    "markdown": {
+        "header": "",
+        "heading": "$hashes $text\n\n",
+        "paragraph": "$text\n\n",
+        "picture": "![$alt]($src)\n\n",
+        "link": "[$text]($href)\n\n",
+        "table": "| $header |\n|$separator|\n$rows\n",
+        "table_header_cell": "$text",
+        "table_row": "| $cells |\n",
+        "table_cell": "$text",
+        "footer": "",
+    },
+}
+
+REPORT_EXTENSIONS = {"docx": ".docx", "html": ".html", "markdown": ".md"}
+
+class _Cell:
+    def __init__(self):
+        self.text = ""
+
+class _Row:
+    def __init__(self, cols: int):
+        self.cells = [_Cell() for _ in range(cols)]
+
+class _Table:
+    """Collects rows like a python-docx table; written out when the next element starts."""
+
+    def __init__(self, rows: int, cols: int):
+        self.cols = cols
+        self.style = None
+        self.rows = [_Row(cols) for _ in range(rows)]
+
+    def add_row(self) -> _Row:
+        self.rows.append(_Row(self.cols))
+        return self.rows[-1]
+
+class StreamingReportWriter:
+    """Writes a report section by section as it is built, with the python-docx calls the reporter uses.
+
+    Every heading, paragraph and picture goes to disk as soon as it is
+    added; only the table being filled is held in memory. Pictures are
+    linked relative to the report instead of being copied into it. The
+    report is written to a temporary file and moved into place by ``save``.
+    """
+
+    def __init__(self, path: str, report_format: str = "html", title: str = "", template_dir: Optional[str] = None):
+        if report_format not in REPORT_TEMPLATES:
+            raise ValueError(f"Unknown report format: {report_format}")
+        self.path = Path(path)
+        self.format = report_format
+        self.templates = ReportTools.load_templates(report_format, template_dir)
+        self.pending_table: Optional[_Table] = None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        self.file = open(self.tmp_path, "w", encoding="utf-8")
+        self._write("header", title=self._escape(title))
+
+    def _escape(self, text) -> str:
+        return html.escape(str(text)) if self.format == "html" else str(text)
+
+    def _write(self, element: str, **fields) -> None:
+        self.file.write(self.templates[element].substitute(**fields))
+
+    def _flush_table(self) -> None:
+        table, self.pending_table = self.pending_table, None
+        if table is None or not table.rows:
+            return
+        escape = (lambda text: html.escape(str(text))) if self.format == "html" else (lambda text: str(text).replace("|", "\\|"))
+        joiner = "" if self.format == "html" else " | "
+        header = joiner.join(self.templates["table_header_cell"].substitute(text=escape(cell.text)) for cell in table.rows[0].cells)
+        rows = "".join(
+            self.templates["table_row"].substitute(
+                cells=joiner.join(self.templates["table_cell"].substitute(text=escape(cell.text)) for cell in row.cells)
+            )
+            for row in table.rows[1:]
+        )
+        self._write("table", header=header, rows=rows, separator="|".join(["---"] * table.cols))
+
+    def _href(self, path: str) -> str:
+        """Path of a linked file relative to the report, URL-quoted (plot names contain spaces)."""
+        href = quote(Path(os.path.relpath(path, self.path.parent)).as_posix())
+        return html.escape(href) if self.format == "html" else href
+
+    def add_heading(self, text: str, level: int = 1) -> None:
+        self._flush_table()
+        # Level 0 is the document title, as in python-docx
+        self._write("heading", text=self._escape(text), level=min(level + 1, 6), hashes="#" * min(level + 1, 6))
+
+    def add_paragraph(self, text: str = "") -> None:
+        self._flush_table()
+        self._write("paragraph", text=self._escape(text))
+
+    def add_picture(self, path: str, width: int = None) -> None:
+        self._flush_table()
+        self._write("picture", src=self._href(path), alt=self._escape(Path(path).name))
+
+    def add_link(self, path: str, text: str) -> None:
+        self._flush_table()
+        self._write("link", href=self._href(path), text=self._escape(text))
+
+    def add_table(self, rows: int, cols: int) -> _Table:
+        self._flush_table()
+        self.pending_table = _Table(rows, cols)
+        return self.pending_table
+
+    def discard(self) -> None:
+        """Drop a report that failed part way."""
+        self.file.close()
+        self.tmp_path.unlink(missing_ok=True)
+
+    def save(self, path: str = None) -> None:
+        self._flush_table()
+        self._write("footer")
+        self.file.close()
+        os.replace(self.tmp_path, path or self.path)
+
+class ReportTools:
+    @staticmethod
+    def load_templates(report_format: str, template_dir: Optional[str] = None) -> Dict[str, Template]:
+        """Built-in templates for a format, overridden by ``{format}_{element}.tmpl`` files in ``template_dir``."""
+        templates = dict(REPORT_TEMPLATES[report_format])
+        if template_dir:
+            for element in templates:
+                override = Path(template_dir) / f"{report_format}_{element}.tmpl"
+                if override.exists():
+                    templates[element] = override.read_text(encoding="utf-8")
+        return {element: Template(text) for element, text in templates.items()}
+
+    @staticmethod
+    def report_path(report_type: str, report_format: str, timestamp: str, dataset_name: str = None) -> str:
+        """Report file name; the dataset name keeps concurrent reports for different datasets apart."""
+        name = f"analysis_report_{dataset_name}_{report_type}" if dataset_name else f"analysis_report_{report_type}"
+        return f"output/reports/{name}_{timestamp}{REPORT_EXTENSIONS[report_format]}"
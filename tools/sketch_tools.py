@@ -0,0 +1,353 @@
+import pandas as pd
+import numpy as np
+import base64
+from typing import Dict, Any, List, Sequence, Tuple
+
+def hash_values(values: pd.Series) -> np.ndarray:
+    """64-bit hashes of the non-missing values of a column.
+    
+    Categorical columns hash only their categories and gather through the
+    codes, so the cost does not grow with the text length of every row.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.to_numpy()
+        category_hashes = pd.util.hash_array(values.cat.categories.to_numpy(dtype=object))
+        return category_hashes[codes[codes >= 0]]
+    values = values.dropna().to_numpy()
+    if values.dtype.kind == "M":
+        values = values.astype(np.int64)
+    elif values.dtype.kind in "fiub":
+        # Hash numbers by value so 1 and 1.0 count as the same item
+        values = values.astype(np.float64)
+    else:
+        # Hashing each string directly beats factorizing first when most values are distinct
+        return pd.util.hash_array(values.astype(object), categorize=False)
+    return pd.util.hash_array(values)
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    """Bit length of uint64 values, exact (float64 holds each 32-bit half exactly)."""
+    high = (values >> np.uint64(32)).astype(np.float64)
+    low = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(high > 0, 32 + np.frexp(high)[1], np.frexp(low)[1])
+
+def _encode_array(values: np.ndarray) -> str:
+    return base64.b64encode(np.ascontiguousarray(values).tobytes()).decode("ascii")
+
+def _decode_array(data: str, dtype, shape) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(data), dtype=dtype).reshape(shape).copy()
+
+def _to_builtin(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+class QuantileSketch:
+    """Mergeable approximate quantile sketch (KLL-style compactor hierarchy).
+
+    Memory stays around ``k * log2(n / k)`` values regardless of how many
+    values are added. While nothing has been compacted the sketch holds every
+    value and answers quantiles exactly, matching ``pandas.Series.quantile``.
+    """
+
+    def __init__(self, k: int = 200, seed: int = 42):
+        self.k = k
+        self.count = 0
+        self.min = np.nan
+        self.max = np.nan
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def update(self, values: Sequence[float]) -> "QuantileSketch":
+        """Add a batch of values, ignoring NaNs."""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+
+        self.count += len(values)
+        self.min = np.nanmin([self.min, values.min()])
+        self.max = np.nanmax([self.max, values.max()])
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """Fold another sketch into this one."""
+        if other.count == 0:
+            return self
+
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+
+        self.count += other.count
+        self.min = np.nanmin([self.min, other.min])
+        self.max = np.nanmax([self.max, other.max])
+        self._compress()
+        return self
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # Keep one item back when the count is odd so weights stay exact
+                keep = items[:1] if len(items) % 2 else items[:0]
+                pairs = items[len(keep):]
+                promoted = pairs[self._rng.integers(2)::2]
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+                # A new top level changes every capacity, so rescan from the bottom
+                level = 0
+                continue
+            level += 1
+
+    @property
+    def is_exact(self) -> bool:
+        return all(len(items) == 0 for items in self.levels[1:])
+
+    def _sorted_items(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([
+            np.full(len(level_items), 2 ** level, dtype=np.float64)
+            for level, level_items in enumerate(self.levels)
+        ])
+        order = np.argsort(items, kind="mergesort")
+        return items[order], np.cumsum(weights[order])
+
+    def quantiles(self, qs: Sequence[float]) -> np.ndarray:
+        """Estimate several quantiles at once."""
+        qs = np.asarray(qs, dtype=np.float64)
+        if self.count == 0:
+            return np.full(qs.shape, np.nan)
+        if self.is_exact:
+            return np.quantile(self.levels[0], qs)
+
+        items, cumulative = self._sorted_items()
+        ranks = qs * cumulative[-1]
+        positions = np.searchsorted(cumulative, ranks, side="left")
+        return items[np.clip(positions, 0, len(items) - 1)]
+
+    def quantile(self, q: float) -> float:
+        return float(self.quantiles([q])[0])
+
+    def median_absolute_deviation(self, center: float) -> float:
+        """Median of ``|x - center|`` over the summarized values, with the same rank error as ``quantile``."""
+        if self.count == 0:
+            return float("nan")
+        if self.is_exact:
+            return float(np.median(np.abs(self.levels[0] - center)))
+
+        items, cumulative = self._sorted_items()
+        weights = np.diff(cumulative, prepend=0.0)
+        deviations = np.abs(items - center)
+        order = np.argsort(deviations, kind="mergesort")
+        position = np.searchsorted(np.cumsum(weights[order]), cumulative[-1] / 2, side="left")
+        return float(deviations[order][min(position, len(order) - 1)])
+
+    def cdf(self, values: Sequence[float]) -> np.ndarray:
+        """Estimate the mid-rank fraction of each value (ties share their average rank)."""
+        values = np.asarray(values, dtype=np.float64)
+        if self.count == 0:
+            return np.full(values.shape, np.nan)
+        items, cumulative = self._sorted_items()
+        below = np.concatenate([[0.0], cumulative])
+        lower = below[np.searchsorted(items, values, side="left")]
+        upper = below[np.searchsorted(items, values, side="right")]
+        ranks = np.where(upper > lower, (lower + upper) / 2, np.interp(values, items, cumulative))
+        return np.where(np.isnan(values), np.nan, ranks / cumulative[-1])
+
+    def rank_error(self) -> float:
+        """Normalized rank error bound (~99% confidence), zero while exact."""
+        if self.is_exact:
+            return 0.0
+        return 2.296 / self.k ** 0.9723
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "k": self.k,
+            "count": self.count,
+            "min": None if np.isnan(self.min) else float(self.min),
+            "max": None if np.isnan(self.max) else float(self.max),
+            "levels": [items.tolist() for items in self.levels]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "QuantileSketch":
+        sketch = cls(k=data["k"])
+        sketch.count = data["count"]
+        sketch.min = np.nan if data["min"] is None else data["min"]
+        sketch.max = np.nan if data["max"] is None else data["max"]
+        sketch.levels = [np.asarray(items, dtype=np.float64) for items in data["levels"]]
+        return sketch
+
+
+class HyperLogLog:
+    """Mergeable distinct-count sketch using ``2 ** precision`` one-byte registers.
+    
+    Relative standard error is ``1.04 / sqrt(2 ** precision)`` (0.8% at the
+    default precision of 14, using 16 KB) whatever the number of items.
+    Small cardinalities use linear counting.
+    """
+    
+    def __init__(self, precision: int = 14):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+        
+    def update_hashes(self, hashes: np.ndarray) -> "HyperLogLog":
+        """Add items by their 64-bit hashes."""
+        if len(hashes) == 0:
+            return self
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        p = np.uint64(self.precision)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.int64)
+        remaining = hashes & np.uint64((1 << (64 - self.precision)) - 1)
+        # Rank is the position of the first set bit in the remaining 64 - p bits
+        rank = ((64 - self.precision) - _bit_length(remaining) + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+        return self
+        
+    def update(self, values: pd.Series) -> "HyperLogLog":
+        """Add the non-missing values of a column."""
+        return self.update_hashes(hash_values(values))
+        
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+        
+    @property
+    def relative_error(self) -> float:
+        """Relative standard error of the estimate."""
+        return 1.04 / np.sqrt(len(self.registers))
+        
+    def estimate(self) -> float:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return float(m * np.log(m / zeros))
+        return float(raw)
+        
+    def to_dict(self) -> Dict[str, Any]:
+        return {"precision": self.precision, "registers": _encode_array(self.registers)}
+        
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "HyperLogLog":
+        sketch = cls(data["precision"])
+        sketch.registers = _decode_array(data["registers"], np.uint8, (1 << data["precision"],))
+        return sketch
+
+
+class CountMinSketch:
+    """Mergeable frequency sketch with a bounded list of heavy-hitter candidates.
+    
+    Estimates never undercount and overcount by at most ``e / width`` times
+    the total count with probability ``1 - exp(-depth)``. Up to
+    ``capacity`` candidate values with the highest estimates are kept, so
+    memory stays fixed however many distinct values pass through.
+    """
+    
+    def __init__(self, width: int = 2048, depth: int = 5, capacity: int = 100):
+        self.width = width
+        self.depth = depth
+        self.capacity = capacity
+        self.table = np.zeros((depth, width), dtype=np.float64)
+        self.total = 0.0
+        self.candidates: List[Any] = []
+        self.candidate_hashes = np.empty(0, dtype=np.uint64)
+        
+    def _columns(self, hashes: np.ndarray) -> np.ndarray:
+        # Double hashing: row i uses h1 + i * h2, from the two halves of one 64-bit hash
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+        rows = np.arange(self.depth, dtype=np.uint64)[:, None]
+        return ((h1[None, :] + rows * h2[None, :]) % np.uint64(self.width)).astype(np.int64)
+        
+    def _estimate_hashes(self, hashes: np.ndarray) -> np.ndarray:
+        if len(hashes) == 0:
+            return np.empty(0)
+        columns = self._columns(hashes)
+        return self.table[np.arange(self.depth)[:, None], columns].min(axis=0)
+        
+    def _refresh_candidates(self, values: List[Any], hashes: np.ndarray) -> None:
+        """Keep the ``capacity`` values with the highest estimates among the old and new candidates."""
+        pooled_hashes = np.concatenate([self.candidate_hashes, hashes])
+        pooled_values = self.candidates + list(values)
+        pooled_hashes, first = np.unique(pooled_hashes, return_index=True)
+        estimates = self._estimate_hashes(pooled_hashes)
+        keep = np.argsort(-estimates, kind="stable")[:self.capacity]
+        self.candidate_hashes = pooled_hashes[keep]
+        self.candidates = [_to_builtin(pooled_values[first[i]]) for i in keep]
+        
+    def update(self, values: pd.Series, weights: pd.Series = None) -> "CountMinSketch":
+        """Count the non-missing values of a column, optionally weighted."""
+        present = values.notna().to_numpy()
+        codes, uniques = pd.factorize(values[present])
+        if weights is None:
+            counts = np.bincount(codes, minlength=len(uniques)).astype(np.float64)
+        else:
+            counts = np.bincount(codes, weights=weights.to_numpy(dtype=np.float64)[present], minlength=len(uniques))
+        hashes = hash_values(pd.Series(uniques, dtype=values.dtype if isinstance(values.dtype, pd.CategoricalDtype) else None))
+        
+        # Each distinct value of the batch touches the table once per row
+        columns = self._columns(hashes)
+        for row in range(self.depth):
+            self.table[row] += np.bincount(columns[row], weights=counts, minlength=self.width)
+        self.total += float(counts.sum())
+        self._refresh_candidates(list(uniques), hashes)
+        return self
+        
+    def merge(self, other: "CountMinSketch") -> "CountMinSketch":
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("Cannot merge Count-Min sketches of different shape")
+        self.table += other.table
+        self.total += other.total
+        self._refresh_candidates(other.candidates, other.candidate_hashes)
+        return self
+        
+    @property
+    def error_bound(self) -> float:
+        """Maximum overcount of any estimate at confidence ``1 - exp(-depth)``."""
+        return float(np.e / self.width * self.total)
+        
+    @property
+    def confidence(self) -> float:
+        return float(1 - np.exp(-self.depth))
+        
+    def estimate(self, values: pd.Series) -> np.ndarray:
+        return self._estimate_hashes(hash_values(values))
+        
+    def heavy_hitters(self, k: int = 10) -> List[Tuple[Any, float]]:
+        """The ``k`` most frequent candidate values and their estimated counts."""
+        estimates = self._estimate_hashes(self.candidate_hashes)
+        order = np.argsort(-estimates, kind="stable")[:k]
+        return [(self.candidates[i], float(estimates[i])) for i in order]
+        
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "width": self.width,
+            "depth": self.depth,
+            "capacity": self.capacity,
+            "total": self.total,
+            "table": _encode_array(self.table),
+            "candidates": self.candidates,
+            "candidate_hashes": _encode_array(self.candidate_hashes)
+        }
+        
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CountMinSketch":
+        sketch = cls(data["width"], data["depth"], data["capacity"])
+        sketch.total = data["total"]
+        sketch.table = _decode_array(data["table"], np.float64, (data["depth"], data["width"]))
+        sketch.candidates = list(data["candidates"])
+        sketch.candidate_hashes = _decode_array(data["candidate_hashes"], np.uint64, (len(sketch.candidates),))
+        return sketch
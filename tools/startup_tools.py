@@ -0,0 +1,72 @@
+import subprocess
+import sys
+import time
+from typing import Dict, Any, List
+
+class StartupTools:
+    @staticmethod
+    def import_times(module: str = "main") -> List[Dict[str, Any]]:
+        """Import a module in a fresh interpreter with ``-X importtime`` and parse its per-module timings.
+
+        Times are in seconds; ``depth`` is the nesting level of the import.
+        """
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True,
+            text=True
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed:\n{completed.stderr[-2000:]}")
+
+        entries = []
+        for line in completed.stderr.splitlines():
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            entries.append({
+                "module": name.strip(),
+                "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+                "self_seconds": int(self_us) / 1e6,
+                "cumulative_seconds": int(cumulative_us) / 1e6
+            })
+        return entries
+
+    @staticmethod
+    def import_report(module: str = "main", top: int = 15) -> Dict[str, Any]:
+        """Summarize where a cold import of ``module`` spends its time, grouped by top-level package."""
+        started = time.perf_counter()
+        entries = StartupTools.import_times(module)
+        wall_seconds = time.perf_counter() - started
+
+        packages: Dict[str, float] = {}
+        for entry in entries:
+            package = entry["module"].split(".")[0]
+            packages[package] = packages.get(package, 0.0) + entry["self_seconds"]
+
+        total = sum(packages.values())
+        ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)
+        return {
+            "module": module,
+            "import_seconds": total,
+            "interpreter_seconds": wall_seconds,
+            "modules": len(entries),
+            "packages": [
+                {"package": name, "seconds": seconds, "share": seconds / total if total else 0.0}
+                for name, seconds in ranked[:top]
+            ]
+        }
+
+    @staticmethod
+    def print_report(report: Dict[str, Any]) -> None:
+        print(
+            f"Importing {report['module']}: {report['import_seconds']:.2f}s in {report['modules']} modules "
+            f"({report['interpreter_seconds']:.2f}s including interpreter start)"
+        )
+        for package in report["packages"]:
+            print(f"  {package['package']:<24} {package['seconds']:>7.3f}s  {package['share']:>6.1%}")
+
+
+if __name__ == "__main__":
+    # Usage: python -m tools.startup_tools [module ...]
+    for module in sys.argv[1:] or ["main"]:
+        StartupTools.print_report(StartupTools.import_report(module))
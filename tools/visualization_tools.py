@@ -1,10 +1,138 @@
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.express as px
+import numpy as np
+import base64
+import html
+from datetime import datetime
+import json
 import os
+from pathlib import Path
+from typing import Dict, Any, List
+from urllib.parse import quote
+
+# matplotlib, seaborn and plotly are imported inside the functions that draw,
+# so importing this module (and the agents using it) stays cheap
+
+# Figures written by write_figure keep their JSON in this block so dashboards can collect it
+FIGURE_DATA_TAG = '<script type="application/json" class="figure-data">'
+
+# Typed array dtypes plotly.js decodes from base64 "bdata"
+BDATA_DTYPES = {"i1", "u1", "i2", "u2", "i4", "u4", "f4", "f8"}
+
 
 class VisualizationTools:
+    @staticmethod
+    def plot_filename(kind: str, plot_type: str, x_column: str, y_column: str = None) -> str:
+        """File name of a plot, e.g. ``static_histogram_Jumlah.png``."""
+        filename = f"{kind}_{plot_type}_{x_column}"
+        if y_column:
+            filename += f"_{y_column}"
+        return filename + (".png" if kind == "static" else ".html")
+    
+    @staticmethod
+    def plot_aggregates(
+        df: pd.DataFrame,
+        columns: List[str],
+        bins: int = 50,
+        kde_sample: int = 10_000,
+        seed: int = 42,
+        highlights: Dict[str, np.ndarray] = None
+    ) -> Dict[str, Any]:
+        """Bin counts, KDE curves and pairwise 2-D histograms for large frames, computed in one pass per column.
+        
+        Histograms and the pairplot diagonal share the same bin edges; the
+        KDE is fitted on a bounded random sample and scaled to the counts.
+        """
+        highlights = highlights or {}
+        rng = np.random.default_rng(seed)
+        values = {col: df[col].to_numpy(dtype=float) for col in columns}
+        valid = {col: np.isfinite(array) for col, array in values.items()}
+        
+        histograms = {}
+        for col in columns:
+            finite = values[col][valid[col]]
+            edges = np.histogram_bin_edges(finite, bins=bins)
+            counts, _ = np.histogram(finite, bins=edges)
+            highlight = highlights.get(col)
+            histograms[col] = {
+                "edges": edges,
+                "counts": counts,
+                "outlier_counts": np.histogram(values[col][valid[col] & highlight], bins=edges)[0]
+                    if highlight is not None and highlight.any() else None,
+                "kde": VisualizationTools._kde_curve(finite, edges, kde_sample, rng)
+            }
+        
+        pairs = {}
+        for i, x in enumerate(columns):
+            for y in columns[i + 1:]:
+                both = valid[x] & valid[y]
+                pairs[(x, y)], _, _ = np.histogram2d(
+                    values[x][both], values[y][both],
+                    bins=[histograms[x]["edges"], histograms[y]["edges"]]
+                )
+        
+        return {"rows": len(df), "histograms": histograms, "pairs": pairs}
+    
+    @staticmethod
+    def _kde_curve(values: np.ndarray, edges: np.ndarray, sample_size: int, rng: np.random.Generator, points: int = 200):
+        """Gaussian KDE (Scott's bandwidth) on at most ``sample_size`` values, scaled to histogram counts."""
+        if len(values) < 2:
+            return None
+        sample = values if len(values) <= sample_size else rng.choice(values, sample_size, replace=False)
+        bandwidth = sample.std() * len(sample) ** (-1 / 5)
+        if bandwidth == 0:
+            return None
+        grid = np.linspace(edges[0], edges[-1], points)
+        density = np.zeros(points)
+        # Accumulate in blocks to bound the (grid x sample) temporary
+        for start in range(0, len(sample), 2_000):
+            z = (grid[:, None] - sample[None, start:start + 2_000]) / bandwidth
+            density += np.exp(-0.5 * z * z).sum(axis=1)
+        density /= len(sample) * bandwidth * np.sqrt(2 * np.pi)
+        return {"x": grid, "y": density * len(values) * (edges[1] - edges[0])}
+    
+    @staticmethod
+    def _binned_histogram(ax, column: str, histogram: Dict[str, Any]) -> None:
+        edges, counts = histogram["edges"], histogram["counts"]
+        outliers = histogram.get("outlier_counts")
+        if outliers is not None:
+            # Stack flagged rows on top of the regular distribution
+            ax.stairs(counts - outliers, edges, fill=True, label='Normal')
+            ax.stairs(counts, edges, baseline=counts - outliers, fill=True, label='Outlier')
+            ax.legend()
+        else:
+            ax.stairs(counts, edges, fill=True, alpha=0.6)
+        if histogram.get("kde") is not None:
+            ax.plot(histogram["kde"]["x"], histogram["kde"]["y"])
+        ax.set_xlabel(column)
+        ax.set_ylabel('Count')
+    
+    @staticmethod
+    def _binned_pairplot(columns: List[str], aggregates: Dict[str, Any]) -> None:
+        """Pairplot from precomputed aggregates: histograms on the diagonal, 2-D histogram panels elsewhere."""
+        import matplotlib.pyplot as plt
+        
+        k = len(columns)
+        fig = plt.gcf()
+        fig.set_size_inches(2.5 * k, 2.5 * k)
+        axes = fig.subplots(k, k, squeeze=False)
+        for i, y in enumerate(columns):
+            for j, x in enumerate(columns):
+                ax = axes[i, j]
+                if i == j:
+                    histogram = aggregates["histograms"][x]
+                    ax.stairs(histogram["counts"], histogram["edges"], fill=True)
+                else:
+                    counts = aggregates["pairs"][(x, y)] if (x, y) in aggregates["pairs"] else aggregates["pairs"][(y, x)].T
+                    ax.pcolormesh(
+                        aggregates["histograms"][x]["edges"],
+                        aggregates["histograms"][y]["edges"],
+                        np.ma.masked_equal(counts.T, 0),
+                        cmap='viridis',
+                        norm='log'
+                    )
+                ax.set_xlabel(x if i == k - 1 else '')
+                ax.set_ylabel(y if j == 0 else '')
+    
     @staticmethod
     def create_static_plot(
         df: pd.DataFrame,
@@ -12,9 +140,13 @@ class VisualizationTools:
         x_column: str,
         y_column: str = None,
         title: str = None,
+        output_dir: str = "output/visualizations",
         **kwargs
     ) -> str:
         """Create various types of static plots and save them to file."""
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        
         plt.figure(figsize=(12, 6))
         
         if plot_type == "scatter":
@@ -26,24 +158,38 @@ class VisualizationTools:
                 sns.barplot(data=df, x=x_column, y=y_column)
             else:
                 df[x_column].value_counts().plot(kind='bar')
+        elif plot_type == "histogram" and kwargs.get('aggregates') is not None:
+            VisualizationTools._binned_histogram(plt.gca(), x_column, kwargs['aggregates']['histograms'][x_column])
         elif plot_type == "histogram":
-            sns.histplot(data=df, x=x_column, kde=True)
+            highlight = kwargs.get('highlight')
+            if highlight is not None and highlight.any():
+                # Stack flagged rows on top of the regular distribution
+                sns.histplot(
+                    x=df[x_column],
+                    hue=pd.Series(highlight, index=df.index).map({False: 'Normal', True: 'Outlier'}),
+                    multiple='stack',
+                    kde=True
+                )
+            else:
+                sns.histplot(data=df, x=x_column, kde=True)
         elif plot_type == "boxplot":
             sns.boxplot(data=df, x=x_column, y=y_column)
         elif plot_type == "heatmap":
-            sns.heatmap(df.corr(), annot=True, cmap='coolwarm')
+            corr = kwargs.get('corr')
+            sns.heatmap(corr if corr is not None else df.corr(), annot=True, cmap='coolwarm')
+        elif plot_type == "pairplot" and kwargs.get('aggregates') is not None:
+            VisualizationTools._binned_pairplot(kwargs.get('columns', list(df.columns)), kwargs['aggregates'])
         elif plot_type == "pairplot":
             sns.pairplot(df[kwargs.get('columns', df.columns)])
             plt.tight_layout()
         
-        if title:
+        if title and plot_type == "pairplot":
+            plt.suptitle(title)
+        elif title:
             plt.title(title)
         
-        os.makedirs("output/visualizations", exist_ok=True)
-        filename = f"output/visualizations/static_{plot_type}_{x_column}"
-        if y_column:
-            filename += f"_{y_column}"
-        filename += ".png"
+        os.makedirs(output_dir, exist_ok=True)
+        filename = os.path.join(output_dir, VisualizationTools.plot_filename("static", plot_type, x_column, y_column))
         
         plt.tight_layout()
         plt.savefig(filename)
@@ -58,13 +204,28 @@ class VisualizationTools:
         x_column: str,
         y_column: str = None,
         title: str = None,
+        output_dir: str = "output/visualizations",
         **kwargs
     ) -> str:
         """Create interactive plots using plotly."""
+        import plotly.express as px
+        
+        # Large scatter and line traces are drawn with WebGL (scattergl)
+        webgl_threshold = kwargs.get('webgl_threshold')
+        render_mode = 'webgl' if webgl_threshold is not None and len(df) > webgl_threshold else 'auto'
+        
         if plot_type == "scatter":
-            fig = px.scatter(df, x=x_column, y=y_column, title=title)
+            highlight = kwargs.get('highlight')
+            if highlight is not None:
+                fig = px.scatter(
+                    df, x=x_column, y=y_column, title=title,
+                    color=pd.Series(highlight, index=df.index).map({False: 'Normal', True: 'Outlier'}),
+                    render_mode=render_mode
+                )
+            else:
+                fig = px.scatter(df, x=x_column, y=y_column, title=title, render_mode=render_mode)
         elif plot_type == "line":
-            fig = px.line(df, x=x_column, y=y_column, title=title)
+            fig = px.line(df, x=x_column, y=y_column, title=title, render_mode=render_mode)
         elif plot_type == "bar":
             if y_column:
                 fig = px.bar(df, x=x_column, y=y_column, title=title)
@@ -75,16 +236,122 @@ class VisualizationTools:
         elif plot_type == "box":
             fig = px.box(df, x=x_column, y=y_column, title=title)
         elif plot_type == "heatmap":
-            fig = px.imshow(df.corr(), title=title)
+            corr = kwargs.get('corr')
+            fig = px.imshow(corr if corr is not None else df.corr(), title=title)
         elif plot_type == "pairplot":
             fig = px.scatter_matrix(df[kwargs.get('columns', df.columns)], title=title)
         
-        os.makedirs("output/visualizations", exist_ok=True)
-        filename = f"output/visualizations/interactive_{plot_type}_{x_column}"
-        if y_column:
-            filename += f"_{y_column}"
-        filename += ".html"
+        os.makedirs(output_dir, exist_ok=True)
+        filename = os.path.join(output_dir, VisualizationTools.plot_filename("interactive", plot_type, x_column, y_column))
+        
+        if kwargs.get('plotlyjs'):
+            VisualizationTools.write_figure(fig, filename, kwargs['plotlyjs'], single_precision=render_mode == 'webgl')
+        else:
+            fig.write_html(filename)
+        
+        return filename
+
+    @staticmethod
+    def write_plotlyjs(output_dir: str = "output/visualizations") -> str:
+        """Write the bundled plotly.js once per version and return its path."""
+        from plotly.offline import get_plotlyjs, get_plotlyjs_version
+        
+        path = os.path.join(output_dir, f"plotly-{get_plotlyjs_version()}.min.js")
+        if not os.path.exists(path):
+            os.makedirs(output_dir, exist_ok=True)
+            with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+                f.write(get_plotlyjs())
+            os.replace(f"{path}.tmp", path)
+        return path
+
+    @staticmethod
+    def _encode_array(values: np.ndarray, single_precision: bool = False):
+        """Numeric arrays as base64 typed arrays; datetimes become epoch milliseconds. Returns (value, is_date)."""
+        is_date = False
+        if values.dtype == object and len(values) and isinstance(values[0], (datetime, np.datetime64)):
+            values = pd.to_datetime(values).to_numpy()
+        if np.issubdtype(values.dtype, np.datetime64):
+            milliseconds = values.astype("datetime64[ms]")
+            values = milliseconds.astype(np.int64).astype(np.float64)
+            values[np.isnat(milliseconds)] = np.nan
+            is_date = True
+        if values.dtype.kind not in "biuf":
+            return values, False
+        
+        if values.dtype.kind == "b":
+            values = values.astype(np.uint8)
+        elif single_precision and values.dtype.kind == "f" and not is_date:
+            # Screen coordinates do not need double precision; dates do, to stay on the millisecond
+            values = values.astype(np.float32)
+        elif f"{values.dtype.kind}{values.dtype.itemsize}" not in BDATA_DTYPES:
+            # 64-bit integers and half floats have no typed array counterpart
+            values = values.astype(np.float64)
+        values = np.ascontiguousarray(values, dtype=values.dtype.newbyteorder("<"))
+        return {
+            "dtype": f"{values.dtype.kind}{values.dtype.itemsize}",
+            "bdata": base64.b64encode(values.tobytes()).decode("ascii")
+        }, is_date
+
+    @staticmethod
+    def write_figure(fig, filename: str, plotlyjs_src: str, single_precision: bool = False) -> None:
+        """Write a figure as a small HTML page that loads a shared plotly.js and holds binary-encoded arrays."""
+        from plotly.utils import PlotlyJSONEncoder
+        
+        figure = fig.to_dict()
+        layout = figure.setdefault("layout", {})
+        for trace in figure["data"]:
+            for key, value in list(trace.items()):
+                if isinstance(value, np.ndarray):
+                    trace[key], is_date = VisualizationTools._encode_array(value, single_precision)
+                    if is_date and key in ("x", "y"):
+                        axis = f"{key}axis{trace.get(f'{key}axis', key)[1:]}"
+                        layout.setdefault(axis, {})["type"] = "date"
+        
+        payload = json.dumps(figure, cls=PlotlyJSONEncoder).replace("</", "<\\/")
+        title = html.escape(str(layout.get("title", {}).get("text") or os.path.basename(filename)))
+        with open(filename, "w", encoding="utf-8") as f:
+            f.write(
+                f'<!DOCTYPE html>\n<html>\n<head><meta charset="utf-8"><title>{title}</title></head>\n<body>\n'
+                f'<div id="figure" style="width:100%;height:95vh"></div>\n'
+                f'{FIGURE_DATA_TAG}{payload}</script>\n'
+                f'<script src="{plotlyjs_src}"></script>\n'
+                '<script>\n'
+                'var figure = JSON.parse(document.querySelector(".figure-data").textContent);\n'
+                'Plotly.newPlot("figure", figure.data, figure.layout, {responsive: true});\n'
+                '</script>\n</body>\n</html>\n'
+            )
+
+    @staticmethod
+    def create_dashboard(files: List[str], filename: str, title: str = "Dashboard") -> str:
+        """One page that loads each figure page written by ``write_figure`` when it scrolls into view.
         
-        fig.write_html(filename)
+        Figures are embedded as frames pointing at their own pages, so the
+        point data is stored once and the dashboard stays a few KB however
+        large the figures are.
+        """
+        sections = []
+        for file in files:
+            src = html.escape(quote(Path(os.path.relpath(file, os.path.dirname(filename) or ".")).as_posix()))
+            name = html.escape(os.path.basename(file))
+            sections.append(
+                f'<section>\n<h2><a href="{src}">{name}</a></h2>\n'
+                f'<iframe class="figure" data-src="{src}" title="{name}" style="width:100%;height:640px;border:0"></iframe>\n</section>'
+            )
         
+        with open(filename, "w", encoding="utf-8") as f:
+            f.write(
+                f'<!DOCTYPE html>\n<html>\n<head><meta charset="utf-8"><title>{html.escape(title)}</title></head>\n<body>\n'
+                f'<h1>{html.escape(title)}</h1>\n'
+                + "\n".join(sections) +
+                '\n<script>\n'
+                'var observer = new IntersectionObserver(function (entries) {\n'
+                '    entries.forEach(function (entry) {\n'
+                '        if (!entry.isIntersecting) return;\n'
+                '        observer.unobserve(entry.target);\n'
+                '        entry.target.src = entry.target.dataset.src;\n'
+                '    });\n'
+                '}, {rootMargin: "200px"});\n'
+                'document.querySelectorAll(".figure").forEach(function (frame) { observer.observe(frame); });\n'
+                '</script>\n</body>\n</html>\n'
+            )
         return filename
\ No newline at end of file